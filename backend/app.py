@@ -1,7 +1,8 @@
 from flask import Flask
 from config import DevelopmentConfig
 from flask_cors import CORS  # If you installed this
-from src import bcrypt, mongo, jwt
+from src import bcrypt, mongo, jwt, revocation_store, password_hasher, task_list_cache
+from src.utils.json_provider import BSONJSONProvider
 import os
 from dotenv import load_dotenv
 
@@ -10,13 +11,38 @@ def create_app(config_class=DevelopmentConfig):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # First, so request timings include every other hook
+    mongo_listeners = []
+    if app.config["METRICS_ENABLED"]:
+        from src.utils.metrics import init_metrics, mongo_event_listeners
+
+        init_metrics(app)
+        mongo_listeners = mongo_event_listeners()
     
-    CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}})
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": "http://localhost:3000"}},
+        # Pagination headers of GET /api/users, readable by the frontend
+        expose_headers=["X-Next-Cursor", "Link"],
+    )
 
     
-    mongo.init_app(app)
+    mongo.init_app(app, event_listeners=mongo_listeners)
+    # Replaces Flask-PyMongo's json_util provider ({"$oid": ...} output): jsonify()
+    # now writes ObjectIds as plain strings, dates as ISO 8601 (orjson if available)
+    app.json = BSONJSONProvider(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
+    revocation_store.init_app(app)
+    password_hasher.init_app(app)
+    task_list_cache.init_app(app)
+
+    if app.config["MONGO_ENSURE_INDEXES"]:
+        from src.utils.indexes import ensure_indexes
+
+        # A missing index must not keep the API down; create_indexes.py
+        # reports why it failed (e.g. duplicate emails) until fixed
+        ensure_indexes(mongo.db, strict=False)
 
 
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
@@ -44,8 +70,38 @@ def create_app(config_class=DevelopmentConfig):
     return app
 
 
+def start_background_workers(app):
+    """
+    Starts the enabled background threads: file reaper, user-delete worker and
+    task change stream.
+
+    Only long-running server processes call this (wsgi.py under gunicorn, or
+    `python app.py`). The CLIs build their app with create_app() alone, so a
+    one-shot script never starts daemon threads that its exit would kill
+    mid-batch, nor competes with its own work.
+    """
+    if app.config["FILE_REAPER_ENABLED"]:
+        from src.utils.reaper import FileReaper
+
+        app.extensions["file_reaper"] = FileReaper(app)
+        app.extensions["file_reaper"].start()
+
+    if app.config["USER_DELETE_WORKER_ENABLED"]:
+        from src.users.jobs import UserDeleteWorker
+
+        app.extensions["user_delete_worker"] = UserDeleteWorker(app)
+        app.extensions["user_delete_worker"].start()
+
+    if app.config["TASK_EVENTS_ENABLED"]:
+        from src.tasks.events import TaskChangeHub
+
+        app.extensions["task_events"] = TaskChangeHub(app)
+        app.extensions["task_events"].start()
+
+
 if __name__ == "__main__":
     load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
     app = create_app()
+    start_background_workers(app)
     app.run(host="0.0.0.0", port=5000)
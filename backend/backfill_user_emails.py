@@ -0,0 +1,53 @@
+import argparse
+from pymongo import ASCENDING, UpdateOne
+from app import create_app
+from src.auth.models import email_key, get_user_collection
+
+app = create_app()
+
+
+def backfill_user_emails(batch_size=1000):
+    """
+    Stores `email_lower` on users created before it existed.
+
+    Until then those users sort first in the admin list and never match an
+    `email_prefix=` search. Each update only applies if the email is still the
+    one read, so concurrent edits (which set email_lower themselves) win.
+    """
+    updated = 0
+    last_id = None
+
+    with app.app_context():
+        users = get_user_collection()
+        while True:
+            query = {"email_lower": {"$exists": False}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = list(
+                users.find(query, {"email": 1}).sort("_id", ASCENDING).limit(batch_size)
+            )
+            if not batch:
+                break
+
+            requests = [
+                UpdateOne(
+                    {"_id": user["_id"], "email": user.get("email")},
+                    {"$set": {"email_lower": email_key(user.get("email"))}},
+                )
+                for user in batch
+            ]
+            updated += users.bulk_write(requests, ordered=False).modified_count
+            last_id = batch[-1]["_id"]
+            print(f"Backfilled {updated} users (last user {last_id})")
+
+    print(f"Done: email_lower set on {updated} users.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Set email_lower on users registered before it was stored."
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    backfill_user_emails(args.batch_size)
@@ -0,0 +1,86 @@
+"""
+Compares task throughput of the single-item endpoints with POST /api/tasks/bulk.
+
+Creates N tasks one POST at a time and then through bulk batches, and does
+the same for reassignment (PUT vs bulk update). Prints tasks/sec for each.
+
+    python -m benchmarks.bench_bulk --tasks 5000 --batch 500
+"""
+
+import argparse
+import json
+
+from benchmarks.common import Timer, auth_header, make_app
+
+
+def run(task_count, batch_size):
+    app = make_app()
+    headers, user_id = auth_header(app, role="admin")
+    _, other_id = auth_header(app, role="user")
+    client = app.test_client()
+    report = {"tasks": task_count, "batch": batch_size}
+
+    with Timer() as timer:
+        single_ids = []
+        for index in range(task_count):
+            response = client.post(
+                "/api/tasks", data={"title": f"Single {index}"}, headers=headers
+            )
+            single_ids.append(response.get_json()["task_id"])
+    report["single_create_per_sec"] = round(task_count / timer.elapsed)
+
+    with Timer() as timer:
+        for task_id in single_ids:
+            client.put(
+                f"/api/tasks/{task_id}",
+                json={"assigned_to": str(other_id)},
+                headers=headers,
+            )
+    report["single_update_per_sec"] = round(task_count / timer.elapsed)
+
+    def run_bulk(operations):
+        ids = []
+        for start in range(0, len(operations), batch_size):
+            response = client.post(
+                "/api/tasks/bulk",
+                json=operations[start : start + batch_size],
+                headers=headers,
+            )
+            ids += [result["task_id"] for result in response.get_json()["results"]]
+        return ids
+
+    with Timer() as timer:
+        bulk_ids = run_bulk(
+            [
+                {"op": "create", "task": {"title": f"Bulk {index}"}}
+                for index in range(task_count)
+            ]
+        )
+    report["bulk_create_per_sec"] = round(task_count / timer.elapsed)
+
+    with Timer() as timer:
+        run_bulk(
+            [
+                {
+                    "op": "update",
+                    "task_id": task_id,
+                    "task": {"assigned_to": str(other_id)},
+                }
+                for task_id in bulk_ids
+            ]
+        )
+    report["bulk_update_per_sec"] = round(task_count / timer.elapsed)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.tasks, args.batch)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Shows that GET /api/tasks/export streams with flat memory.
+
+For each row count the export is consumed chunk by chunk through the test
+client while the process RSS is sampled. Peak RSS growth should stay flat as
+the row count grows by orders of magnitude.
+
+    python -m benchmarks.bench_export --rows 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+
+from benchmarks.common import (
+    Timer,
+    auth_header,
+    current_rss_bytes,
+    make_app,
+    seed_tasks,
+)
+
+
+def run(rows, export_format):
+    app = make_app()
+    headers, user_id = auth_header(app, role="admin")
+    seed_tasks(app, rows, user_id)
+    client = app.test_client()
+
+    baseline_rss = current_rss_bytes()
+    peak_rss = baseline_rss
+    received = 0
+    with Timer() as timer:
+        response = client.get(
+            f"/api/tasks/export?format={export_format}",
+            headers=headers,
+            buffered=False,
+        )
+        for chunk in response.response:
+            received += len(chunk)
+            peak_rss = max(peak_rss, current_rss_bytes())
+        response.close()
+
+    return {
+        "rows": rows,
+        "format": export_format,
+        "seconds": round(timer.elapsed, 3),
+        "rows_per_sec": round(rows / timer.elapsed) if timer.elapsed else None,
+        "bytes": received,
+        "rss_growth_mb": round((peak_rss - baseline_rss) / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv"])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        print(json.dumps(run(rows, args.format)))
+
+
+if __name__ == "__main__":
+    main()
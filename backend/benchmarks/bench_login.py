@@ -0,0 +1,80 @@
+"""
+Measures login throughput with bcrypt inline vs. in the hashing process pool.
+
+Fires concurrent POST /api/auth/login requests at one app for each mode and
+prints logins/sec, logins/sec per core used, and how many requests were shed
+with 503. "inline" is how logins ran before the pool existed (each attempt
+also paid a second, debug-only bcrypt check then, so halve that figure for
+the true old number).
+
+    python -m benchmarks.bench_login --logins 400 --concurrency 16 --rounds 12
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import BenchmarkConfig, Timer, make_app
+from src import mongo, password_hasher
+
+PASSWORD = "BenchPassword123"
+
+
+def run_mode(workers, login_count, concurrency, rounds, queue_size):
+    BenchmarkConfig.BCRYPT_LOG_ROUNDS = rounds
+    BenchmarkConfig.PASSWORD_HASH_WORKERS = workers
+    BenchmarkConfig.PASSWORD_HASH_QUEUE_SIZE = queue_size
+    app = make_app()
+
+    client = app.test_client()
+    response = client.post(
+        "/api/auth/register",
+        json={"email": "bench_login@example.com", "password": PASSWORD},
+    )
+    assert response.status_code == 201, response.get_json()
+
+    def login(_):
+        return app.test_client().post(
+            "/api/auth/login",
+            json={"email": "bench_login@example.com", "password": PASSWORD},
+        ).status_code
+
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = list(pool.map(login, range(login_count)))
+
+    password_hasher.shutdown()
+    with app.app_context():
+        mongo.db.client.drop_database(mongo.db.name)
+
+    succeeded = statuses.count(200)
+    cores = min(workers or concurrency, os.cpu_count() or 1)
+    return {
+        "mode": f"pool({workers})" if workers else "inline",
+        "logins_per_sec": round(succeeded / timer.elapsed, 1),
+        "logins_per_sec_per_core": round(succeeded / timer.elapsed / cores, 1),
+        "rejected_503": statuses.count(503),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--queue-size", type=int, default=64)
+    args = parser.parse_args()
+
+    report = [
+        run_mode(0, args.logins, args.concurrency, args.rounds, args.queue_size),
+        run_mode(
+            args.workers, args.logins, args.concurrency, args.rounds, args.queue_size
+        ),
+    ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compares `?q=` text-index search against a full collection scan.
+
+Seeds N tasks whose titles/descriptions draw words from a Zipf-like
+vocabulary (a few very common words, a long tail of rare ones), then times
+GET /api/tasks?q=<term> for a rare, a medium and a common term and the
+equivalent case-insensitive $regex collection scan. Prints p50/p95 in
+milliseconds.
+
+    python -m benchmarks.bench_search --tasks 1000000 --repeat 20
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from benchmarks.common import (
+    BenchmarkConfig,
+    Timer,
+    auth_header,
+    make_app,
+    percentile,
+)
+from src import mongo
+
+VOCABULARY_SIZE = 5000
+
+
+def word(rank):
+    return f"w{rank}"
+
+
+def seed_text_tasks(app, count, assigned_to, batch_size=10_000, seed=42):
+    """Inserts `count` tasks whose text follows a Zipf-like word distribution."""
+    rng = random.Random(seed)
+    ranks = range(1, VOCABULARY_SIZE + 1)
+    weights = [1 / rank for rank in ranks]
+    with app.app_context():
+        inserted = 0
+        while inserted < count:
+            size = min(batch_size, count - inserted)
+            words = rng.choices(ranks, weights, k=size * 8)
+            batch = []
+            for index in range(size):
+                picks = words[index * 8 : index * 8 + 8]
+                batch.append(
+                    {
+                        "_id": ObjectId(),
+                        "title": " ".join(word(rank) for rank in picks[:3]),
+                        "description": " ".join(word(rank) for rank in picks[3:]),
+                        "status": "To Do",
+                        "priority": "Low",
+                        "due_date": datetime(2025, 1, 1),
+                        "assigned_to": assigned_to,
+                        "created_by": assigned_to,
+                        "attached_documents": [],
+                        "version": 1,
+                    }
+                )
+            mongo.db.tasks.insert_many(batch, ordered=False)
+            inserted += size
+
+
+def time_requests(client, url, headers, repeat):
+    samples = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        samples.append(timer.elapsed * 1000)
+    return samples
+
+
+def time_scans(app, term, repeat):
+    samples = []
+    with app.app_context():
+        for _ in range(repeat):
+            with Timer() as timer:
+                pattern = {"$regex": rf"\b{term}\b", "$options": "i"}
+                query = {"$or": [{"title": pattern}, {"description": pattern}]}
+                # Ranking needs every match, so the scan has to read them all
+                mongo.db.tasks.count_documents(query)
+            samples.append(timer.elapsed * 1000)
+    return samples
+
+
+def run(task_count, repeat):
+    # The task list cache would turn every repeat into a hit
+    BenchmarkConfig.TASK_LIST_CACHE = "off"
+    app = make_app()
+    headers, admin_id = auth_header(app, role="admin")
+    seed_text_tasks(app, task_count, admin_id)
+    client = app.test_client()
+
+    report = {"tasks": task_count, "repeat": repeat, "terms": []}
+    for label, rank in (("rare", VOCABULARY_SIZE), ("medium", 200), ("common", 2)):
+        term = word(rank)
+        search = time_requests(
+            client, f"/api/tasks?q={term}&limit=20&count=none", headers, repeat
+        )
+        scan = time_scans(app, term, max(1, repeat // 5))
+        report["terms"].append(
+            {
+                "term": label,
+                "search_p50_ms": round(percentile(search, 50), 2),
+                "search_p95_ms": round(percentile(search, 95), 2),
+                "scan_p50_ms": round(percentile(scan, 50), 2),
+                "scan_p95_ms": round(percentile(scan, 95), 2),
+            }
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tasks, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
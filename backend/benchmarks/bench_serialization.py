@@ -0,0 +1,121 @@
+"""
+Micro-benchmark of serializing one 500-task page into a JSON response.
+
+Compares the previous path (stringify _id/assigned_to by hand, then
+Flask-PyMongo's json_util provider) with BSONJSONProvider on orjson and on
+its stdlib fallback. Needs no database.
+
+    python -m benchmarks.bench_serialization --tasks 500 --repeat 200
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from bson import Decimal128
+from bson.objectid import ObjectId
+from flask import Flask
+from flask_pymongo.helpers import BSONProvider
+
+from benchmarks.common import Timer, percentile
+from src.utils import json_provider
+from src.utils.json_provider import BSONJSONProvider
+
+
+def make_page(task_count):
+    owner = ObjectId()
+    start = datetime(2025, 1, 1)
+    return {
+        "tasks": [
+            {
+                "_id": ObjectId(),
+                "title": f"Task {index}",
+                "description": "Synthetic task used for serialization timings",
+                "status": "To Do",
+                "priority": "High",
+                "due_date": start + timedelta(days=index),
+                "assigned_to": owner,
+                "created_by": owner,
+                "estimate": Decimal128("2.5"),
+                "attached_documents": [
+                    {
+                        "original_name": "spec.pdf",
+                        "stored_name": "0f1e2d3c.pdf",
+                        "mime_type": "application/pdf",
+                        "size_bytes": 48213,
+                    }
+                ],
+                "version": 3,
+            }
+            for index in range(task_count)
+        ],
+        "pagination": {"total_tasks": task_count, "page_size": task_count},
+    }
+
+
+def legacy_response(app, page):
+    # What list_tasks did before: mutate every document, then json_util
+    for task in page["tasks"]:
+        task["_id"] = str(task["_id"])
+        task["assigned_to"] = str(task["assigned_to"])
+    return app.json.response(page)
+
+
+def time_it(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            fn()
+        samples.append(timer.elapsed * 1000)
+    return samples
+
+
+def run(task_count, repeat):
+    legacy_app, app = Flask("legacy"), Flask("bench")
+    legacy_app.json = BSONProvider(legacy_app)
+    app.json = BSONJSONProvider(app)
+
+    cases = {
+        "legacy_json_util": lambda: legacy_response(legacy_app, make_page(task_count)),
+        "bson_provider_orjson": lambda: app.json.response(make_page(task_count)),
+    }
+    report = {"tasks": task_count, "repeat": repeat, "results": {}}
+
+    # Page construction is timed separately and subtracted from every case
+    build = percentile(time_it(lambda: make_page(task_count), repeat), 50)
+    for name, fn in cases.items():
+        if name.endswith("orjson") and json_provider.orjson is None:
+            continue
+        with app.app_context(), legacy_app.app_context():
+            samples = time_it(fn, repeat)
+        report["results"][name] = {
+            "p50_ms": round(percentile(samples, 50) - build, 3),
+            "p95_ms": round(percentile(samples, 95) - build, 3),
+            "bytes": len(fn().get_data()),
+        }
+
+    orjson_module, json_provider.orjson = json_provider.orjson, None
+    try:
+        samples = time_it(lambda: app.json.response(make_page(task_count)), repeat)
+        report["results"]["bson_provider_stdlib"] = {
+            "p50_ms": round(percentile(samples, 50) - build, 3),
+            "p95_ms": round(percentile(samples, 95) - build, 3),
+            "bytes": len(app.json.response(make_page(task_count)).get_data()),
+        }
+    finally:
+        json_provider.orjson = orjson_module
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tasks, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
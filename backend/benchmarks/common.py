@@ -0,0 +1,119 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+
+Benchmarks run against a real mongod (BENCH_MONGO_URI, default
+mongodb://localhost:27017/task_management_bench_db) and drop that
+database when they start. Run them from the backend folder, e.g.:
+
+    python -m benchmarks.bench_export
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson.objectid import ObjectId
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config import TestConfig
+from src import mongo
+
+BENCH_DB = "task_management_bench_db"
+
+
+class BenchmarkConfig(TestConfig):
+    """Test configuration pointed at a throwaway benchmark database."""
+
+    MONGO_DB = BENCH_DB
+    MONGO_URI = os.environ.get(
+        "BENCH_MONGO_URI", f"mongodb://localhost:27017/{BENCH_DB}"
+    )
+
+
+def make_app(reset=True):
+    """Creates the app on the benchmark database, optionally starting empty."""
+    app = create_app(config_class=BenchmarkConfig)
+    if reset:
+        with app.app_context():
+            mongo.db.client.drop_database(mongo.db.name)
+            from src.utils.indexes import ensure_indexes
+
+            ensure_indexes(mongo.db)
+    return app
+
+
+def bearer_header(app, user_id, role):
+    """Authorization header for an existing user, without going through login."""
+    with app.app_context():
+        token = create_access_token(
+            identity=str(user_id), additional_claims={"role": role}
+        )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def auth_header(app, role="admin", email=None):
+    """Inserts a user directly and returns (Authorization header, user_id)."""
+    with app.app_context():
+        email = email or f"bench_{role}_{ObjectId()}@example.com"
+        user_id = mongo.db.users.insert_one(
+            {"email": email, "password": "not-a-hash", "role": role}
+        ).inserted_id
+    return bearer_header(app, user_id, role), user_id
+
+
+def seed_tasks(app, count, assigned_to, batch_size=10_000):
+    """Bulk-inserts `count` synthetic tasks assigned to `assigned_to`."""
+    statuses = ["To Do", "In Progress", "Completed"]
+    priorities = ["Low", "Medium", "High"]
+    with app.app_context():
+        inserted = 0
+        while inserted < count:
+            batch = []
+            for index in range(inserted, min(count, inserted + batch_size)):
+                batch.append(
+                    {
+                        "title": f"Task {index}",
+                        "description": f"Synthetic task number {index}",
+                        "status": statuses[index % 3],
+                        "priority": priorities[index % 3],
+                        "due_date": datetime(2025, index % 12 + 1, index % 28 + 1),
+                        "assigned_to": assigned_to,
+                        "created_by": assigned_to,
+                        "attached_documents": [],
+                    }
+                )
+            mongo.db.tasks.insert_many(batch, ordered=False)
+            inserted += len(batch)
+
+
+def current_rss_bytes():
+    """Resident set size of this process right now (Linux), 0 if unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class Timer:
+    """Context manager measuring wall-clock seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,155 @@
+"""
+Synthetic data for the benchmark suite: users and tasks with realistic skew.
+
+Task ownership follows a Zipf-like distribution over users, so a handful of
+power users own a large share of all tasks while most users own a few.
+Statuses, priorities and due dates are skewed the same way real boards are
+(most tasks done or to do, few high priority, due dates around today).
+Everything is bulk-inserted in unordered batches.
+
+    python -m benchmarks.datagen --users 10000 --tasks 1000000
+"""
+
+import argparse
+import itertools
+import json
+import random
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+from benchmarks.common import Timer, make_app
+from src import mongo, password_hasher
+
+PASSWORD = "BenchPassword123"
+
+STATUS_WEIGHTS = {"To Do": 0.35, "In Progress": 0.15, "Completed": 0.5}
+PRIORITY_WEIGHTS = {"Low": 0.5, "Medium": 0.35, "High": 0.15}
+WORDS = (
+    "report review deploy invoice design meeting budget release customer "
+    "audit backlog migrate onboarding roadmap security sprint bug fix api "
+    "database dashboard contract hiring training vendor"
+).split()
+
+
+def user_email(index):
+    return f"bench_user_{index}@example.com"
+
+
+def seed_users(app, count, admin_share=0.01, batch_size=10_000):
+    """
+    Inserts `count` users sharing one real password hash (PASSWORD).
+
+    Returns: The user ids in insertion order (index i has user_email(i)).
+    """
+    with app.app_context():
+        # One hash at the app's cost factor; logins still pay a full check
+        password = password_hasher.hash_password(PASSWORD)
+        admin_every = max(1, round(1 / admin_share)) if admin_share else 0
+        user_ids = []
+        for start in range(0, count, batch_size):
+            batch = []
+            for index in range(start, min(count, start + batch_size)):
+                email = user_email(index)
+                is_admin = admin_every and index % admin_every == 0
+                batch.append(
+                    {
+                        "_id": ObjectId(),
+                        "email": email,
+                        "email_lower": email.lower(),
+                        "password": password,
+                        "role": "admin" if is_admin else "user",
+                    }
+                )
+            mongo.db.users.insert_many(batch, ordered=False)
+            user_ids += [user["_id"] for user in batch]
+    return user_ids
+
+
+def seed_skewed_tasks(app, count, user_ids, skew=1.1, batch_size=10_000, seed=42):
+    """
+    Inserts `count` tasks whose assignees follow a Zipf(`skew`) distribution.
+
+    Returns: [(user_id, task_count)] sorted from the busiest user down.
+    """
+    rng = random.Random(seed)
+    # Rank r gets weight 1/r^skew; the busiest users are the first ids
+    cum_users = list(
+        itertools.accumulate(1 / rank**skew for rank in range(1, len(user_ids) + 1))
+    )
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    owned = [0] * len(user_ids)
+
+    with app.app_context():
+        inserted = 0
+        while inserted < count:
+            size = min(batch_size, count - inserted)
+            owners = rng.choices(range(len(user_ids)), cum_weights=cum_users, k=size)
+            batch_statuses = rng.choices(statuses, status_weights, k=size)
+            batch_priorities = rng.choices(priorities, priority_weights, k=size)
+            batch = []
+            for owner, status, priority in zip(
+                owners, batch_statuses, batch_priorities
+            ):
+                owned[owner] += 1
+                words = rng.sample(WORDS, 6)
+                batch.append(
+                    {
+                        "title": " ".join(words[:3]).capitalize(),
+                        "description": " ".join(words),
+                        "status": status,
+                        "priority": priority,
+                        # Mostly within a month of today, a long tail either way
+                        "due_date": today
+                        + timedelta(
+                            days=round(rng.gauss(0, 30)), hours=rng.randrange(24)
+                        ),
+                        "assigned_to": user_ids[owner],
+                        "created_by": (
+                            user_ids[owner]
+                            if rng.random() < 0.8
+                            else user_ids[rng.randrange(len(user_ids))]
+                        ),
+                        "attached_documents": [],
+                        "version": 1,
+                    }
+                )
+            mongo.db.tasks.insert_many(batch, ordered=False)
+            inserted += size
+
+    return sorted(zip(user_ids, owned), key=lambda item: -item[1])
+
+
+def generate(app, user_count, task_count, skew=1.1):
+    """Seeds a fresh dataset and returns a summary of its shape."""
+    with Timer() as timer:
+        user_ids = seed_users(app, user_count)
+        ownership = seed_skewed_tasks(app, task_count, user_ids, skew=skew)
+    top_share = sum(tasks for _, tasks in ownership[: max(1, user_count // 100)])
+    return {
+        "users": user_count,
+        "tasks": task_count,
+        "skew": skew,
+        "busiest_user_tasks": ownership[0][1],
+        "top_1pct_users_task_share": round(top_share / max(1, task_count), 3),
+        "seconds": round(timer.elapsed, 1),
+        "ownership": ownership,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    args = parser.parse_args()
+
+    summary = generate(make_app(), args.users, args.tasks, args.skew)
+    summary.pop("ownership")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Load-test suite: scripted API scenarios over a large, skewed dataset.
+
+Seeds users and Zipf-distributed tasks (benchmarks.datagen), then drives
+each scenario with concurrent clients and records throughput and
+p50/p95/p99 latency of the successful requests. The report is JSON; with
+--baseline it is compared against an earlier report and the run exits with
+status 1 if any scenario failed more often, got slower (p95/p99 up) or lost
+throughput by more than --tolerance.
+
+Scenarios:
+  list_filtered_deep  filtered, sorted list at page 100-500 (skip/limit)
+  list_cursor_deep    the same filter resumed from a deep keyset cursor
+  get_task            single task read by its (busy) assignee
+  update_task         metadata update of a task
+  login_burst         logins of random users (full bcrypt check)
+  create_task         task creation without files
+  upload              task creation with a PDF attachment
+  download            attachment download
+
+    python -m benchmarks.run_suite --users 10000 --tasks 1000000 --output report.json
+    python -m benchmarks.run_suite --no-seed --baseline report.json
+"""
+
+import argparse
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from bson.objectid import ObjectId
+from pymongo import DESCENDING
+
+from benchmarks.common import (
+    BenchmarkConfig,
+    Timer,
+    bearer_header,
+    make_app,
+    percentile,
+)
+from benchmarks.datagen import PASSWORD, generate, user_email
+from config import Config
+from src import mongo, password_hasher
+from src.utils.keyset import encode_cursor, with_id_tiebreaker
+
+LIST_FILTER = {"status": "To Do", "priority": "High"}
+LIST_SORT = "-due_date"
+LIST_LIMIT = 20
+DEEP_PAGES = (100, 500)
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 64 * 1024
+# Scenarios run in this order; writes come last so reads see the seeded data
+SCENARIOS = [
+    "list_filtered_deep",
+    "list_cursor_deep",
+    "get_task",
+    "update_task",
+    "login_burst",
+    "create_task",
+    "upload",
+    "download",
+]
+
+
+def load_actors(app, sample_size, seed):
+    """
+    Picks who the scenarios act as and samples the ids they act on.
+
+    The busiest user stands in for the power users the skew creates; the
+    admin sees every task, so deep pages of its list exist.
+    """
+    rng = random.Random(seed)
+    with app.app_context():
+        users = mongo.db.users
+        admin = users.find_one({"role": "admin"}, {"_id": 1})
+        busiest = next(
+            mongo.db.tasks.aggregate(
+                [
+                    {"$group": {"_id": "$assigned_to", "tasks": {"$sum": 1}}},
+                    {"$sort": {"tasks": DESCENDING}},
+                    {"$limit": 1},
+                ],
+                allowDiskUse=True,
+            )
+        )
+        task_ids = [
+            task["_id"]
+            for task in mongo.db.tasks.aggregate(
+                [
+                    {"$match": {"assigned_to": busiest["_id"]}},
+                    {"$sample": {"size": sample_size}},
+                    {"$project": {"_id": 1}},
+                ]
+            )
+        ]
+
+        # Deep pages of the admin's filtered list, within what the data has
+        last_page = max(1, mongo.db.tasks.count_documents(LIST_FILTER) // LIST_LIMIT)
+        deep_pages = (min(DEEP_PAGES[0], last_page), min(DEEP_PAGES[1], last_page))
+
+        # Cursors as those pages would return them (each ends the page before)
+        query_sort = with_id_tiebreaker([("due_date", -1)])
+        cursors = []
+        for _ in range(min(sample_size, 50)):
+            offset = (rng.randint(*deep_pages) - 1) * LIST_LIMIT - 1
+            if offset < 0:
+                continue
+            rows = list(
+                mongo.db.tasks.find(LIST_FILTER, {"due_date": 1})
+                .sort([("due_date", DESCENDING), ("_id", DESCENDING)])
+                .skip(offset)
+                .limit(1)
+            )
+            if rows:
+                cursors.append(encode_cursor(rows[0], query_sort))
+
+        user_count = users.estimated_document_count()
+
+    return {
+        "admin": bearer_header(app, admin["_id"], "admin"),
+        "busy": bearer_header(app, busiest["_id"], "user"),
+        "busy_task_count": busiest["tasks"],
+        "task_ids": [str(task_id) for task_id in task_ids],
+        "deep_pages": deep_pages,
+        "cursors": cursors,
+        "user_count": user_count,
+    }
+
+
+def prepare_downloads(app, actors, count):
+    """Uploads `count` attachments through the API for the download scenario."""
+    client = app.test_client()
+    documents = []
+    for index in range(count):
+        response = client.post(
+            "/api/tasks",
+            data={
+                "title": f"Download {index}",
+                "documents": [(io.BytesIO(PDF_BYTES), f"download_{index}.pdf")],
+            },
+            headers=actors["busy"],
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 201, response.get_json()
+        task_id = response.get_json()["task_id"]
+        with app.app_context():
+            task = mongo.db.tasks.find_one(
+                {"_id": ObjectId(task_id)},
+                {"attached_documents.stored_name": 1},
+            )
+        documents.append((task_id, task["attached_documents"][0]["stored_name"]))
+    return documents
+
+
+def scenario_requests(name, actors, documents):
+    """
+    Returns (expected status, request function) for one scenario. Each call
+    of the function issues one request with the given client and RNG.
+    """
+    params = {**LIST_FILTER, "sort": LIST_SORT, "limit": LIST_LIMIT, "count": "none"}
+
+    if name == "list_filtered_deep":
+
+        def call(client, rng):
+            page = rng.randint(*actors["deep_pages"])
+            return client.get(
+                "/api/tasks",
+                query_string={**params, "page": page},
+                headers=actors["admin"],
+            )
+
+        return 200, call
+
+    if name == "list_cursor_deep":
+
+        def call(client, rng):
+            return client.get(
+                "/api/tasks",
+                query_string={**params, "cursor": rng.choice(actors["cursors"])},
+                headers=actors["admin"],
+            )
+
+        return 200, call
+
+    if name == "get_task":
+
+        def call(client, rng):
+            return client.get(
+                f"/api/tasks/{rng.choice(actors['task_ids'])}",
+                headers=actors["busy"],
+            )
+
+        return 200, call
+
+    if name == "update_task":
+
+        def call(client, rng):
+            return client.put(
+                f"/api/tasks/{rng.choice(actors['task_ids'])}",
+                json={"priority": rng.choice(["Low", "Medium", "High"])},
+                headers=actors["busy"],
+            )
+
+        return 200, call
+
+    if name == "login_burst":
+
+        def call(client, rng):
+            return client.post(
+                "/api/auth/login",
+                json={
+                    "email": user_email(rng.randrange(actors["user_count"])),
+                    "password": PASSWORD,
+                },
+            )
+
+        return 200, call
+
+    if name == "create_task":
+
+        def call(client, rng):
+            return client.post(
+                "/api/tasks",
+                data={"title": "Load test task", "priority": "Medium"},
+                headers=actors["busy"],
+            )
+
+        return 201, call
+
+    if name == "upload":
+
+        def call(client, rng):
+            return client.post(
+                "/api/tasks",
+                data={
+                    "title": "Load test upload",
+                    "documents": [(io.BytesIO(PDF_BYTES), "upload.pdf")],
+                },
+                headers=actors["busy"],
+                content_type="multipart/form-data",
+            )
+
+        return 201, call
+
+    if name == "download":
+
+        def call(client, rng):
+            task_id, stored_name = rng.choice(documents)
+            response = client.get(
+                f"/api/tasks/{task_id}/documents/{stored_name}",
+                headers=actors["busy"],
+            )
+            response.get_data()  # Streamed bodies are only read here
+            response.close()
+            return response
+
+        return 200, call
+
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def run_scenario(app, name, actors, documents, request_count, concurrency, seed):
+    """Issues `request_count` requests from `concurrency` threads; returns the stats."""
+    expected, call = scenario_requests(name, actors, documents)
+    local = threading.local()
+
+    def one(index):
+        # One test client and RNG per thread, like one connection per client
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+            local.rng = random.Random(seed + index)
+        start = time.perf_counter()
+        response = call(local.client, local.rng)
+        return (time.perf_counter() - start) * 1000, response.status_code == expected
+
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(request_count)))
+
+    # Fast failures (a 503 storm) must not pass for a latency improvement
+    latencies = [ms for ms, ok in results if ok]
+    return {
+        "requests": request_count,
+        "errors": request_count - len(latencies),
+        "throughput_rps": round(len(latencies) / timer.elapsed, 1),
+        "mean_ms": round(sum(latencies) / max(1, len(latencies)), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Lists the regressions of `report` against `baseline`: a higher error
+    rate, a p95/p99 more than `tolerance` above, or a throughput more than
+    `tolerance` below. Latencies and throughput only count successful
+    requests. Scenarios missing from either report are skipped.
+    """
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        error_rate = current["errors"] / max(1, current["requests"])
+        previous_error_rate = previous["errors"] / max(1, previous["requests"])
+        if error_rate > previous_error_rate:
+            regressions.append(
+                f"{name}: errors {previous['errors']}/{previous['requests']}"
+                f" -> {current['errors']}/{current['requests']}"
+            )
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {previous[metric]} -> {current[metric]}"
+                )
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput_rps {previous['throughput_rps']}"
+                f" -> {current['throughput_rps']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument(
+        "--no-seed", action="store_true", help="Reuse the data of an earlier run"
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=Config.PASSWORD_HASH_WORKERS,
+        help="bcrypt process pool size (0 hashes inline)",
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    # Measure the database, not the response cache in front of it
+    BenchmarkConfig.TASK_LIST_CACHE = "off"
+    BenchmarkConfig.BCRYPT_LOG_ROUNDS = args.rounds
+    # TestConfig hashes inline; logins should go through the production pool
+    BenchmarkConfig.PASSWORD_HASH_WORKERS = args.hash_workers
+    upload_folder = tempfile.mkdtemp(prefix="bench_uploads_")
+    BenchmarkConfig.UPLOAD_FOLDER = upload_folder
+
+    try:
+        app = make_app(reset=not args.no_seed)
+        dataset = None
+        if not args.no_seed:
+            dataset = generate(app, args.users, args.tasks, args.skew)
+            dataset.pop("ownership")
+
+        actors = load_actors(app, sample_size=1000, seed=args.seed)
+        documents = prepare_downloads(app, actors, count=20)
+
+        scenarios = {}
+        for name in args.scenarios.split(","):
+            scenarios[name] = run_scenario(
+                app,
+                name,
+                actors,
+                documents,
+                args.requests,
+                args.concurrency,
+                args.seed,
+            )
+            print(f"{name}: {json.dumps(scenarios[name])}", file=sys.stderr)
+    finally:
+        password_hasher.shutdown()
+        shutil.rmtree(upload_folder, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "dataset": dataset,
+            "busiest_user_tasks": actors["busy_task_count"],
+            "deep_pages": actors["deep_pages"],
+            "requests_per_scenario": args.requests,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.rounds,
+            "password_hash_workers": args.hash_workers,
+        },
+        "scenarios": scenarios,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
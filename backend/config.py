@@ -24,15 +24,101 @@ class Config:
     _MONGO_DB = os.environ.get("MONGO_DB", DEFAULT_MONGO_DB)
 
     MONGO_URI = f"mongodb://{DEFAULT_DB_HOST}:{DEFAULT_DB_PORT}/{DEFAULT_MONGO_DB}"
+    # Apply the index catalog (src/utils/indexes.py) when the app starts.
+    # Disable to manage indexes only through create_indexes.py.
+    MONGO_ENSURE_INDEXES = os.environ.get("MONGO_ENSURE_INDEXES", "true") == "true"
 
   
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "jwt-super-secret")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    # Upper bound (seconds) for a logout to reach every worker's revocation cache
+    JWT_REVOCATION_REFRESH_INTERVAL = 2.0
     
+    # bcrypt cost factor for new hashes; stored hashes made with another cost
+    # are rehashed on the user's next successful login.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    # Processes per app worker that hash/verify passwords (0 = on the request
+    # thread). Jobs beyond the queue size are rejected with 503 + Retry-After.
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_SIZE = 16
+    PASSWORD_HASH_TIMEOUT = 10  # seconds a request waits for its job
+    PASSWORD_HASH_RETRY_AFTER = 1  # seconds, sent with 503 responses
+
     UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
     MAX_FILE_UPLOADS = 3  
     ALLOWED_EXTENSIONS = {"pdf"}  
 
+    # How download_document hands out file bytes:
+    #   "send_file"  - Flask streams the file (no proxy required)
+    #   "x-accel"    - X-Accel-Redirect to nginx's internal X_ACCEL_LOCATION
+    #   "signed-url" - redirect to a short-lived URL nginx verifies (secure_link)
+    DOCUMENT_DELIVERY = os.environ.get("DOCUMENT_DELIVERY", "send_file")
+    X_ACCEL_LOCATION = "/protected-uploads/"
+    SIGNED_URL_LOCATION = "/files/"
+    SIGNED_URL_BASE = os.environ.get("SIGNED_URL_BASE", "")  # e.g. http://localhost:3000
+    SIGNED_URL_SECRET = os.environ.get("DOWNLOAD_URL_SECRET", "download-url-secret")
+    SIGNED_URL_TTL = 300  # seconds
+
+    # Background thread releasing files of deleted tasks (src/utils/reaper.py).
+    # Disable to run reap_files.py as a separate process instead.
+    FILE_REAPER_ENABLED = os.environ.get("FILE_REAPER_ENABLED", "true") == "true"
+    FILE_REAPER_INTERVAL = 5  # seconds between polls when idle
+    FILE_REAPER_BATCH_SIZE = 100  # outbox records per poll
+    FILE_REAPER_MAX_ATTEMPTS = 8  # then the record is parked as "failed"
+
+    # gc_uploads.py leaves unreferenced files younger than this alone (seconds),
+    # so uploads whose metadata isn't written yet are never collected
+    UPLOAD_GC_GRACE_PERIOD = 3600
+
+    # Background thread removing the tasks of deleted users (src/users/jobs.py).
+    # Disable to run run_user_deletes.py as a separate process instead.
+    USER_DELETE_WORKER_ENABLED = (
+        os.environ.get("USER_DELETE_WORKER_ENABLED", "true") == "true"
+    )
+    USER_DELETE_INTERVAL = 5  # seconds between polls when idle
+    USER_DELETE_BATCH_SIZE = 500  # tasks deleted per batch
+    USER_DELETE_BATCH_PAUSE = 0.1  # seconds between batches (throttle)
+
+    # Cache of GET /api/tasks response bodies (src/utils/cache.py). Every task
+    # write bumps the generation of the assignees it touches, which retires
+    # their cached pages. Where the generation counters live:
+    #   "mongo" - shared through MongoDB, safe with several workers/processes
+    #   "local" - in the worker itself, only correct with a single worker
+    #   "off"   - no caching
+    TASK_LIST_CACHE = os.environ.get("TASK_LIST_CACHE", "mongo")
+    TASK_LIST_CACHE_MAX_BYTES = 32 * 1024 * 1024  # per worker
+    TASK_LIST_CACHE_TTL = 60  # seconds; bounds staleness from out-of-band writes
+
+    # GET /api/tasks/stream (src/tasks/events.py): one MongoDB change stream
+    # per worker process, fanned out to SSE clients. Change streams need MongoDB
+    # to run as a replica set; run gunicorn with gevent workers (-k gevent) so
+    # idle connections don't each occupy a worker.
+    TASK_EVENTS_ENABLED = os.environ.get("TASK_EVENTS_ENABLED", "true") == "true"
+    TASK_EVENTS_BUFFER_SIZE = 1000  # recent events kept for Last-Event-ID replay
+    TASK_EVENTS_QUEUE_SIZE = 256  # undelivered events before a client is dropped
+    TASK_EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+    TASK_EVENTS_RETRY_INTERVAL = 2  # seconds before reopening a failed stream
+    JWT_QUERY_STRING_NAME = "jwt"  # ?jwt= on the stream endpoint (EventSource)
+
+    # count=estimate on GET /api/tasks caches filtered totals per worker
+    TASK_COUNT_CACHE_TTL = 30  # seconds
+    TASK_COUNT_CACHE_SIZE = 1024  # distinct filters
+    # Documents fetched per server round trip by GET /api/tasks/export
+    EXPORT_BATCH_SIZE = 1000
+    # GET /api/users page size (?limit= is capped at the maximum)
+    USER_LIST_PAGE_SIZE = 50
+    USER_LIST_MAX_PAGE_SIZE = 200
+    # Items accepted by one POST /api/tasks/bulk request
+    MAX_BULK_OPERATIONS = 1000
+    # Rows inserted per insert_many batch (and per progress checkpoint) on import
+    IMPORT_BATCH_SIZE = 1000
+
+    # GET /metrics (src/utils/metrics.py): request latency, in-flight requests
+    # and MongoDB command/pool timings in Prometheus format. It is not behind
+    # auth, so only expose it to the scraper. Under gunicorn, gunicorn.conf.py
+    # sets PROMETHEUS_MULTIPROC_DIR so every worker's samples are added up.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true") == "true"
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -53,3 +139,12 @@ class TestConfig(Config):
 
     MONGO_URI = "mongodb://localhost:27017/task_management_test_db"
     JWT_ACCESS_TOKEN_EXPIRES = False
+    # Tests drain the file outbox explicitly with reap_pending() and run user
+    # deletions with run_pending_user_deletes()
+    FILE_REAPER_ENABLED = False
+    USER_DELETE_WORKER_ENABLED = False
+    # Cheap hashes computed inline keep the suite fast
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    TASK_LIST_CACHE = "local"
+    TASK_EVENTS_ENABLED = False
@@ -1,5 +1,5 @@
 from app import create_app, bcrypt, mongo
-from src.auth.models import get_user_collection
+from src.auth.models import email_key, get_user_collection
 
 app = create_app()
 
@@ -18,6 +18,7 @@ def create_admin_user():
 
         user_data = {
             "email": admin_email,
+            "email_lower": email_key(admin_email),
             "password": hashed_password,
             "role": "admin", 
         }
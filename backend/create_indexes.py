@@ -0,0 +1,25 @@
+import sys
+from pymongo.errors import OperationFailure
+from app import create_app, mongo
+from src.utils.indexes import ensure_indexes
+
+app = create_app()
+
+
+def create_indexes():
+    with app.app_context():
+        try:
+            applied = ensure_indexes(mongo.db)
+        except OperationFailure as e:
+            # E.g. E11000 on users.email: merge or remove the duplicate
+            # accounts named in the message, then run this again
+            print(f"Could not create indexes: {e}")
+            sys.exit(1)
+
+        for collection_name, index_names in applied.items():
+            print(f"{collection_name}: {', '.join(index_names)}")
+        print("Indexes are up to date.")
+
+
+if __name__ == "__main__":
+    create_indexes()
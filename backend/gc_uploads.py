@@ -0,0 +1,65 @@
+import argparse
+import time
+from app import create_app
+from src.utils.upload_gc import collect_upload_garbage
+
+app = create_app()
+
+
+def gc_uploads(dry_run=False, grace_period=None, interval=None):
+    if grace_period is None:
+        grace_period = app.config["UPLOAD_GC_GRACE_PERIOD"]
+
+    with app.app_context():
+        while True:
+            report = collect_upload_garbage(
+                app.config["UPLOAD_FOLDER"],
+                grace_period=grace_period,
+                max_uploads=app.config["MAX_FILE_UPLOADS"],
+                dry_run=dry_run,
+            )
+
+            for message in report["error_messages"]:
+                print(f"Could not remove {message}")
+            megabytes = report["bytes_reclaimed"] / (1024 * 1024)
+            if dry_run:
+                print(
+                    f"Scanned {report['scanned']} files: {report['orphans']} orphans "
+                    f"({megabytes:.1f} MB) would be removed (dry run)."
+                )
+            else:
+                print(
+                    f"Scanned {report['scanned']} files: removed {report['deleted']} "
+                    f"orphans, reclaimed {megabytes:.1f} MB, {report['errors']} errors."
+                )
+            if report["restored"]:
+                print(f"Restored {report['restored']} blobs left aside by a crash.")
+            if report["recent"]:
+                print(f"Kept {report['recent']} recent unreferenced files.")
+
+            if not interval:
+                return
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete files in the uploads folder that no task refers to."
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what would be removed"
+    )
+    parser.add_argument(
+        "--grace",
+        type=int,
+        help="Keep unreferenced files younger than this many seconds "
+        "(default: UPLOAD_GC_GRACE_PERIOD)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        help="Run every INTERVAL seconds instead of once",
+    )
+    args = parser.parse_args()
+
+    gc_uploads(dry_run=args.dry_run, grace_period=args.grace, interval=args.interval)
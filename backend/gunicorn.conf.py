@@ -0,0 +1,27 @@
+"""
+Gunicorn settings, read automatically when gunicorn starts in this folder.
+
+Each worker is its own process with its own Prometheus metrics, so workers
+write them to files in PROMETHEUS_MULTIPROC_DIR and GET /metrics (served by
+whichever worker) adds up all of them. The variable has to be set before
+prometheus_client is imported, which is why it is set here.
+"""
+
+import os
+import shutil
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+
+def on_starting(server):
+    # Samples of a previous run would otherwise be added to this one's
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drops the dead worker's in-flight gauge; its counters and histograms stay
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
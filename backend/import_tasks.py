@@ -0,0 +1,61 @@
+import argparse
+from app import create_app
+from src.auth.models import get_user_by_email
+from src.tasks.importer import (
+    IMPORT_FORMATS,
+    TaskImporter,
+    detect_import_format,
+    iter_import_rows,
+)
+
+app = create_app()
+
+
+def print_progress(report):
+    print(
+        f"[{report['job_id']}] rows={report['rows_processed']} "
+        f"inserted={report['inserted']} failed={report['failed']}"
+    )
+
+
+def import_tasks(path, created_by_email, import_format=None, job_id=None):
+    with app.app_context():
+        creator = get_user_by_email(created_by_email)
+        if not creator:
+            print(f"User {created_by_email} does not exist.")
+            return
+
+        import_format = import_format or detect_import_format(path)
+        if import_format not in IMPORT_FORMATS:
+            print(f"Cannot tell the format of {path}; pass --format.")
+            return
+
+        importer = TaskImporter(
+            created_by=creator["_id"],
+            job_id=job_id,
+            source=path,
+            batch_size=app.config["IMPORT_BATCH_SIZE"],
+        )
+        print(f"Import job {importer.job['_id']} (re-run with --job-id to resume)")
+
+        with open(path, encoding="utf-8-sig", newline="") as source:
+            report = importer.run(
+                iter_import_rows(source, import_format), on_progress=print_progress
+            )
+
+        for error in report["errors"]:
+            print(f"  row {error['row']}: {error['msg']}")
+        print(
+            f"Import finished: {report['inserted']} inserted, {report['failed']} failed."
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import tasks from CSV or NDJSON.")
+    parser.add_argument("path")
+    parser.add_argument("--created-by", required=True, help="Creator's email")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--job-id", help="Resume an interrupted import job")
+    args = parser.parse_args()
+
+    import_tasks(args.path, args.created_by, args.format, args.job_id)
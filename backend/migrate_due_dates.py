@@ -0,0 +1,52 @@
+import argparse
+from bson.objectid import ObjectId
+from app import create_app
+from src.tasks.migrations import migrate_due_dates as migrate
+
+app = create_app()
+
+
+def migrate_due_dates(batch_size=500, pause=0.1, after_id=None, dry_run=False):
+    def progress(report, last_id):
+        print(
+            f"Scanned {report['scanned']}, converted {report['converted']}, "
+            f"invalid {report['invalid']} (last task {last_id})"
+        )
+
+    with app.app_context():
+        report = migrate(
+            batch_size=batch_size,
+            pause=pause,
+            after_id=ObjectId(after_id) if after_id else None,
+            dry_run=dry_run,
+            on_batch=progress,
+        )
+
+    if report["invalid_ids"]:
+        print("Tasks with unparseable due dates (left unchanged):")
+        for task_id in report["invalid_ids"]:
+            print(f"  {task_id}")
+    verb = "Would convert" if dry_run else "Converted"
+    print(f"{verb} {report['converted']} of {report['scanned']} string due dates.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert string due dates to BSON dates while the API is running."
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.1,
+        help="Seconds to sleep between batches (throttles the load)",
+    )
+    parser.add_argument(
+        "--after", help="Resume after this task id (printed with every batch)"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what would change"
+    )
+    args = parser.parse_args()
+
+    migrate_due_dates(args.batch_size, args.pause, args.after, args.dry_run)
@@ -0,0 +1,34 @@
+import argparse
+import time
+from app import create_app
+from src.utils.reaper import reap_pending
+
+app = create_app()
+
+
+def reap_files(loop=False):
+    with app.app_context():
+        while True:
+            handled = reap_pending(
+                batch_size=app.config["FILE_REAPER_BATCH_SIZE"],
+                max_attempts=app.config["FILE_REAPER_MAX_ATTEMPTS"],
+            )
+            if handled:
+                print(f"Processed {handled} outbox records.")
+                continue
+            if not loop:
+                print("File outbox is empty.")
+                return
+            time.sleep(app.config["FILE_REAPER_INTERVAL"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Release files of deleted tasks queued in the file outbox."
+    )
+    parser.add_argument(
+        "--loop", action="store_true", help="Keep polling instead of exiting"
+    )
+    args = parser.parse_args()
+
+    reap_files(loop=args.loop)
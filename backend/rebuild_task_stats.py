@@ -0,0 +1,31 @@
+import argparse
+from app import create_app
+from src.tasks.stats import rebuild_task_stats as rebuild
+
+app = create_app()
+
+
+def rebuild_task_stats(dry_run=False):
+    with app.app_context():
+        drift = rebuild(apply=not dry_run)
+
+        for counter_id, (stored, actual) in sorted(drift.items()):
+            print(f"{counter_id}: stored {stored}, actual {actual}")
+        if not drift:
+            print("Task statistics match the tasks collection.")
+        elif dry_run:
+            print(f"{len(drift)} counters drifted (dry run, nothing changed).")
+        else:
+            print(f"Corrected {len(drift)} drifted counters.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recompute the task_stats counters from the tasks collection."
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report drift, don't fix it"
+    )
+    args = parser.parse_args()
+
+    rebuild_task_stats(dry_run=args.dry_run)
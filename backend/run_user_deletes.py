@@ -0,0 +1,34 @@
+import argparse
+import time
+from app import create_app
+from src.users.jobs import run_pending_user_deletes
+
+app = create_app()
+
+
+def run_user_deletes(loop=False):
+    with app.app_context():
+        while True:
+            handled = run_pending_user_deletes(
+                batch_size=app.config["USER_DELETE_BATCH_SIZE"],
+                pause=app.config["USER_DELETE_BATCH_PAUSE"],
+            )
+            if handled:
+                print(f"Processed {handled} user deletion jobs.")
+                continue
+            if not loop:
+                print("No user deletion jobs are due.")
+                return
+            time.sleep(app.config["USER_DELETE_INTERVAL"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete the tasks of deleted users, in throttled batches."
+    )
+    parser.add_argument(
+        "--loop", action="store_true", help="Keep polling instead of exiting"
+    )
+    args = parser.parse_args()
+
+    run_user_deletes(loop=args.loop)
@@ -2,13 +2,22 @@ from flask_pymongo import PyMongo
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, get_jwt_identity, get_jwt # Import necessary functions
 
-BLACKLIST = set()
-
 bcrypt = Bcrypt()
 mongo = PyMongo()
 jwt = JWTManager()
+
+# Imported after `mongo` exists; the store reads it lazily
+from src.auth.revocation import RevocationStore
+from src.auth.services import PasswordHasher
+from src.utils.cache import ResponseCache
+
+revocation_store = RevocationStore()
+password_hasher = PasswordHasher()
+task_list_cache = ResponseCache()
+
+
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blocklist(jwt_header, jwt_payload):
-    """Checks if the token's JTI (unique ID) is in the global blocklist."""
+    """Checks if the token's JTI (unique ID) has been revoked by a logout."""
     jti = jwt_payload["jti"]
-    return jti in BLACKLIST
\ No newline at end of file
+    return revocation_store.is_revoked(jti)
\ No newline at end of file
@@ -1,15 +1,23 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
-from src import bcrypt  # Import bcrypt for hashing
-from .models import get_user_by_email, get_user_collection
-from bson.objectid import ObjectId  # Used to convert string IDs to MongoDB
+from src import password_hasher  # bcrypt, run off the request thread
+from .services import PasswordHasherBusy
+from .models import email_key, get_user_by_email, get_user_collection
+from pymongo.errors import DuplicateKeyError
 from flask_jwt_extended import jwt_required, get_jwt  # Add get_jwt
-from src import BLACKLIST  # Import the global blacklist set from your __init__.py
+from src import revocation_store  # Shared (MongoDB-backed) JWT revocation list
 
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def hasher_busy_response(error):
+    """503 returned when the password hashing queue is full."""
+    response = jsonify({"msg": "Server is busy, please retry shortly"})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+
 @auth_bp.route("/register", methods=["POST"])
 def register():
     """Implements user registration with password hashing and role setting."""
@@ -26,10 +34,14 @@ def register():
         return jsonify({"msg": "User already exists"}), 409
 
     # Password Hashing
-    hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
+    try:
+        hashed_password = password_hasher.hash_password(password)
+    except PasswordHasherBusy as e:
+        return hasher_busy_response(e)
 
     user_data = {
         "email": email,
+        "email_lower": email_key(email),
         "password": hashed_password,
         "role": role,  # Users should have attributes: email, password, role.
     }
@@ -47,6 +59,10 @@ def register():
             201,
         )
 
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration (unique email index)
+        return jsonify({"msg": "User already exists"}), 409
+
     except Exception as e:
         # Log the exception for debugging
         print(f"Error during registration: {e}")
@@ -60,13 +76,23 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
+    if not email or not password:
+        return jsonify({"msg": "Invalid credentials"}), 401
+
     user = get_user_by_email(email)
-    print(
-        f"Attempted login for: {email}. Password check result: {bcrypt.check_password_hash(user['password'], password) if user else False}"
-    )
 
     # Check user existence and password validity
-    if user and bcrypt.check_password_hash(user["password"], password):
+    try:
+        valid = bool(user) and password_hasher.check_password(
+            user["password"], password
+        )
+    except PasswordHasherBusy as e:
+        return hasher_busy_response(e)
+
+    if valid:
+        if password_hasher.needs_rehash(user["password"]):
+            rehash_password(user, password)
+
         # Create JWT Token [cite: 5, 18]
         # Use user's MongoDB ID as the identity
         user_id = str(user["_id"])
@@ -91,13 +117,28 @@ def login():
         return jsonify({"msg": "Invalid credentials"}), 401
 
 
+def rehash_password(user, password):
+    """Re-hashes a stored password at the current BCRYPT_LOG_ROUNDS cost."""
+    try:
+        new_hash = password_hasher.hash_password(password)
+    except PasswordHasherBusy:
+        return  # Best effort: try again on a later login
+
+    # Conditional on the old hash so a concurrent password change wins
+    get_user_collection().update_one(
+        {"_id": user["_id"], "password": user["password"]},
+        {"$set": {"password": new_hash}},
+    )
+
+
 @auth_bp.route("/logout", methods=["POST"])
 @jwt_required()
 def logout():
-    """Revokes the current JWT token by adding its JTI to the global blocklist."""
-    jti = get_jwt()["jti"]
+    """Revokes the current JWT token by adding its JTI to the shared revocation list."""
+    claims = get_jwt()
 
-    # Add the token's unique ID to the set, instantly invalidating it.
-    BLACKLIST.add(jti)
+    # Stored until the token would have expired anyway; every worker sees it
+    # within JWT_REVOCATION_REFRESH_INTERVAL seconds.
+    revocation_store.revoke(claims["jti"], claims.get("exp"))
 
     return jsonify({"msg": "Successfully logged out and token revoked"}), 200
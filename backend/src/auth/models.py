@@ -1,3 +1,4 @@
+from pymongo import ASCENDING, IndexModel
 from src import mongo  # Import the PyMongo instance
 
 
@@ -11,6 +12,30 @@ def get_user_by_email(email):
     return get_user_collection().find_one({"email": email})
 
 
+def email_key(email):
+    """
+    The lower-cased email stored as `email_lower`: the sort key of the admin
+    user list and what case-insensitive `email_prefix=` searches range over.
+    """
+    return email.lower() if isinstance(email, str) else email
+
+
+# Index catalog for the users collection. The unique email index also guards
+# registration against concurrent duplicate sign-ups. The email_lower indexes
+# serve list_users: keyset pages in (email_lower, _id) order, optionally after
+# a role equality, with email prefixes as ranges on the same keys.
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="users_email_unique", unique=True),
+    IndexModel(
+        [("email_lower", ASCENDING), ("_id", ASCENDING)], name="users_email_lower"
+    ),
+    IndexModel(
+        [("role", ASCENDING), ("email_lower", ASCENDING), ("_id", ASCENDING)],
+        name="users_role_email_lower",
+    ),
+]
+
+
 # Note: We are using Flask-PyMongo's direct dictionary handling,
 # which is typical for simple Flask/MongoDB projects.
 # For complex schema validation, we might use MongoEngine or Pydantic.
@@ -0,0 +1,108 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from src import mongo
+
+
+# Entries expire through a TTL index once the token itself has expired
+REVOKED_TOKEN_INDEXES = [
+    IndexModel(
+        [("expires_at", ASCENDING)], name="revoked_tokens_ttl", expireAfterSeconds=0
+    ),
+    IndexModel([("revoked_at", ASCENDING)], name="revoked_tokens_revoked_at"),
+]
+
+# Incremental refreshes re-read this far back to tolerate clock skew between
+# the workers/hosts that write revocations.
+REFRESH_OVERLAP = timedelta(seconds=30)
+# How often the local copy drops entries for tokens that have expired anyway
+PRUNE_INTERVAL = 60.0
+
+
+def get_revoked_token_collection():
+    """Returns the MongoDB collection of revoked JWT IDs."""
+    return mongo.db.revoked_tokens
+
+
+class RevocationStore:
+    """
+    JWT revocation list shared through MongoDB, mirrored in every worker.
+
+    `is_revoked()` runs on every authenticated request and is a dict lookup.
+    At most every `refresh_interval` seconds it first pulls revocations made
+    since the last sync (an indexed range query on `revoked_at`), so a logout
+    in one worker takes effect in all others within that interval.
+    """
+
+    def __init__(self, refresh_interval=2.0):
+        self.refresh_interval = refresh_interval
+        self._revoked = {}  # jti -> expiry as unix time (None: never expires)
+        self._synced_until = None
+        self._next_refresh = 0.0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config["JWT_REVOCATION_REFRESH_INTERVAL"]
+
+    def revoke(self, jti, expires_at=None):
+        """Revokes a token everywhere. `expires_at` is the token's `exp` claim."""
+        now = datetime.now(timezone.utc)
+        expiry = None
+        if expires_at is not None:
+            expiry = datetime.fromtimestamp(expires_at, timezone.utc)
+
+        get_revoked_token_collection().update_one(
+            {"_id": jti},
+            {"$set": {"revoked_at": now, "expires_at": expiry}},
+            upsert=True,
+        )
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return jti in self._revoked
+
+    def refresh(self):
+        """Pulls new revocations from MongoDB into the local copy."""
+        # One thread refreshes; concurrent requests keep using the current copy
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            query = {}
+            if self._synced_until is not None:
+                query = {"revoked_at": {"$gte": self._synced_until - REFRESH_OVERLAP}}
+
+            synced_until = self._synced_until
+            for doc in get_revoked_token_collection().find(query):
+                expiry = doc.get("expires_at")
+                self._revoked[doc["_id"]] = (
+                    expiry.replace(tzinfo=timezone.utc).timestamp() if expiry else None
+                )
+                revoked_at = doc["revoked_at"].replace(tzinfo=timezone.utc)
+                if synced_until is None or revoked_at > synced_until:
+                    synced_until = revoked_at
+            self._synced_until = synced_until or datetime.now(timezone.utc)
+
+            now = time.monotonic()
+            if now >= self._next_prune:
+                self._prune()
+                self._next_prune = now + PRUNE_INTERVAL
+        except PyMongoError as e:
+            # Keep serving from the local copy; retry on the next interval
+            print(f"Could not refresh revoked tokens: {e}")
+        finally:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            self._lock.release()
+
+    def _prune(self):
+        """Forgets tokens that have expired and can no longer be presented."""
+        now = time.time()
+        expired = [
+            jti for jti, expiry in self._revoked.items() if expiry and expiry < now
+        ]
+        for jti in expired:
+            self._revoked.pop(jti, None)
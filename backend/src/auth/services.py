@@ -1 +1,124 @@
-#empty file now
\ No newline at end of file
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt as _bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full (or a job timed out); maps to 503."""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing is busy")
+        self.retry_after = retry_after
+
+
+def _hash_password(password, rounds):
+    """Runs in a pool process: returns a bcrypt hash of `password`."""
+    return _bcrypt.hashpw(password, _bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check_password(pw_hash, password):
+    """Runs in a pool process: True when `password` matches `pw_hash`."""
+    try:
+        return _bcrypt.checkpw(password, pw_hash)
+    except ValueError:
+        # Malformed stored hash, or a password bcrypt refuses (> 72 bytes)
+        return False
+
+
+def hash_rounds(pw_hash):
+    """Returns the cost factor encoded in a bcrypt hash ($2b$<rounds>$...)."""
+    try:
+        return int(pw_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Moves bcrypt hashing and verification off the request threads.
+
+    Work is sent to a small process pool so CPU-bound hashing cannot starve the
+    worker serving other requests. At most PASSWORD_HASH_QUEUE_SIZE jobs may be
+    queued or running; beyond that callers get PasswordHasherBusy immediately
+    instead of piling up behind a login burst. With no workers configured jobs
+    run inline on the calling thread, still subject to the same limit.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 0
+        self.timeout = 10
+        self.retry_after = 1
+        self._slots = threading.BoundedSemaphore(1)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.rounds = app.config["BCRYPT_LOG_ROUNDS"]
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        self.retry_after = app.config["PASSWORD_HASH_RETRY_AFTER"]
+        self._slots = threading.BoundedSemaphore(
+            app.config["PASSWORD_HASH_QUEUE_SIZE"]
+        )
+
+    def _get_executor(self):
+        # Created on first use so each gunicorn worker gets its own pool after
+        # the fork. "spawn" keeps the children free of inherited threads/locks.
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the job finishes, even if the caller gave up
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherBusy(self.retry_after)
+        except BrokenProcessPool:
+            # A child died (e.g. OOM-killed); start a fresh pool for later jobs
+            with self._executor_lock:
+                self._executor = None
+            raise PasswordHasherBusy(self.retry_after)
+
+    def hash_password(self, password):
+        """Returns a bcrypt hash (str) of `password` at the configured cost."""
+        return self._run(_hash_password, password.encode("utf-8"), self.rounds)
+
+    def check_password(self, pw_hash, password):
+        """True when `password` matches the stored bcrypt hash."""
+        return self._run(
+            _check_password, pw_hash.encode("utf-8"), password.encode("utf-8")
+        )
+
+    def needs_rehash(self, pw_hash):
+        """True when a stored hash was made with a different cost factor."""
+        return hash_rounds(pw_hash) != self.rounds
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,12 +1,62 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
-from src.utils.file_handler import save_uploaded_files, allowed_file
+from pymongo import ReturnDocument
+from src.utils.file_handler import (
+    allowed_file,
+    release_attachment,
+    save_uploaded_files,
+)
+from src.utils.reaper import enqueue_attachment_release
+from src.utils.downloads import deliver_document
 from src.utils.decorators import role_required  # We'll need this for admin operations
-from .models import get_task_collection, TASK_STATUSES, TASK_PRIORITIES
-import os
-from flask_jwt_extended import jwt_required, get_jwt_identity  # Add get_jwt_identity
-from src.utils.fsp_parser import parse_task_fsp_params  # Import the parser
+from .models import get_task_collection, TASK_PROJECTABLE_FIELDS
+import queue
+from src.utils.fsp_parser import (
+    SEARCH_SORT,
+    parse_task_count_mode,
+    parse_task_cursor_param,
+    parse_task_fields_param,
+    parse_task_fsp_params,
+    parse_task_search_param,
+)
+from src.utils.keyset import encode_cursor, keyset_filter, supports_keyset
+from .importer import (
+    IMPORT_FORMATS,
+    TaskImporter,
+    detect_import_format,
+    iter_import_rows,
+    open_text_stream,
+)
+from .services import (
+    EXPORT_FORMATS,
+    build_new_task,
+    build_task_projection,
+    build_task_update,
+    etag_versions,
+    fetch_task_page,
+    find_task_export,
+    invalidate_task_lists,
+    iter_task_export,
+    restrict_to_visible_tasks,
+    run_task_bulk,
+    task_etag,
+    task_list_params,
+    task_list_scope,
+    task_update_spec,
+    version_filter,
+)
+from src import task_list_cache
+from .events import format_sse
+from .stats import TASK_STAT_FIELDS, read_task_stats, record_task_change
 
 
 tasks_bp = Blueprint("tasks", __name__)
@@ -21,55 +71,244 @@ def list_tasks():
     Lists tasks with filtering (status, priority, due date, assigned_to),
     sorting, and pagination.
 
+    `due_date_min`/`due_date_max` take ISO 8601 dates (a bare date as the
+    maximum includes that whole day); `overdue=true` keeps tasks that are past
+    due and not completed.
+
     Non-admin users only see tasks assigned to them.
     Admin users see all tasks.
+
+    Pagination is page/limit based by default. Passing the returned
+    `next_cursor` back as `?cursor=` resumes after the last row instead
+    (keyset pagination), which avoids skipping over earlier pages.
+
+    `count=exact|estimate|none` selects how `total_tasks` is computed; `none`
+    skips the total and only reports `has_more`. The default is `exact`, or
+    `none` with a cursor; `pagination.count_mode` reports the mode used. `fields=title,status,...`
+    limits each task to the listed fields.
+
+    `q=` searches title and description (text index); results are ranked by
+    relevance (each task carries its `score`) and combine with every filter.
+
+    Responses are cached per (user scope, query string) until a task write
+    touching that scope; `X-Cache: HIT|MISS` reports which happened.
     """
     current_user_id = get_jwt_identity()
     user_role = get_jwt().get("role")
 
+    # The key embeds the scope's generation as of now, so a write that lands
+    # while this request runs leaves the stored entry already unreachable.
+    cache_key = None
+    if task_list_cache.enabled:
+        cache_key = task_list_cache.key(
+            task_list_scope(current_user_id, user_role),
+            task_list_params(request.args),
+        )
+        body = task_list_cache.get(cache_key)
+        if body is not None:
+            response = current_app.response_class(body, mimetype="application/json")
+            response.headers["X-Cache"] = "HIT"
+            return response, 200
+
     # 1. Parse FSP parameters from the request
     # NOTE: We pass 5 as the default limit for initial load optimization
-    base_filter, query_sort, skip, limit = parse_task_fsp_params(default_limit=5)
+    try:
+        base_filter, query_sort, skip, limit = parse_task_fsp_params(default_limit=5)
+        search = parse_task_search_param()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # Full-text search ranks by relevance unless an explicit sort is given
+    if search:
+        base_filter["$text"] = {"$search": search}
+        if "sort" not in request.args:
+            query_sort = list(SEARCH_SORT)
+    elif any(field == "score" for field, _ in query_sort):
+        return jsonify({"msg": "Sorting by score requires a q= search"}), 400
+
+    # An opaque cursor switches to keyset pagination (resume after the last row)
+    try:
+        cursor_values = parse_task_cursor_param(query_sort)
+        # Cursor pages skip the total unless asked: clients already have it
+        # from the first page, and counting would cost more than the page
+        count_mode = parse_task_count_mode(
+            default="none" if cursor_values is not None else "exact"
+        )
+        fields = parse_task_fields_param(TASK_PROJECTABLE_FIELDS)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
 
     # 2. Enforce Task Visibility/Authorization Filter
-    if user_role != "admin":
-        # Non-admin users can only view tasks assigned to them
-        base_filter["assigned_to"] = ObjectId(current_user_id)
+    # Non-admin users can only view tasks assigned to them
+    restrict_to_visible_tasks(base_filter, current_user_id, user_role)
 
     # Combine the authorization filter with the user-defined filters
     final_query_filter = base_filter
 
-    # 3. Execute the Query
-    # Count total items matching the filter (for pagination metadata)
-    total_count = TaskCollection.count_documents(final_query_filter)
+    # Range predicate on the sort keys replaces skip, so page N costs the same as page 1
+    keyset = None
+    if cursor_values is not None:
+        keyset = keyset_filter(query_sort, cursor_values)
+        skip = 0
 
-    # Fetch tasks with FSP
-    tasks_cursor = (
-        TaskCollection.find(final_query_filter).sort(query_sort).skip(skip).limit(limit)
+    # Only the requested fields leave the database; sort keys ride along for the cursor
+    projection, hidden_fields = build_task_projection(
+        fields, required_fields=[field for field, _ in query_sort]
     )
 
-    task_list = []
-    for task in tasks_cursor:
-        # Convert ObjectIds to strings for JSON serialization
-        task["_id"] = str(task["_id"])
-        task["assigned_to"] = str(task["assigned_to"])
-        task_list.append(task)
+    # 3. Execute the Query (page and, depending on count_mode, the total)
+    task_list, total_count, has_more = fetch_task_page(
+        final_query_filter, query_sort, skip, limit, count_mode, keyset, projection
+    )
+
+    next_cursor = None
+    if has_more and supports_keyset(query_sort):
+        next_cursor = encode_cursor(task_list[-1], query_sort)
+
+    # Sort keys fetched only for the cursor; ObjectIds/dates are encoded by the
+    # app's JSON provider
+    if hidden_fields:
+        for task in task_list:
+            for field in hidden_fields:
+                task.pop(field, None)
 
     # 4. Prepare Pagination Metadata
-    total_pages = (total_count + limit - 1) // limit
-    current_page = skip // limit + 1
+    total_pages = None
+    if total_count is not None:
+        total_pages = (total_count + limit - 1) // limit
+    current_page = skip // limit + 1 if cursor_values is None else None
 
     response_data = {
         "tasks": task_list,
         "pagination": {
+            "count_mode": count_mode,
             "total_tasks": total_count,
             "current_page": current_page,
             "total_pages": total_pages,
             "page_size": limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
         },
     }
 
-    return jsonify(response_data), 200
+    response = jsonify(response_data)
+    if cache_key is not None:
+        task_list_cache.set(cache_key, response.get_data())
+        response.headers["X-Cache"] = "MISS"
+    return response, 200
+
+
+# --- Live task changes (Server-Sent Events) ---
+@tasks_bp.route("/stream", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])
+def stream_task_events():
+    """
+    Pushes `created` / `updated` / `deleted` events for the tasks the caller
+    may see (their own, or all for admins) as Server-Sent Events.
+
+    EventSource cannot send headers, so the JWT may also be passed as
+    `?jwt=`. Reconnects send Last-Event-ID (or `?last_event_id=`) to replay
+    missed events; a `reset` event means the client must refetch its list.
+    """
+    hub = current_app.extensions.get("task_events")
+    if hub is None or not hub.available:
+        return jsonify({"msg": "Live task updates are not available"}), 503
+
+    subscriber, replay = hub.subscribe(
+        get_jwt_identity(),
+        get_jwt().get("role") == "admin",
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id"),
+    )
+    heartbeat = current_app.config["TASK_EVENTS_HEARTBEAT"]
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if replay is None:
+                yield format_sse("reset", {})
+            else:
+                for event_id, event_type, data in replay:
+                    yield format_sse(event_type, data, event_id)
+
+            while True:
+                try:
+                    message = subscriber.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return  # Dropped by the hub; the client reconnects
+                event_id, event_type, data = message
+                yield format_sse(event_type, data, event_id)
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        # X-Accel-Buffering: no stops nginx from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@tasks_bp.route("/stats", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def task_stats():
+    """
+    Task counts by status, priority and assignee, plus open tasks past their
+    due date. Read from the task_stats counters, not the tasks collection.
+    """
+    return jsonify(read_task_stats()), 200
+
+
+@tasks_bp.route("/cache/stats", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def task_list_cache_stats():
+    """Hit/miss/eviction counters of this worker's task list cache."""
+    return jsonify({"enabled": task_list_cache.enabled, **task_list_cache.stats()}), 200
+
+
+# --- EXPORT TASKS (streaming NDJSON / CSV) ---
+@tasks_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_tasks():
+    """
+    Streams every task matching the list filters as NDJSON or CSV.
+
+    Uses the same filters, sorting, `fields=` and visibility rule as
+    list_tasks, but ignores pagination. Rows are read from a batched cursor
+    and written as they arrive, so memory does not grow with the result size.
+    """
+    current_user_id = get_jwt_identity()
+    user_role = get_jwt().get("role")
+
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        return (
+            jsonify({"msg": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}),
+            400,
+        )
+
+    try:
+        query_filter, query_sort, _, _ = parse_task_fsp_params()
+        fields = parse_task_fields_param(TASK_PROJECTABLE_FIELDS)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    restrict_to_visible_tasks(query_filter, current_user_id, user_role)
+
+    projection, _ = build_task_projection(fields)
+    cursor = find_task_export(
+        query_filter, query_sort, projection, current_app.config["EXPORT_BATCH_SIZE"]
+    )
+
+    return Response(
+        stream_with_context(iter_task_export(cursor, export_format, fields)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename=tasks.{export_format}"},
+    )
 
 
 # --- Authorization Helper ---
@@ -101,19 +340,13 @@ def create_task():
     # Flask handles file and form data separately for multi-part forms
     data = request.form
 
-    # 1. Basic Validation
-    title = data.get("title")
-    description = data.get("description")
-    due_date = data.get("due_date")
-    assigned_to_id = data.get(
-        "assigned_to", user_id
-    )  # Defaults to self if not specified
-
-    if not title:
-        return jsonify({"msg": "Title is required"}), 400
+    # 1. Validate and construct the task before touching any files
+    try:
+        new_task = build_new_task(data, user_id)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
 
     # 2. Handle File Uploads
-    attached_documents = []
     # request.files is a MultiDict of uploaded files
     files = request.files.getlist(
         "documents"
@@ -121,73 +354,168 @@ def create_task():
 
     try:
         if files and files[0].filename != "":
-            attached_documents = save_uploaded_files(files)
+            new_task["attached_documents"] = save_uploaded_files(files)
     except ValueError as e:
         return jsonify({"msg": str(e)}), 400
 
-    # 3. Construct Task Data
+    # 3. Insert and Respond
+    try:
+        result = TaskCollection.insert_one(new_task)
+    except Exception:
+        # No task refers to the stored blobs; hand their references back
+        for doc in new_task.get("attached_documents", []):
+            release_attachment(doc)
+        raise
+    record_task_change(None, new_task)
+    invalidate_task_lists(new_task["assigned_to"])
+    return (
+        jsonify(
+            {"msg": "Task created successfully", "task_id": str(result.inserted_id)}
+        ),
+        201,
+    )
+
 
-    # --- FIX START (Corrected Logic) ---
+# --- BULK create / update / delete ---
+@tasks_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_tasks():
+    """
+    Applies a JSON array of task operations with a single bulk write.
 
-    # 1. Retrieve the input value (will be a string or None)
-    assigned_to_input = data.get("assigned_to")
+    Each item is one of:
+        {"op": "create", "task": {...}}
+        {"op": "update", "task_id": "...", "task": {...}}
+        {"op": "delete", "task_id": "..."}
 
-    # 2. Determine the final non-empty ID string
-    # If the input is empty or None, use the current user_id from JWT.
-    if not assigned_to_input:
-        final_assigned_id_str = user_id
-    else:
-        # If the input exists, use it.
-        final_assigned_id_str = assigned_to_input
+    `?ordered=false` keeps going past failed items. The response lists a
+    result (with an HTTP-style status) for every item, in request order.
+    """
+    user_id = get_jwt_identity()
+    operations = request.get_json(silent=True)
 
-    # 3. Safely convert the final, non-empty ID string to ObjectId
-    try:
-        assigned_to_objectid = ObjectId(final_assigned_id_str)
-    except Exception:
-        # Catch case where a malformed string (e.g., "hello") was sent
-        return jsonify({"msg": "Invalid Assigned To User ID format"}), 400
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"msg": "Expected a non-empty JSON array of operations"}), 400
 
-    # 4. Safely convert created_by ID (which is guaranteed to be valid from JWT)
-    try:
-        created_by_objectid = ObjectId(user_id)
-    except Exception:
-        return jsonify({"msg": "Invalid Creator User ID format"}), 500
-
-    # --- FIX END (Corrected Logic) ---
-
-    new_task = {
-        "title": title,
-        "description": description,
-        "status": data.get("status", TASK_STATUSES[0]),
-        "priority": data.get("priority", TASK_PRIORITIES[0]),
-        "due_date": due_date,
-        # --- APPLY FIX HERE ---
-        "assigned_to": assigned_to_objectid,
-        "created_by": created_by_objectid,  # Record the creator
-        # ---------------------
-        "attached_documents": attached_documents,
-    }
+    max_operations = current_app.config["MAX_BULK_OPERATIONS"]
+    if len(operations) > max_operations:
+        return (
+            jsonify({"msg": f"Only up to {max_operations} operations are allowed."}),
+            400,
+        )
+
+    ordered = request.args.get("ordered", "true").lower() != "false"
+
+    results, deleted_tasks = run_task_bulk(
+        operations, ordered, user_id, check_task_ownership_or_admin
+    )
 
-    # 4. Insert and Respond
-    result = TaskCollection.insert_one(new_task)
+    # Files are released by the background reaper
+    enqueue_attachment_release(
+        [doc for task in deleted_tasks for doc in task.get("attached_documents", [])],
+        reason="bulk_delete",
+    )
+
+    failed = sum(1 for result in results if not result["ok"])
     return (
         jsonify(
-            {"msg": "Task created successfully", "task_id": str(result.inserted_id)}
+            {
+                "ordered": ordered,
+                "succeeded": len(results) - failed,
+                "failed": failed,
+                "results": results,
+            }
         ),
-        201,
+        200,
     )
 
 
+# --- IMPORT tasks from CSV / NDJSON (admin) ---
+@tasks_bp.route("/import", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def import_tasks():
+    """
+    Streams an uploaded CSV or NDJSON file into the tasks collection.
+
+    Columns/keys: title, description, status, priority, due_date and
+    assignee (an email). Pass `job_id` to resume an interrupted import.
+    Returns the import report (counts plus the first row errors).
+    """
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return jsonify({"msg": "No file provided under 'file'"}), 400
+
+    import_format = request.form.get("format") or detect_import_format(
+        upload.filename
+    )
+    if import_format not in IMPORT_FORMATS:
+        return (
+            jsonify({"msg": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}),
+            400,
+        )
+
+    try:
+        importer = TaskImporter(
+            created_by=get_jwt_identity(),
+            job_id=request.form.get("job_id"),
+            source=upload.filename,
+            batch_size=current_app.config["IMPORT_BATCH_SIZE"],
+        )
+    except InvalidId:
+        return jsonify({"msg": "Invalid Job ID format"}), 400
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 404
+
+    rows = iter_import_rows(open_text_stream(upload.stream), import_format)
+    return jsonify(importer.run(rows)), 200
+
+
 # --- 2. READ Task Details ---
 @tasks_bp.route("/<task_id>", methods=["GET"])
 @jwt_required()
 def get_task(task_id):
-    """Retrieve details of a single task."""
+    """
+    Retrieve details of a single task, optionally limited to `?fields=`.
+
+    Responses carry `ETag: W/"<id>-<version>"`. A matching If-None-Match is
+    answered with 304 after reading only the version and assignee.
+    """
     try:
-        task = TaskCollection.find_one({"_id": ObjectId(task_id)})
+        fields = parse_task_fields_param(TASK_PROJECTABLE_FIELDS)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    try:
+        task_object_id = ObjectId(task_id)
     except:
         return jsonify({"msg": "Invalid Task ID format"}), 400
 
+    if request.if_none_match:
+        task = TaskCollection.find_one(
+            {"_id": task_object_id}, {"assigned_to": 1, "version": 1}
+        )
+        if not task:
+            return jsonify({"msg": "Task not found"}), 404
+        if not check_task_ownership_or_admin(task):
+            return (
+                jsonify({"msg": "You do not have permission to view this task"}),
+                403,
+            )
+
+        if task.get("version", 0) in etag_versions(request.if_none_match, task_id):
+            response = Response(status=304)
+            response.set_etag(task_etag(task), weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+    # assigned_to is always fetched for the ownership check below, version for the ETag
+    projection, hidden_fields = build_task_projection(
+        fields, required_fields=["assigned_to", "version"]
+    )
+
+    task = TaskCollection.find_one({"_id": task_object_id}, projection)
+
     if not task:
         return jsonify({"msg": "Task not found"}), 404
 
@@ -195,11 +523,14 @@ def get_task(task_id):
     if not check_task_ownership_or_admin(task):
         return jsonify({"msg": "You do not have permission to view this task"}), 403
 
-    # Convert ObjectIds to strings for JSON
-    task["_id"] = str(task["_id"])
-    task["assigned_to"] = str(task["assigned_to"])
+    etag = task_etag(task)
+    for field in hidden_fields:
+        task.pop(field, None)
 
-    return jsonify(task), 200
+    response = jsonify(task)
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response, 200
 
 
 # --- 3. UPDATE Task ---
@@ -209,9 +540,13 @@ def get_task(task_id):
 @tasks_bp.route("/<task_id>", methods=["PUT"])
 @jwt_required()
 def update_task(task_id):
-    """Update task metadata. NOTE: This simplified version does not handle file uploads/replacements."""
+    """
+    Update task metadata. NOTE: This simplified version does not handle file uploads/replacements.
+
+    With `If-Match: W/"<id>-<version>"` the update only applies if the task is
+    still at that version; otherwise 412 is returned.
+    """
     data = request.get_json()
-    update_data = {}
 
     # 1. Retrieve current task and authorize
     try:
@@ -226,37 +561,49 @@ def update_task(task_id):
         return jsonify({"msg": "You do not have permission to modify this task"}), 403
 
     # 2. Build update payload (e.g., update status, priority, due date) [cite: 7]
-    if "title" in data:
-        update_data["title"] = data["title"]
-    if "description" in data:
-        update_data["description"] = data["description"]
-    if "status" in data and data["status"] in TASK_STATUSES:
-        update_data["status"] = data["status"]
-    if "priority" in data and data["priority"] in TASK_PRIORITIES:
-        update_data["priority"] = data["priority"]
-    if "due_date" in data:
-        update_data["due_date"] = data["due_date"]
-    if "assigned_to" in data:
-        update_data["assigned_to"] = ObjectId(
-            data["assigned_to"]
-        )  # Assign to different users [cite: 8]
+    try:
+        update_data = build_task_update(data)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
 
     if not update_data:
         return jsonify({"msg": "No valid fields provided for update"}), 400
 
-    # 3. Perform update
-    result = TaskCollection.update_one(
-        {"_id": ObjectId(task_id)}, {"$set": update_data}
+    # 3. Perform update, conditional on the version the client last saw
+    query = {"_id": task["_id"]}
+    if request.if_match and not request.if_match.star_tag:
+        versions = etag_versions(request.if_match, task_id)
+        if not versions:
+            return jsonify({"msg": "Task has been modified by someone else"}), 412
+        query["version"] = version_filter(versions)
+
+    # The pre-image gives the exact counter deltas for task_stats
+    before = TaskCollection.find_one_and_update(
+        query,
+        task_update_spec(update_data),
+        projection={**TASK_STAT_FIELDS, "version": 1},
+        return_document=ReturnDocument.BEFORE,
     )
+    if not before:
+        if "version" in query:
+            return jsonify({"msg": "Task has been modified by someone else"}), 412
+        return jsonify({"msg": "Task not found"}), 404  # Deleted meanwhile
+
+    after = {**before, **update_data, "version": before.get("version", 0) + 1}
+    record_task_change(before, after)
+    # Both the previous and the new assignee's listings change
+    invalidate_task_lists(before.get("assigned_to"), after.get("assigned_to"))
 
-    return jsonify({"msg": "Task updated successfully"}), 200
+    response = jsonify({"msg": "Task updated successfully"})
+    response.set_etag(task_etag(after), weak=True)
+    return response, 200
 
 
 # --- 4. DELETE Task ---
 @tasks_bp.route("/<task_id>", methods=["DELETE"])
 @jwt_required()
 def delete_task(task_id):
-    """Delete a task and its associated files."""
+    """Delete a task; its files are removed asynchronously by the file reaper."""
     try:
         task = TaskCollection.find_one({"_id": ObjectId(task_id)})
     except:
@@ -268,16 +615,15 @@ def delete_task(task_id):
     if not check_task_ownership_or_admin(task):
         return jsonify({"msg": "You do not have permission to delete this task"}), 403
 
-    # 1. Delete actual files from storage [cite: 73]
-    for doc in task.get("attached_documents", []):
-        try:
-            os.remove(doc["filepath"])
-        except OSError as e:
-            # Log error but continue to delete the database entry
-            print(f"Error deleting file {doc['filepath']}: {e}")
+    # 1. Delete task from database; returns exactly the document removed
+    task = TaskCollection.find_one_and_delete({"_id": task["_id"]})
+    if not task:
+        return jsonify({"msg": "Task not found"}), 404  # Deleted meanwhile
+    record_task_change(task, None)
+    invalidate_task_lists(task.get("assigned_to"))
 
-    # 2. Delete task from database
-    TaskCollection.delete_one({"_id": ObjectId(task_id)})
+    # 2. Queue its files for the background reaper [cite: 73]
+    enqueue_attachment_release(task.get("attached_documents", []), reason="task_delete")
 
     return jsonify({"msg": "Task deleted successfully"}), 204
 
@@ -288,7 +634,14 @@ def delete_task(task_id):
 def download_document(task_id, stored_name):
     """Provides an API endpoint to retrieve and download an attached document."""
     try:
-        task = TaskCollection.find_one({"_id": ObjectId(task_id)})
+        # Only what the auth check and the delivery need: assignee and this attachment
+        task = TaskCollection.find_one(
+            {"_id": ObjectId(task_id)},
+            {
+                "assigned_to": 1,
+                "attached_documents": {"$elemMatch": {"stored_name": stored_name}},
+            },
+        )
     except:
         return jsonify({"msg": "Invalid Task ID format"}), 400
 
@@ -315,13 +668,8 @@ def download_document(task_id, stored_name):
     if not doc_meta:
         return jsonify({"msg": "Document not found on this task"}), 404
 
-    # Use Flask's send_file function for streaming the file download
+    # Bytes are sent by Flask or handed off to nginx (DOCUMENT_DELIVERY)
     try:
-        return send_file(
-            doc_meta["filepath"],
-            mimetype=doc_meta["mime_type"],
-            as_attachment=True,  # Forces download
-            download_name=doc_meta["original_name"],  # Use the friendly original name
-        )
+        return deliver_document(doc_meta)
     except FileNotFoundError:
         return jsonify({"msg": "File found in DB but not on server storage"}), 500
@@ -0,0 +1,223 @@
+import json
+import queue
+import threading
+from collections import deque, namedtuple
+from pymongo.errors import OperationFailure, PyMongoError
+from src import mongo
+from src.utils.json_provider import bson_default
+from src.utils.workers import PollingWorker
+from .models import get_task_collection, ATTACHMENT_PUBLIC_FIELDS
+
+
+# MongoDB error codes: change streams need a replica set / the resume token
+# fell off the oplog
+CHANGE_STREAM_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# One change of a task, as seen by the hub. `owner` is the assignee after the
+# change, `previous_owner` before it (from the pre-image, when available).
+TaskEvent = namedtuple(
+    "TaskEvent", ["id", "type", "task_id", "task", "owner", "previous_owner"]
+)
+
+
+def serialize_task(task):
+    """JSON-ready copy of a task document for an event payload."""
+    task = dict(task)
+    for field in ("_id", "assigned_to", "created_by"):
+        if task.get(field) is not None:
+            task[field] = str(task[field])
+    task["attached_documents"] = [
+        {key: doc.get(key) for key in ATTACHMENT_PUBLIC_FIELDS}
+        for doc in task.get("attached_documents") or []
+    ]
+    return task
+
+
+def task_event_from_change(change):
+    """Turns a change stream document into a TaskEvent, or None to skip it."""
+    operation = change["operationType"]
+    if operation not in ("insert", "update", "replace", "delete"):
+        return None
+
+    after = change.get("fullDocument")
+    before = change.get("fullDocumentBeforeChange") or {}
+    if operation != "delete" and after is None:
+        return None  # Deleted before the lookup; its delete event follows
+
+    owner = after.get("assigned_to") if after else None
+    previous_owner = before.get("assigned_to")
+    return TaskEvent(
+        id=change["_id"]["_data"],
+        type={"insert": "created", "delete": "deleted"}.get(operation, "updated"),
+        task_id=str(change["documentKey"]["_id"]),
+        task=serialize_task(after) if after else None,
+        owner=str(owner) if owner else None,
+        previous_owner=str(previous_owner) if previous_owner else None,
+    )
+
+
+def event_for_subscriber(event, user_id, is_admin):
+    """
+    Applies the check_task_ownership_or_admin rule to an event.
+
+    Returns (type, data) for this subscriber, or None if they may not see it.
+    A task reassigned away from the user is reported to them as deleted.
+    """
+    if event.type != "deleted" and (is_admin or event.owner == user_id):
+        return event.type, event.task
+    if is_admin or user_id in (event.owner, event.previous_owner):
+        return "deleted", {"_id": event.task_id}
+    return None
+
+
+class Subscriber:
+    """One SSE connection: its identity and a queue of pending messages."""
+
+    def __init__(self, user_id, is_admin, max_pending):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.max_pending = max_pending
+        self.queue = queue.Queue()
+        self.closed = False
+
+    def offer(self, event):
+        if self.closed:
+            return
+        message = event_for_subscriber(event, self.user_id, self.is_admin)
+        if message is None:
+            return
+        if self.queue.qsize() >= self.max_pending:
+            self.close()  # Too slow; it reconnects and replays from the buffer
+            return
+        self.queue.put((event.id, *message))
+
+    def close(self):
+        """Ends the connection once the messages queued so far are sent."""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+
+
+class TaskChangeHub(PollingWorker):
+    """
+    Watches the tasks collection with one change stream per process and fans
+    the events out to every SSE subscriber allowed to see them.
+
+    The last `TASK_EVENTS_BUFFER_SIZE` events are kept so a client that
+    reconnects with Last-Event-ID gets what it missed. If the stream fails it
+    is reopened from the last resume token, so the hub itself misses nothing.
+    """
+
+    def __init__(self, app):
+        super().__init__(app, interval=app.config["TASK_EVENTS_RETRY_INTERVAL"])
+        self.buffer = deque(maxlen=app.config["TASK_EVENTS_BUFFER_SIZE"])
+        self.max_pending = app.config["TASK_EVENTS_QUEUE_SIZE"]
+        self.resume_token = None
+        self.available = True
+        self._pre_images_enabled = False
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, is_admin, last_event_id=None):
+        """
+        Registers a subscriber.
+
+        Returns (subscriber, replay): the buffered messages after
+        `last_event_id`, or None when that event is no longer buffered and the
+        client has to refetch its task list.
+        """
+        subscriber = Subscriber(user_id, is_admin, self.max_pending)
+        replay = []
+        with self._lock:
+            if last_event_id:
+                ids = [event.id for event in self.buffer]
+                if last_event_id in ids:
+                    missed = list(self.buffer)[ids.index(last_event_id) + 1 :]
+                    for event in missed:
+                        message = event_for_subscriber(event, user_id, is_admin)
+                        if message is not None:
+                            replay.append((event.id, *message))
+                else:
+                    replay = None
+            self._subscribers.add(subscriber)
+        return subscriber, replay
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def dispatch(self, event):
+        """Buffers an event and offers it to every subscriber."""
+        with self._lock:
+            self.buffer.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def reset(self):
+        """Drops the buffer and disconnects everyone after lost history."""
+        with self._lock:
+            self.buffer.clear()
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def _enable_pre_images(self):
+        # Pre-images tell us who a task was assigned to before an update or
+        # delete (MongoDB 6.0+). Without them only admins see those deletes.
+        try:
+            mongo.db.command(
+                "collMod", "tasks", changeStreamPreAndPostImages={"enabled": True}
+            )
+        except PyMongoError as e:
+            print(f"Task change pre-images unavailable: {e}")
+        self._pre_images_enabled = True
+
+    def run_once(self):
+        if not self._pre_images_enabled:
+            self._enable_pre_images()
+
+        options = {
+            "full_document": "updateLookup",
+            "full_document_before_change": "whenAvailable",
+            "max_await_time_ms": 1000,
+        }
+        if self.resume_token:
+            options["resume_after"] = self.resume_token
+
+        try:
+            with get_task_collection().watch(**options) as stream:
+                while stream.alive and not self._stop_event.is_set():
+                    change = stream.try_next()
+                    # Advances even when idle, so a restart resumes from here
+                    self.resume_token = stream.resume_token
+                    if change is None:
+                        continue
+                    event = task_event_from_change(change)
+                    if event is not None:
+                        self.dispatch(event)
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_UNSUPPORTED:
+                print("Task change stream needs a replica set; live updates disabled")
+                self.available = False
+                self.stop()
+            elif e.code == CHANGE_STREAM_HISTORY_LOST:
+                self.resume_token = None
+                self.reset()
+            else:
+                raise
+        return 0
+
+
+def format_sse(event_type, data, event_id=None):
+    """
+    Formats one Server-Sent Events message. Data is encoded like API
+    responses (bson_default), so due dates read the same as in GET /api/tasks.
+    """
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=bson_default)}")
+    return "\n".join(lines) + "\n\n"
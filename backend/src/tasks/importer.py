@@ -0,0 +1,286 @@
+import csv
+import hashlib
+import io
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+from src.auth.models import email_key, get_user_collection
+from .models import (
+    get_import_job_collection,
+    get_task_collection,
+    TASK_PRIORITIES,
+    TASK_STATUSES,
+)
+from .services import invalidate_task_lists, parse_due_date
+from .stats import record_task_changes
+
+
+IMPORT_FORMATS = ("csv", "ndjson")
+DUPLICATE_KEY_ERROR = 11000
+
+
+def detect_import_format(filename):
+    """Guesses the import format from a file name, or None."""
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    if extension == "csv":
+        return "csv"
+    return None
+
+
+def iter_import_rows(text_stream, import_format):
+    """
+    Lazily yields (row_number, row) pairs from a CSV or NDJSON text stream.
+
+    `row` is a dict, or a ValueError for lines that cannot be parsed. Row
+    numbers count data rows from 1 and are stable across runs, which is what
+    resuming relies on.
+    """
+    if import_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text_stream), 1):
+            yield row_number, row
+        return
+
+    row_number = 0
+    for line in text_stream:
+        line = line.strip()
+        if not line:
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object")
+        except ValueError as e:
+            row = ValueError(f"Invalid JSON: {e}")
+        yield row_number, row
+
+
+def _row_text(row, key):
+    """A row value that must be text (CSV cells are; NDJSON values may not be)."""
+    value = row.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    return value
+
+
+class TaskImporter:
+    """
+    Imports task rows in fixed-size insert_many batches with resumable progress.
+
+    Progress lives in the `import_jobs` collection. After every batch the
+    number of processed rows is recorded, so a re-run with the same job id
+    skips straight past committed rows. Task `_id`s are derived from
+    (job, row number), so a batch that was written but not yet recorded is
+    recognized as duplicates on resume instead of being inserted twice.
+    """
+
+    def __init__(
+        self,
+        created_by,
+        job_id=None,
+        source=None,
+        batch_size=1000,
+        assignee_cache_size=10000,
+        error_limit=100,
+    ):
+        self.created_by = ObjectId(created_by)
+        self.batch_size = batch_size
+        self.assignee_cache_size = assignee_cache_size
+        self.error_limit = error_limit
+        self._assignees = OrderedDict()  # lowercase email -> ObjectId or None
+        self.jobs = get_import_job_collection()
+        self.tasks = get_task_collection()
+
+        if job_id is not None:
+            self.job = self.jobs.find_one({"_id": ObjectId(job_id)})
+            if self.job is None:
+                raise ValueError("Import job not found")
+        else:
+            now = datetime.now(timezone.utc)
+            self.job = {
+                "_id": ObjectId(),
+                "source": source,
+                "created_by": self.created_by,
+                "state": "running",
+                "rows_committed": 0,
+                "inserted": 0,
+                "failed": 0,
+                "errors": [],
+                "started_at": now,
+                "updated_at": now,
+            }
+            self.jobs.insert_one(self.job)
+
+    def _task_id(self, row_number):
+        """Deterministic ObjectId for a row: job start time + hash(job, row)."""
+        timestamp = int(self.job["_id"].generation_time.timestamp())
+        digest = hashlib.sha1(f"{self.job['_id']}:{row_number}".encode()).digest()
+        return ObjectId(timestamp.to_bytes(4, "big") + digest[:8])
+
+    def _resolve_assignee(self, email):
+        """
+        Cached, case-insensitive email -> user id lookup (LRU bounded).
+
+        Raises:
+            ValueError: If `email` is not a string.
+        """
+        if not isinstance(email, str):
+            raise ValueError(f"Assignee must be an email, not {email!r}")
+        email = email.strip()
+        key = email_key(email)
+        if key in self._assignees:
+            self._assignees.move_to_end(key)
+            return self._assignees[key]
+
+        users = get_user_collection()
+        user = users.find_one({"email_lower": key}, {"_id": 1})
+        if user is None:
+            # Users registered before email_lower existed (backfill_user_emails.py)
+            user = users.find_one({"email": email}, {"_id": 1})
+        self._assignees[key] = user["_id"] if user else None
+        if len(self._assignees) > self.assignee_cache_size:
+            self._assignees.popitem(last=False)
+        return self._assignees[key]
+
+    def build_task(self, row_number, row):
+        """
+        Validates one row and returns the task document.
+
+        Raises:
+            ValueError: If the row is invalid.
+        """
+        if isinstance(row, Exception):
+            raise row
+
+        title = (_row_text(row, "title") or "").strip()
+        if not title:
+            raise ValueError("Title is required")
+
+        status = _row_text(row, "status") or TASK_STATUSES[0]
+        if status not in TASK_STATUSES:
+            raise ValueError(f"Unknown status '{status}'")
+
+        priority = _row_text(row, "priority") or TASK_PRIORITIES[0]
+        if priority not in TASK_PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'")
+
+        assignee_email = _row_text(row, "assignee") or _row_text(
+            row, "assigned_to_email"
+        )
+        assigned_to = self.created_by
+        if assignee_email:
+            assigned_to = self._resolve_assignee(assignee_email)
+            if assigned_to is None:
+                raise ValueError(f"Unknown assignee '{assignee_email}'")
+
+        return {
+            "_id": self._task_id(row_number),
+            "title": title,
+            "description": _row_text(row, "description") or None,
+            "status": status,
+            "priority": priority,
+            "due_date": parse_due_date(row.get("due_date")),
+            "assigned_to": assigned_to,
+            "created_by": self.created_by,
+            "attached_documents": [],
+            "version": 1,
+        }
+
+    def _record_error(self, row_number, message):
+        self.job["failed"] += 1
+        if len(self.job["errors"]) < self.error_limit:
+            self.job["errors"].append({"row": row_number, "msg": message})
+
+    def _commit(self, batch, last_row_number):
+        """Inserts one batch and records the progress it represents."""
+        inserted = 0
+        if batch:
+            failed_positions = set()
+            try:
+                inserted = len(
+                    self.tasks.insert_many(batch, ordered=False).inserted_ids
+                )
+            except BulkWriteError as e:
+                inserted = e.details["nInserted"]
+                for error in e.details["writeErrors"]:
+                    failed_positions.add(error["index"])
+                    # Duplicates are rows committed by an interrupted earlier run
+                    if error["code"] != DUPLICATE_KEY_ERROR:
+                        self._record_error(None, error["errmsg"])
+            record_task_changes(
+                (None, task)
+                for position, task in enumerate(batch)
+                if position not in failed_positions
+            )
+            invalidate_task_lists(*{task["assigned_to"] for task in batch})
+
+        self.job["inserted"] += inserted
+        self.job["rows_committed"] = last_row_number
+        self.job["updated_at"] = datetime.now(timezone.utc)
+        self.jobs.update_one(
+            {"_id": self.job["_id"]},
+            {
+                "$set": {
+                    key: self.job[key]
+                    for key in (
+                        "rows_committed",
+                        "inserted",
+                        "failed",
+                        "errors",
+                        "updated_at",
+                    )
+                }
+            },
+        )
+        return inserted
+
+    def run(self, rows, on_progress=None):
+        """
+        Imports (row_number, row) pairs and returns the job report.
+
+        `on_progress(report)` is called after every committed batch.
+        """
+        batch = []
+        last_row_number = self.job["rows_committed"]
+
+        for row_number, row in rows:
+            if row_number <= self.job["rows_committed"]:
+                continue  # Committed by a previous run of this job
+
+            try:
+                batch.append(self.build_task(row_number, row))
+            except ValueError as e:
+                self._record_error(row_number, str(e))
+            last_row_number = row_number
+
+            if len(batch) >= self.batch_size:
+                self._commit(batch, last_row_number)
+                batch = []
+                if on_progress:
+                    on_progress(self.report())
+
+        self._commit(batch, last_row_number)
+        self.job["state"] = "completed"
+        self.jobs.update_one({"_id": self.job["_id"]}, {"$set": {"state": "completed"}})
+        if on_progress:
+            on_progress(self.report())
+        return self.report()
+
+    def report(self):
+        return {
+            "job_id": str(self.job["_id"]),
+            "state": self.job["state"],
+            "rows_processed": self.job["rows_committed"],
+            "inserted": self.job["inserted"],
+            "failed": self.job["failed"],
+            "errors": self.job["errors"],
+        }
+
+
+def open_text_stream(binary_stream):
+    """Wraps a binary upload/file stream for lazy line-by-line text decoding."""
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
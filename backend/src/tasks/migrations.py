@@ -0,0 +1,96 @@
+import time
+from pymongo import ASCENDING, UpdateOne
+from src.utils.dates import parse_iso_datetime
+from .models import get_task_collection
+from .services import invalidate_task_lists
+
+
+# Invalid due dates listed in a migration report (the count is always exact)
+MAX_REPORTED_INVALID = 100
+
+
+def string_due_date_batch(tasks, after_id, batch_size):
+    """
+    Cursor over the next tasks (by _id) whose due date is still a string.
+
+    The hint keeps the walk on the _id index: over the whole migration that
+    reads the collection once, in order, instead of sorting the remaining
+    strings again for every batch.
+    """
+    query = {"due_date": {"$type": "string"}}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    return (
+        tasks.find(query, {"due_date": 1, "assigned_to": 1})
+        .sort("_id", ASCENDING)
+        .hint([("_id", ASCENDING)])
+        .limit(batch_size)
+    )
+
+
+def migrate_due_dates(
+    batch_size=500, pause=0.1, after_id=None, dry_run=False, on_batch=None
+):
+    """
+    Converts due dates stored as strings to BSON dates, online.
+
+    Tasks are walked in `_id` order in batches of `batch_size`, sleeping
+    `pause` seconds between batches to leave the database to the API. Each
+    update only applies if the task still holds the string that was read, so
+    a concurrent write (which already stores a date) always wins. Converted
+    tasks get a new version, as their JSON representation changes.
+
+    Empty strings become null; strings that are not ISO 8601 dates are left
+    alone and reported. `after_id` resumes a run interrupted after that task.
+    `on_batch(report, last_id)` is called after every batch.
+
+    The per-day counters of task_stats are not touched: a string date and its
+    parsed value fall on the same day unless a UTC offset moves it across
+    midnight, which rebuild_task_stats.py corrects.
+
+    Returns: {"scanned", "converted", "invalid", "invalid_ids"}
+    """
+    tasks = get_task_collection()
+    report = {"scanned": 0, "converted": 0, "invalid": 0, "invalid_ids": []}
+    last_id = after_id
+
+    while True:
+        batch = list(string_due_date_batch(tasks, last_id, batch_size))
+        if not batch:
+            break
+
+        requests = []
+        assignees = set()
+        for task in batch:
+            raw = task["due_date"]
+            try:
+                due_date = parse_iso_datetime(raw) if raw.strip() else None
+            except ValueError:
+                report["invalid"] += 1
+                if len(report["invalid_ids"]) < MAX_REPORTED_INVALID:
+                    report["invalid_ids"].append(str(task["_id"]))
+                continue
+            requests.append(
+                UpdateOne(
+                    {"_id": task["_id"], "due_date": raw},
+                    {"$set": {"due_date": due_date}, "$inc": {"version": 1}},
+                )
+            )
+            assignees.add(task.get("assigned_to"))
+
+        report["scanned"] += len(batch)
+        if requests and not dry_run:
+            result = tasks.bulk_write(requests, ordered=False)
+            report["converted"] += result.modified_count
+            invalidate_task_lists(*assignees)
+        elif dry_run:
+            report["converted"] += len(requests)
+
+        last_id = batch[-1]["_id"]
+        if on_batch:
+            on_batch(report, last_id)
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause)
+
+    return report
@@ -1,3 +1,4 @@
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
 from .. import mongo  # Import the PyMongo instance
 
 
@@ -6,7 +7,94 @@ def get_task_collection():
     return mongo.db.tasks
 
 
+def get_import_job_collection():
+    """Returns the collection recording progress of bulk task imports."""
+    return mongo.db.import_jobs
+
+
 # We'll use simple dictionary representations for status and priority for now,
 # but in a real application, these might be stored in separate config collections.
 TASK_STATUSES = ["To Do", "In Progress", "Completed"]
 TASK_PRIORITIES = ["Low", "Medium", "High"]
+
+# Fields clients may request through `?fields=` (`_id` is always returned)
+TASK_PROJECTABLE_FIELDS = [
+    "title",
+    "description",
+    "status",
+    "priority",
+    "due_date",
+    "assigned_to",
+    "created_by",
+    "attached_documents",
+    "version",
+]
+# Attachment metadata exposed by a projection; the server filepath stays internal
+ATTACHMENT_PUBLIC_FIELDS = ["original_name", "stored_name", "mime_type", "size_bytes"]
+
+
+# Index catalog for the tasks collection. Each compound index follows the
+# equality -> sort -> range layout of the list_tasks queries: optional
+# equality filters first, then the default (-due_date, -_id) sort, which also
+# serves due_date range filters. Ascending sorts walk the same indexes backwards.
+TASK_INDEXES = [
+    IndexModel([("due_date", DESCENDING), ("_id", DESCENDING)], name="tasks_due_date"),
+    IndexModel(
+        [("status", ASCENDING), ("due_date", DESCENDING), ("_id", DESCENDING)],
+        name="tasks_status_due_date",
+    ),
+    IndexModel(
+        [("priority", ASCENDING), ("due_date", DESCENDING), ("_id", DESCENDING)],
+        name="tasks_priority_due_date",
+    ),
+    # Non-admin listings always filter on assigned_to
+    IndexModel(
+        [("assigned_to", ASCENDING), ("due_date", DESCENDING), ("_id", DESCENDING)],
+        name="tasks_assigned_to_due_date",
+    ),
+    IndexModel(
+        [
+            ("assigned_to", ASCENDING),
+            ("status", ASCENDING),
+            ("due_date", DESCENDING),
+            ("_id", DESCENDING),
+        ],
+        name="tasks_assigned_to_status_due_date",
+    ),
+    IndexModel(
+        [
+            ("assigned_to", ASCENDING),
+            ("priority", ASCENDING),
+            ("due_date", DESCENDING),
+            ("_id", DESCENDING),
+        ],
+        name="tasks_assigned_to_priority_due_date",
+    ),
+    # sort=priority / sort=status (either direction); other filters are
+    # applied while walking the index in sort order
+    IndexModel([("priority", ASCENDING), ("_id", ASCENDING)], name="tasks_priority"),
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)], name="tasks_status"),
+    IndexModel(
+        [("assigned_to", ASCENDING), ("priority", ASCENDING), ("_id", ASCENDING)],
+        name="tasks_assigned_to_priority",
+    ),
+    IndexModel(
+        [("assigned_to", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)],
+        name="tasks_assigned_to_status",
+    ),
+    # The user-deletion cascade walks a user's tasks in _id order, first by
+    # assigned_to, then by created_by
+    IndexModel(
+        [("assigned_to", ASCENDING), ("_id", ASCENDING)], name="tasks_assigned_to_id"
+    ),
+    IndexModel(
+        [("created_by", ASCENDING), ("_id", ASCENDING)], name="tasks_created_by"
+    ),
+    # `?q=` search; a title match ranks well above a description match
+    IndexModel(
+        [("title", TEXT), ("description", TEXT)],
+        name="tasks_text",
+        weights={"title": 10, "description": 2},
+        default_language="english",
+    ),
+]
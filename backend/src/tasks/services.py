@@ -0,0 +1,675 @@
+import csv
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlencode
+from bson import json_util
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from bson.son import SON
+from flask import current_app
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from src import task_list_cache
+from src.utils.dates import parse_iso_datetime
+from src.utils.json_provider import bson_default
+from .stats import TASK_STAT_FIELDS, record_task_changes
+from .models import (
+    get_task_collection,
+    ATTACHMENT_PUBLIC_FIELDS,
+    TASK_PRIORITIES,
+    TASK_STATUSES,
+)
+
+
+TaskCollection = get_task_collection()
+
+# Per-process cache of approximate totals for count=estimate:
+# serialized filter -> (expires_at, count)
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+
+def _exact_count(query_filter):
+    """
+    Number of tasks matching `query_filter`.
+
+    Without a filter count_documents would scan the whole collection;
+    MongoDB answers an unfiltered count from collection metadata instead.
+    """
+    if not query_filter:
+        return TaskCollection.estimated_document_count()
+    return TaskCollection.count_documents(query_filter)
+
+
+def _estimated_count(query_filter):
+    """Returns a cheap, possibly stale total for `query_filter`."""
+    if not query_filter:
+        # Served from collection metadata, no documents are read
+        return TaskCollection.estimated_document_count()
+
+    key = json_util.dumps(query_filter)
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[0] > now:
+            _count_cache.move_to_end(key)
+            return cached[1]
+
+    count = TaskCollection.count_documents(query_filter)
+
+    with _count_cache_lock:
+        _count_cache[key] = (now + current_app.config["TASK_COUNT_CACHE_TTL"], count)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > current_app.config["TASK_COUNT_CACHE_SIZE"]:
+            _count_cache.popitem(last=False)
+
+    return count
+
+
+# Cache scope of admin listings, which every task write affects
+ALL_TASKS_SCOPE = "tasks:*"
+
+
+def task_list_scope(user_id, role):
+    """Cache scope of a user's task listings: their own tasks, or all for admins."""
+    return ALL_TASKS_SCOPE if role == "admin" else f"tasks:{user_id}"
+
+
+def restrict_to_visible_tasks(query_filter, user_id, role):
+    """Limits a task query to what the caller may see: their own, or all for admins."""
+    if role != "admin":
+        query_filter["assigned_to"] = ObjectId(user_id)
+    return query_filter
+
+
+def task_list_params(args):
+    """Normalizes query args into an order-independent cache key fragment."""
+    return urlencode(sorted(args.items(multi=True)))
+
+
+def invalidate_task_lists(*assignees):
+    """Retires cached task listings of the given assignees (and of admins)."""
+    task_list_cache.invalidate(
+        [ALL_TASKS_SCOPE] + [f"tasks:{assignee}" for assignee in assignees if assignee]
+    )
+
+
+def parse_due_date(value):
+    """
+    Normalizes a due date from client input to a BSON date (naive UTC datetime).
+
+    Missing or empty values mean "no due date".
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date or date-time.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return parse_iso_datetime(value)
+    except ValueError:
+        raise ValueError("Invalid due_date; expected an ISO 8601 date (YYYY-MM-DD)")
+
+
+def build_new_task(data, user_id):
+    """
+    Builds a new task document from create input (form fields or JSON).
+
+    The assignee defaults to the creator when missing or empty.
+
+    Raises:
+        ValueError: If the title is missing, or the assignee ID or due date is
+            malformed.
+    """
+    if not data.get("title"):
+        raise ValueError("Title is required")
+
+    try:
+        assigned_to = ObjectId(data.get("assigned_to") or user_id)
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid Assigned To User ID format")
+
+    return {
+        "title": data.get("title"),
+        "description": data.get("description"),
+        "status": data.get("status", TASK_STATUSES[0]),
+        "priority": data.get("priority", TASK_PRIORITIES[0]),
+        "due_date": parse_due_date(data.get("due_date")),
+        "assigned_to": assigned_to,
+        "created_by": ObjectId(user_id),  # Record the creator
+        "attached_documents": [],
+        "version": 1,
+    }
+
+
+def build_task_update(data):
+    """
+    Builds the `$set` payload for a task update.
+
+    Unknown statuses and priorities are ignored, matching the update endpoint.
+
+    Raises:
+        ValueError: If the new assignee ID or due date is malformed.
+    """
+    update_data = {}
+    if "title" in data:
+        update_data["title"] = data["title"]
+    if "description" in data:
+        update_data["description"] = data["description"]
+    if "status" in data and data["status"] in TASK_STATUSES:
+        update_data["status"] = data["status"]
+    if "priority" in data and data["priority"] in TASK_PRIORITIES:
+        update_data["priority"] = data["priority"]
+    if "due_date" in data:
+        update_data["due_date"] = parse_due_date(data["due_date"])
+    if "assigned_to" in data:
+        try:
+            # Assign to different users [cite: 8]
+            update_data["assigned_to"] = ObjectId(data["assigned_to"])
+        except (InvalidId, TypeError):
+            raise ValueError("Invalid Assigned To User ID format")
+    return update_data
+
+
+def task_update_spec(update_data):
+    """The update document for a task write: the `$set` plus a version bump."""
+    return {"$set": update_data, "$inc": {"version": 1}}
+
+
+def task_etag(task):
+    """
+    Returns the (weak) ETag value "<id>-<version>" of a task.
+
+    Tasks written before versioning have no `version` field and count as 0.
+    """
+    return f"{task['_id']}-{task.get('version', 0)}"
+
+
+def etag_versions(etags, task_id):
+    """
+    Extracts the task versions named by an If-Match / If-None-Match header.
+
+    Tags for other tasks or in an unknown format are ignored. Weak and
+    strong forms compare equal. Returns a set of ints.
+    """
+    versions = set()
+    for tag in etags.as_set(include_weak=True):
+        tag_id, _, version = tag.rpartition("-")
+        if tag_id == str(task_id) and version.isdigit():
+            versions.add(int(version))
+    return versions
+
+
+def version_filter(versions):
+    """Query on `version` matching any of `versions` (0 also matches unset)."""
+    values = list(versions)
+    if 0 in versions:
+        values.append(None)
+    return {"$in": values}
+
+
+BULK_OPERATIONS = ("create", "update", "delete")
+
+
+def _parse_bulk_item(item, user_id):
+    """
+    Validates one bulk item and returns (op, task_object_id, payload).
+
+    Raises:
+        ValueError: If the item is malformed.
+    """
+    if not isinstance(item, dict) or item.get("op") not in BULK_OPERATIONS:
+        raise ValueError(f"op must be one of: {', '.join(BULK_OPERATIONS)}")
+
+    op = item["op"]
+    task_data = item.get("task") or {}
+    if not isinstance(task_data, dict):
+        raise ValueError("task must be an object")
+
+    if op == "create":
+        new_task = build_new_task(task_data, user_id)
+        new_task["_id"] = ObjectId()
+        return op, new_task["_id"], new_task
+
+    try:
+        task_object_id = ObjectId(item.get("task_id"))
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid Task ID format")
+
+    if op == "update":
+        update_data = build_task_update(task_data)
+        if not update_data:
+            raise ValueError("No valid fields provided for update")
+        return op, task_object_id, update_data
+
+    return op, task_object_id, None
+
+
+def run_task_bulk(operations, ordered, user_id, can_modify):
+    """
+    Applies a list of create/update/delete operations with one bulk_write.
+
+    Ownership of every updated or deleted task is checked with a single
+    batched lookup via `can_modify(task)`. With `ordered`, processing stops at
+    the first failing item and the remaining items are reported as skipped,
+    mirroring MongoDB's ordered bulk semantics. A task deleted concurrently
+    after that lookup is only noticed once the batch was written, so it gets
+    a 404 without stopping the items after it.
+
+    Returns: (results, deleted_tasks) where results holds one entry per item
+    and deleted_tasks are the pre-delete documents of the tasks this batch
+    deleted (for file cleanup).
+    """
+    results = [None] * len(operations)
+
+    def fail(index, op, status, msg, task_id=None):
+        results[index] = {
+            "index": index,
+            "op": op,
+            "task_id": task_id,
+            "ok": False,
+            "status": status,
+            "msg": msg,
+        }
+
+    parsed = []
+    for index, item in enumerate(operations):
+        try:
+            parsed.append((index, *_parse_bulk_item(item, user_id)))
+        except ValueError as e:
+            op = item.get("op") if isinstance(item, dict) else None
+            fail(index, op, 400, str(e))
+
+    # One round trip authorizes every update/delete in the batch
+    target_ids = [oid for _, op, oid, _ in parsed if op != "create"]
+    existing = {}
+    if target_ids:
+        existing = {
+            task["_id"]: task
+            for task in TaskCollection.find(
+                {"_id": {"$in": target_ids}},
+                {**TASK_STAT_FIELDS, "attached_documents": 1},
+            )
+        }
+
+    # Position of the earliest failing item; ordered batches stop there
+    first_failure = next(
+        (index for index, result in enumerate(results) if result), len(operations)
+    )
+
+    requests = []
+    request_items = []  # bulk request position -> (index, op, oid)
+    for index, op, oid, payload in parsed:
+        if ordered and index > first_failure:
+            break
+
+        if op == "create":
+            requests.append(InsertOne(payload))
+        else:
+            task = existing.get(oid)
+            if task is None:
+                fail(index, op, 404, "Task not found", str(oid))
+                first_failure = min(first_failure, index)
+                continue
+            if not can_modify(task):
+                fail(
+                    index,
+                    op,
+                    403,
+                    "You do not have permission to modify this task",
+                    str(oid),
+                )
+                first_failure = min(first_failure, index)
+                continue
+            if op == "update":
+                requests.append(UpdateOne({"_id": oid}, task_update_spec(payload)))
+            else:
+                requests.append(DeleteOne({"_id": oid}))
+        request_items.append((index, op, oid))
+
+    try:
+        outcomes = _run_bulk_requests(requests, request_items, ordered)
+    finally:
+        invalidate_task_lists(*_bulk_assignees(parsed, existing))
+
+    success_status = {"create": 201, "update": 200, "delete": 204}
+    payloads = {index: payload for index, _, _, payload in parsed}
+    deleted_tasks = []
+    stat_changes = []
+    for position, (index, op, oid) in enumerate(request_items):
+        if position not in outcomes:
+            continue  # Not executed; reported as skipped below
+        if outcomes[position] is not None:
+            fail(index, op, *outcomes[position], str(oid))
+            continue
+        results[index] = {
+            "index": index,
+            "op": op,
+            "task_id": str(oid),
+            "ok": True,
+            "status": success_status[op],
+        }
+        if op == "create":
+            stat_changes.append((None, payloads[index]))
+        elif op == "update":
+            before = existing[oid]
+            stat_changes.append((before, {**before, **payloads[index]}))
+        else:
+            stat_changes.append((existing[oid], None))
+            deleted_tasks.append(existing[oid])
+
+    # Update pre-images come from the authorization lookup above; a write
+    # racing this batch can skew the counters until rebuild_task_stats.py runs
+    record_task_changes(stat_changes)
+
+    for index, result in enumerate(results):
+        if result is None:
+            op = (
+                operations[index].get("op")
+                if isinstance(operations[index], dict)
+                else None
+            )
+            fail(index, op, 424, "Skipped after an earlier failure in an ordered batch")
+
+    return results, deleted_tasks
+
+
+def _run_bulk_requests(requests, request_items, ordered):
+    """
+    Executes a bulk batch as a single bulk_write and works out each item's outcome.
+
+    bulk_write only reports totals. When fewer updates or deletes matched
+    than were sent, some tasks were deleted by a concurrent request after the
+    authorization lookup; their items are reported 404. Updates are told
+    apart by which of their tasks still exist. Deleted tasks are gone either
+    way, so when only some deletes matched, none of them can be confirmed:
+    all are reported 404 and skip their side effects (the concurrent delete
+    releases the files of what it removed; rebuild_task_stats.py corrects
+    the counters).
+
+    Returns: Outcomes keyed by request position. An outcome is None when
+    applied or (status, msg) when failed; positions never executed (after a
+    write error in an ordered batch) are missing.
+    """
+    if not requests:
+        return {}
+
+    errors = {}
+    try:
+        result = TaskCollection.bulk_write(requests, ordered=ordered)
+        matched, removed = result.matched_count, result.deleted_count
+    except BulkWriteError as e:
+        errors = {error["index"]: error["errmsg"] for error in e.details["writeErrors"]}
+        matched, removed = e.details["nMatched"], e.details["nRemoved"]
+
+    outcomes = {}
+    for position in range(len(requests)):
+        if position in errors:
+            outcomes[position] = (409, errors[position])
+        elif not ordered or not errors or position < min(errors):
+            # Ordered writes stop at the first error
+            outcomes[position] = None
+
+    def applied(op):
+        return [
+            (position, request_items[position][2])
+            for position, outcome in outcomes.items()
+            if outcome is None and request_items[position][1] == op
+        ]
+
+    updates = applied("update")
+    if matched < len(updates):
+        remaining = {
+            task["_id"]
+            for task in TaskCollection.find(
+                {"_id": {"$in": [oid for _, oid in updates]}}, {"_id": 1}
+            )
+        }
+        for position, oid in updates:
+            if oid not in remaining:
+                outcomes[position] = (404, "Task not found")
+
+    deletes = applied("delete")
+    if removed < len(deletes):
+        for position, _ in deletes:
+            outcomes[position] = (404, "Task not found")
+
+    return outcomes
+
+
+def _bulk_assignees(parsed, existing):
+    """Every assignee a bulk batch may have touched (before and after)."""
+    assignees = set()
+    for _, op, oid, payload in parsed:
+        if payload:
+            assignees.add(payload.get("assigned_to"))
+        if oid in existing:
+            assignees.add(existing[oid].get("assigned_to"))
+    return assignees
+
+
+def build_task_projection(fields, required_fields=()):
+    """
+    Turns the fields requested through `?fields=` into a Mongo inclusion projection.
+
+    `required_fields` are fetched even if not requested (e.g. sort keys needed
+    to build a cursor, or assigned_to for the ownership check); they are
+    returned as `hidden_fields` so the caller can strip them afterwards.
+
+    Returns: (projection or None, hidden_fields)
+    """
+    if fields is None:
+        return None, []
+
+    projection = {}
+    for field in fields:
+        if field == "attached_documents":
+            for subfield in ATTACHMENT_PUBLIC_FIELDS:
+                projection[f"attached_documents.{subfield}"] = 1
+        else:
+            projection[field] = 1
+
+    hidden_fields = [
+        field for field in required_fields if field != "_id" and field not in fields
+    ]
+    for field in hidden_fields:
+        projection[field] = 1
+
+    return projection, hidden_fields
+
+
+def build_task_page_pipeline(
+    query_filter, query_sort, skip, limit, keyset=None, projection=None, total=False
+):
+    """
+    Aggregation reading one page of tasks (`limit + 1` rows, to detect a
+    following page).
+
+    With `total` the page and the number of tasks matching `query_filter`
+    come back from a single $facet; `keyset` must then be None, since its
+    $match would follow a sort of every match. Sorting on "score" (a `$text`
+    search) exposes the relevance as a field so it can be sorted and resumed
+    on like any other key.
+    """
+    pipeline = [{"$match": query_filter}]
+    # $text must sit in the first $match; the score only exists after it
+    if any(field == "score" for field, _ in query_sort):
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+    if keyset is not None:
+        pipeline.append({"$match": keyset})
+    # $match and $sort ahead of $facet still run on the indexes
+    pipeline.append({"$sort": SON(query_sort)})
+
+    page_stages = []
+    if skip:
+        page_stages.append({"$skip": skip})
+    page_stages.append({"$limit": limit + 1})
+
+    if total:
+        if projection:
+            pipeline.append({"$project": projection})
+        pipeline.append(
+            {
+                "$facet": {
+                    "tasks": page_stages,
+                    "total": [{"$count": "count"}],
+                }
+            }
+        )
+    else:
+        pipeline += page_stages
+        if projection:
+            pipeline.append({"$project": projection})
+    return pipeline
+
+
+def find_task_page(query_filter, query_sort, skip, limit, keyset=None, projection=None):
+    """Cursor over one page of tasks (`limit + 1` rows) for sorts other than score."""
+    page_filter = query_filter
+    if keyset is not None:
+        page_filter = {"$and": [query_filter, keyset]}
+    return (
+        TaskCollection.find(page_filter, projection, allow_disk_use=True)
+        .sort(query_sort)
+        .skip(skip)
+        .limit(limit + 1)
+    )
+
+
+def fetch_task_page(
+    query_filter, query_sort, skip, limit, count_mode, keyset=None, projection=None
+):
+    """
+    Fetches one page of tasks and, depending on `count_mode`, the total count.
+
+    - "exact": page and total come back from a single $facet aggregation;
+      a cursor page is read like in the other modes and counted separately,
+      since the keyset $match inside $facet would follow a sort of every match.
+    - "estimate": total comes from collection metadata or a short-lived cache.
+    - "none": no total; `limit + 1` rows are read to detect a following page.
+
+    `keyset` is an optional range predicate (cursor pagination) that narrows
+    the page without affecting the total. `projection` limits the returned
+    fields; when it only names indexed fields the query is covered.
+
+    Sorts no index returns in order (e.g. `sort=title`) are done in memory
+    and may spill to disk, within the server's blocking-sort limits.
+
+    Returns: (tasks, total_count or None, has_more)
+    """
+    if count_mode == "exact" and keyset is None:
+        pipeline = build_task_page_pipeline(
+            query_filter, query_sort, skip, limit, projection=projection, total=True
+        )
+        result = next(TaskCollection.aggregate(pipeline, allowDiskUse=True))
+        tasks = result["tasks"]
+        total_count = result["total"][0]["count"] if result["total"] else 0
+    else:
+        if any(field == "score" for field, _ in query_sort):
+            pipeline = build_task_page_pipeline(
+                query_filter, query_sort, skip, limit, keyset, projection
+            )
+            tasks = list(TaskCollection.aggregate(pipeline, allowDiskUse=True))
+        else:
+            tasks = list(
+                find_task_page(
+                    query_filter, query_sort, skip, limit, keyset, projection
+                )
+            )
+        total_count = None
+        if count_mode == "exact":
+            total_count = _exact_count(query_filter)
+        elif count_mode == "estimate":
+            total_count = _estimated_count(query_filter)
+
+    has_more = len(tasks) > limit
+    return tasks[:limit], total_count, has_more
+
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Column order for CSV exports without an explicit `fields=`
+EXPORT_COLUMNS = [
+    "_id",
+    "title",
+    "description",
+    "status",
+    "priority",
+    "due_date",
+    "assigned_to",
+    "created_by",
+    "attached_documents",
+]
+# Rows are grouped into chunks of roughly this many characters per write
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def find_task_export(query_filter, query_sort, projection, batch_size):
+    """Batched cursor over every task an export streams, in list order."""
+    return (
+        TaskCollection.find(query_filter, projection, allow_disk_use=True)
+        .sort(query_sort)
+        .batch_size(batch_size)
+    )
+
+
+def _export_attachments(attachments):
+    """Public attachment metadata (the server filepath stays internal)."""
+    return [
+        {key: doc.get(key) for key in ATTACHMENT_PUBLIC_FIELDS} for doc in attachments
+    ]
+
+
+def iter_task_export(cursor, export_format, fields=None):
+    """
+    Lazily renders a task cursor as NDJSON or CSV text chunks.
+
+    Only one driver batch and one output chunk are held in memory at a time.
+    The cursor is closed when the generator finishes or is closed early
+    (e.g. the client disconnected mid-download).
+    """
+    columns = ["_id"] + fields if fields else EXPORT_COLUMNS
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    try:
+        if writer:
+            writer.writerow(columns)
+
+        for task in cursor:
+            if "attached_documents" in task:
+                task["attached_documents"] = _export_attachments(
+                    task["attached_documents"]
+                )
+
+            if writer:
+                row = []
+                for column in columns:
+                    value = task.get(column)
+                    if column == "attached_documents":
+                        value = ";".join(
+                            doc["original_name"] or "" for doc in value or []
+                        )
+                    elif value is not None and not isinstance(value, (str, int, float)):
+                        value = bson_default(value)
+                    row.append(value)
+                writer.writerow(row)
+            else:
+                # Encoded like API responses and SSE events (bson_default)
+                buffer.write(json.dumps(task, default=bson_default))
+                buffer.write("\n")
+
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        cursor.close()
@@ -0,0 +1,186 @@
+from collections import Counter
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from src import mongo
+from src.utils.dates import utcnow
+from .models import get_task_collection
+
+
+# Status that no longer counts towards overdue
+DONE_STATUS = "Completed"
+
+# Fields a task's contribution to the statistics depends on
+TASK_STAT_FIELDS = {"status": 1, "priority": 1, "assigned_to": 1, "due_date": 1}
+
+TASK_STATS_INDEXES = [
+    IndexModel(
+        [("dimension", ASCENDING), ("key", ASCENDING)], name="task_stats_dimension_key"
+    ),
+]
+
+
+def get_task_stats_collection():
+    """Returns the materialized task counters (one document per dimension key)."""
+    return mongo.db.task_stats
+
+
+def _due_day(due_date):
+    """Day bucket (YYYY-MM-DD) of a due date stored as a datetime or ISO string."""
+    if isinstance(due_date, datetime):
+        return due_date.strftime("%Y-%m-%d")
+    if isinstance(due_date, str) and len(due_date) >= 10:
+        return due_date[:10]
+    return None
+
+
+def task_stat_keys(task):
+    """
+    The counters one task adds 1 to, as (dimension, key) pairs.
+
+    Open tasks are also counted per due day, so the overdue count is the sum of
+    the buckets before today (a handful of documents, however many tasks
+    exist) plus the open tasks due earlier today.
+    """
+    keys = [
+        ("total", "all"),
+        ("status", task.get("status")),
+        ("priority", task.get("priority")),
+        ("assignee", str(task.get("assigned_to"))),
+    ]
+    due_day = _due_day(task.get("due_date"))
+    if due_day and task.get("status") != DONE_STATUS:
+        keys.append(("due", due_day))
+    return keys
+
+
+def record_task_changes(changes):
+    """
+    Applies the counter deltas of task writes with one unordered bulk $inc.
+
+    `changes` is an iterable of (before, after) documents; None stands for
+    "did not exist" (create) or "no longer exists" (delete).
+    """
+    delta = Counter()
+    for before, after in changes:
+        if before is not None:
+            delta.subtract(task_stat_keys(before))
+        if after is not None:
+            delta.update(task_stat_keys(after))
+
+    requests = [
+        UpdateOne(
+            {"_id": f"{dimension}:{key}"},
+            {
+                "$inc": {"count": count},
+                "$setOnInsert": {"dimension": dimension, "key": key},
+            },
+            upsert=True,
+        )
+        for (dimension, key), count in delta.items()
+        if count
+    ]
+    if requests:
+        get_task_stats_collection().bulk_write(requests, ordered=False)
+
+
+def record_task_change(before, after):
+    """Applies the counter deltas of a single task write."""
+    record_task_changes([(before, after)])
+
+
+def due_earlier_today_filter(now):
+    """Open tasks due between midnight UTC and `now` (naive UTC)."""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {"due_date": {"$gte": today, "$lt": now}, "status": {"$ne": DONE_STATUS}}
+
+
+def read_task_stats(now=None):
+    """
+    Assembles the dashboard statistics from the materialized counters.
+
+    "overdue" matches the list's `overdue=true` filter: open tasks due before
+    `now` (naive UTC, default the current time). Days before today come from
+    the counters; today's tasks are counted live, as they turn overdue during
+    the day, with a due_date range over a single day of the index.
+    """
+    now = now or utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    collection = get_task_stats_collection()
+
+    stats = {
+        "total": 0,
+        "by_status": {},
+        "by_priority": {},
+        "by_assignee": {},
+        "overdue": 0,
+    }
+    groups = {
+        "status": "by_status",
+        "priority": "by_priority",
+        "assignee": "by_assignee",
+    }
+    for doc in collection.find(
+        {"dimension": {"$in": ["total", *groups]}, "count": {"$gt": 0}}
+    ):
+        if doc["dimension"] == "total":
+            stats["total"] = doc["count"]
+        else:
+            stats[groups[doc["dimension"]]][str(doc["key"])] = doc["count"]
+
+    overdue = collection.aggregate(
+        [
+            {"$match": {"dimension": "due", "key": {"$lt": _due_day(today)}}},
+            {"$group": {"_id": None, "count": {"$sum": "$count"}}},
+        ]
+    )
+    stats["overdue"] = next(overdue, {"count": 0})["count"]
+    stats["overdue"] += get_task_collection().count_documents(
+        due_earlier_today_filter(now)
+    )
+    return stats
+
+
+def rebuild_task_stats(apply=True):
+    """
+    Recomputes every counter from the tasks collection and reports drift.
+
+    Run it while task writes are quiet: increments that land between the
+    recount and the rewrite are overwritten.
+
+    Returns: {counter_id: (stored, actual)} for every counter that differed.
+    """
+    actual = Counter()
+    for task in get_task_collection().find({}, TASK_STAT_FIELDS):
+        actual.update(task_stat_keys(task))
+
+    collection = get_task_stats_collection()
+    stored = {doc["_id"]: doc["count"] for doc in collection.find({}, {"count": 1})}
+
+    expected = {
+        f"{dimension}:{key}": count for (dimension, key), count in actual.items()
+    }
+    drift = {
+        counter_id: (stored.get(counter_id, 0), expected.get(counter_id, 0))
+        for counter_id in set(stored) | set(expected)
+        if stored.get(counter_id, 0) != expected.get(counter_id, 0)
+    }
+
+    if apply and drift:
+        requests = []
+        for (dimension, key), count in actual.items():
+            counter_id = f"{dimension}:{key}"
+            if counter_id in drift:
+                requests.append(
+                    UpdateOne(
+                        {"_id": counter_id},
+                        {"$set": {"dimension": dimension, "key": key, "count": count}},
+                        upsert=True,
+                    )
+                )
+        stale = [counter_id for counter_id in drift if counter_id not in expected]
+        if requests:
+            collection.bulk_write(requests, ordered=False)
+        if stale:
+            collection.delete_many({"_id": {"$in": stale}})
+
+    return drift
@@ -1,14 +1,25 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+import re
+from urllib.parse import urlencode
+from flask import Blueprint, current_app, request, jsonify, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 from src.utils.decorators import role_required
-from src.auth.models import get_user_collection  
-from .. import bcrypt  
-from src.tasks.models import get_task_collection
+from src.utils.keyset import decode_cursor, encode_cursor, keyset_filter
+from src.auth.models import email_key, get_user_collection
+from .. import password_hasher
+from ..auth.controllers import hasher_busy_response
+from ..auth.services import PasswordHasherBusy
+from .jobs import enqueue_user_delete
+from .models import get_user_delete_job_collection
 
-TaskCollection = get_task_collection()
 users_bp = Blueprint("users", __name__)
-UserCollection = get_user_collection()  
+UserCollection = get_user_collection()
+
+USER_ROLES = ["user", "admin"]
+# Order of the admin user list; email_lower then _id makes every position unique
+USER_LIST_SORT = [("email_lower", 1), ("_id", 1)]
 
 
 
@@ -16,17 +27,60 @@ UserCollection = get_user_collection()
 @jwt_required()
 @role_required("admin")
 def list_users():
-    """Admin endpoint to list all users with basic pagination and filtering."""
-
-    users = UserCollection.find({}, {"password": 0})  
+    """
+    Admin endpoint to list users, one bounded page at a time.
+
+    Users come in (email_lower, _id) order. `role=` filters by role and
+    `email_prefix=` matches the start of the email, case-insensitively; both
+    run on the email_lower indexes, so a page costs the same however many
+    users exist. The body is a JSON array of at most `limit` users. When more
+    follow, `X-Next-Cursor` carries the `cursor=` for the next page and `Link`
+    its full URL (rel="next").
+    """
+    args = request.args
 
-    user_list = []
-    for user in users:
-   
-        user["_id"] = str(user["_id"])
-        user_list.append(user)
+    try:
+        limit = int(args.get("limit", current_app.config["USER_LIST_PAGE_SIZE"]))
+    except ValueError:
+        return jsonify({"msg": "limit must be an integer"}), 400
+    limit = min(max(1, limit), current_app.config["USER_LIST_MAX_PAGE_SIZE"])
+
+    query_filter = {}
+    role = args.get("role")
+    if role:
+        if role not in USER_ROLES:
+            return jsonify({"msg": "Invalid role specified"}), 400
+        query_filter["role"] = role
+
+    email_prefix = args.get("email_prefix", "").strip()
+    if email_prefix:
+        # Anchored and case-sensitive on the lower-cased key: an index range scan
+        pattern = "^" + re.escape(email_key(email_prefix))
+        query_filter["email_lower"] = {"$regex": pattern}
+
+    token = args.get("cursor")
+    if token:
+        try:
+            cursor_values = decode_cursor(token, USER_LIST_SORT)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+        query_filter = {
+            "$and": [query_filter, keyset_filter(USER_LIST_SORT, cursor_values)]
+        }
+
+    users = list(
+        UserCollection.find(query_filter, {"password": 0})
+        .sort(USER_LIST_SORT)
+        .limit(limit + 1)
+    )
 
-    return jsonify(user_list), 200
+    response = jsonify(users[:limit])
+    if len(users) > limit:
+        next_cursor = encode_cursor(users[limit - 1], USER_LIST_SORT)
+        next_args = urlencode({**args.to_dict(), "cursor": next_cursor})
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.base_url}?{next_args}>; rel="next"'
+    return response, 200
 
 
 
@@ -43,7 +97,6 @@ def get_user(user_id):
     if not user:
         return jsonify({"msg": "User not found"}), 404
 
-    user["_id"] = str(user["_id"])
     return jsonify(user), 200
 
 
@@ -65,14 +118,16 @@ def update_user(user_id):
   
     if "email" in data:
         update_data["email"] = data["email"]
+        update_data["email_lower"] = email_key(data["email"])
     if "role" in data:
-        if data["role"] not in ["user", "admin"]:
+        if data["role"] not in USER_ROLES:
             return jsonify({"msg": "Invalid role specified"}), 400
         update_data["role"] = data["role"]
     if "password" in data:
-        update_data["password"] = bcrypt.generate_password_hash(
-            data["password"]
-        ).decode("utf-8")
+        try:
+            update_data["password"] = password_hasher.hash_password(data["password"])
+        except PasswordHasherBusy as e:
+            return hasher_busy_response(e)
 
     if not update_data:
         return jsonify({"msg": "No fields provided for update"}), 400
@@ -95,6 +150,9 @@ def update_user(user_id):
 
         return jsonify({"msg": "User updated successfully"}), 200
 
+    except DuplicateKeyError:
+        return jsonify({"msg": "Email is already in use"}), 409
+
     except Exception as e:
         
         return jsonify({"msg": f"Error updating user: {e}"}), 500
@@ -105,34 +163,56 @@ def update_user(user_id):
 @jwt_required()
 @role_required("admin")
 def delete_user(user_id):
-    """Admin endpoint to delete a user AND their associated tasks."""
+    """
+    Admin endpoint to delete a user AND their associated tasks.
+
+    The user is removed right away; their tasks (assigned or created) are
+    deleted by a background job in throttled batches. Responds 202 with the
+    job id; GET /api/users/jobs/<job_id> reports its progress.
+    """
     try:
         user_object_id = ObjectId(user_id)
     except:
         return jsonify({"msg": "Invalid User ID format"}), 400
 
    
-    user_to_delete = UserCollection.find_one({"_id": user_object_id})
+    user_to_delete = UserCollection.find_one({"_id": user_object_id}, {"_id": 1})
     if not user_to_delete:
         return jsonify({"msg": "User not found"}), 404
 
-  
-
-    
-    task_result = TaskCollection.delete_many(
-        {"$or": [{"created_by": user_object_id}, {"assigned_to": user_object_id}]}
-    )
-
-   
+    # The job is recorded first, so a crash before the delete below still
+    # removes the user once the job runs
+    job_id = enqueue_user_delete(user_object_id, ObjectId(get_jwt_identity()))
     UserCollection.delete_one({"_id": user_object_id})
 
-  
+    status_url = url_for("users.get_user_delete_job", job_id=str(job_id))
     return (
         jsonify(
             {
-                "msg": "User and associated tasks deleted successfully",
-                "tasks_deleted": task_result.deleted_count,
+                "msg": "User deleted; their tasks are being removed",
+                "job_id": job_id,
+                "status_url": status_url,
             }
         ),
-        204,
+        202,
+        {"Location": status_url},
     )
+
+
+@users_bp.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def get_user_delete_job(job_id):
+    """Admin endpoint reporting the progress of a user deletion's task cascade."""
+    try:
+        job_object_id = ObjectId(job_id)
+    except InvalidId:
+        return jsonify({"msg": "Invalid Job ID format"}), 400
+
+    job = get_user_delete_job_collection().find_one(
+        {"_id": job_object_id}, {"next_attempt_at": 0, "lease_token": 0}
+    )
+    if not job:
+        return jsonify({"msg": "Job not found"}), 404
+
+    return jsonify(job), 200
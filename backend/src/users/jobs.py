@@ -0,0 +1,248 @@
+import time
+from datetime import datetime, timedelta, timezone
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from src.auth.models import get_user_collection
+from src.tasks.models import get_task_collection
+from src.tasks.services import invalidate_task_lists
+from src.tasks.stats import TASK_STAT_FIELDS, record_task_changes
+from src.utils.reaper import enqueue_attachment_release
+from src.utils.workers import PollingWorker
+from .models import get_user_delete_job_collection
+
+
+# Task fields the cascade removes the user from, in order. Each phase walks
+# its own (field, _id) index, so a batch is an index range, never a scan.
+CASCADE_PHASES = ["assigned_to", "created_by"]
+# A claimed job whose worker died becomes claimable again after this long
+JOB_LEASE = timedelta(minutes=2)
+# Retry delay after the Nth failure: JOB_RETRY_BASE * 2**N, capped
+JOB_RETRY_BASE = timedelta(seconds=10)
+JOB_RETRY_MAX = timedelta(minutes=10)
+JOB_MAX_ATTEMPTS = 8
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def enqueue_user_delete(user_id, requested_by):
+    """Records a cascade job for a user; returns the job id."""
+    now = _now()
+    return (
+        get_user_delete_job_collection()
+        .insert_one(
+            {
+                "user_id": user_id,
+                "requested_by": requested_by,
+                "state": "pending",
+                "phase": CASCADE_PHASES[0],
+                "tasks_deleted": 0,
+                "batches": 0,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+                "completed_at": None,
+            }
+        )
+        .inserted_id
+    )
+
+
+def _claim_next(now):
+    """
+    Atomically leases one due job (or one whose worker's lease expired).
+
+    Each claim gets a fresh `lease_token`; every later write of the job is
+    conditional on it, so a worker whose lease ran out can't touch the job
+    once another worker has claimed it.
+    """
+    return get_user_delete_job_collection().find_one_and_update(
+        {
+            # For "running" jobs next_attempt_at is the lease expiry
+            "state": {"$in": ["pending", "running"]},
+            "next_attempt_at": {"$lte": now},
+        },
+        {
+            "$set": {
+                "state": "running",
+                "next_attempt_at": now + JOB_LEASE,
+                "lease_token": ObjectId(),
+            }
+        },
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _update_leased(job, update):
+    """Applies `update` to a claimed job. Returns False if the lease was lost."""
+    result = get_user_delete_job_collection().update_one(
+        {"_id": job["_id"], "lease_token": job["lease_token"]}, update
+    )
+    return result.matched_count == 1
+
+
+def _cascade_batch(tasks, user_id, field, batch_size):
+    """Cursor over the next tasks of a cascade phase, in _id order."""
+    return (
+        tasks.find({field: user_id}, {**TASK_STAT_FIELDS, "attached_documents": 1})
+        .sort("_id", ASCENDING)
+        .limit(batch_size)
+    )
+
+
+def _cascade_delete_filter(user_id, field, task_ids):
+    """Matches the tasks of a batch that still belong to the phase's user."""
+    return {"_id": {"$in": task_ids}, field: user_id}
+
+
+def _delete_batch(user_id, field, batch_size):
+    """
+    Deletes the next `batch_size` tasks with `field` == user_id, in _id order.
+
+    The batch is read once (with what counters and file releases need) and
+    removed with one delete_many. If deleted_count comes up short, a
+    concurrent request removed or reassigned some of the tasks meanwhile:
+    tasks still present were not deleted, and when the count then still
+    doesn't add up, which of the missing tasks this call removed is unknown,
+    so none of them is counted or released (the concurrent delete handles
+    its own). A crash after the delete can only leave drifted counters
+    (rebuild_task_stats.py) or unreferenced files (gc_uploads.py).
+
+    Returns: The number of tasks deleted, or None once the phase is done.
+    """
+    tasks = get_task_collection()
+    batch = list(_cascade_batch(tasks, user_id, field, batch_size))
+    if not batch:
+        return None
+
+    task_ids = [task["_id"] for task in batch]
+    deleted_count = tasks.delete_many(
+        _cascade_delete_filter(user_id, field, task_ids)
+    ).deleted_count
+    deleted = batch
+    if deleted_count < len(batch):
+        remaining = {
+            task["_id"] for task in tasks.find({"_id": {"$in": task_ids}}, {"_id": 1})
+        }
+        deleted = [task for task in batch if task["_id"] not in remaining]
+        if len(deleted) != deleted_count:
+            deleted = []
+    if not deleted:
+        return deleted_count
+
+    record_task_changes((task, None) for task in deleted)
+    # Tasks this user created may be assigned to others, whose lists change too
+    invalidate_task_lists(*{task.get("assigned_to") for task in deleted})
+    enqueue_attachment_release(
+        [doc for task in deleted for doc in task.get("attached_documents") or []],
+        reason="user_delete",
+    )
+    return deleted_count
+
+
+def _run_job(job, batch_size, pause, should_stop):
+    """
+    Works through a claimed job, checkpointing after every batch.
+
+    Returns: True if the job completed, False if it was handed back because
+    a stop was requested (the next claim resumes from the saved phase) or
+    its lease expired and another worker may own it now.
+    """
+    start = CASCADE_PHASES.index(job["phase"]) if job["phase"] in CASCADE_PHASES else 0
+
+    for phase in CASCADE_PHASES[start:]:
+        if not _update_leased(job, {"$set": {"phase": phase}}):
+            return False
+        while True:
+            if should_stop():
+                _update_leased(
+                    job, {"$set": {"state": "pending", "next_attempt_at": _now()}}
+                )
+                return False
+
+            deleted = _delete_batch(job["user_id"], phase, batch_size)
+            if deleted is None:
+                break
+            now = _now()
+            # Renews the lease; stop if it already ran out
+            if not _update_leased(
+                job,
+                {
+                    "$inc": {"tasks_deleted": deleted, "batches": 1},
+                    "$set": {"updated_at": now, "next_attempt_at": now + JOB_LEASE},
+                },
+            ):
+                return False
+            time.sleep(pause)  # Leaves the primary to the API between batches
+
+    # Also covers a crash between enqueueing the job and deleting the user
+    get_user_collection().delete_one({"_id": job["user_id"]})
+    now = _now()
+    return _update_leased(
+        job,
+        {
+            "$set": {
+                "state": "completed",
+                "phase": "done",
+                "completed_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+
+
+def _reschedule(job, error):
+    """Backs a failed job off exponentially; parks it as "failed" eventually."""
+    attempts = job["attempts"] + 1
+    delay = min(JOB_RETRY_BASE * 2**attempts, JOB_RETRY_MAX)
+    _update_leased(
+        job,
+        {
+            "$set": {
+                "state": "failed" if attempts >= JOB_MAX_ATTEMPTS else "pending",
+                "attempts": attempts,
+                "next_attempt_at": _now() + delay,
+                "last_error": str(error),
+                "updated_at": _now(),
+            }
+        },
+    )
+
+
+def run_pending_user_deletes(batch_size=500, pause=0.1, should_stop=None):
+    """
+    Claims and runs due cascade jobs until none is left (or a stop is requested).
+
+    Returns: The number of jobs handled (completed, handed back or rescheduled).
+    """
+    should_stop = should_stop or (lambda: False)
+    handled = 0
+    while not should_stop():
+        job = _claim_next(_now())
+        if job is None:
+            break
+        try:
+            _run_job(job, batch_size, pause, should_stop)
+        except Exception as e:
+            # Any failure counts as an attempt, so a job that keeps failing
+            # is parked as "failed" instead of being retried forever
+            _reschedule(job, e)
+        handled += 1
+    return handled
+
+
+class UserDeleteWorker(PollingWorker):
+    """Background thread running the task cascades of deleted users."""
+
+    def __init__(self, app):
+        super().__init__(app, interval=app.config["USER_DELETE_INTERVAL"])
+
+    def run_once(self):
+        return run_pending_user_deletes(
+            batch_size=self.app.config["USER_DELETE_BATCH_SIZE"],
+            pause=self.app.config["USER_DELETE_BATCH_PAUSE"],
+            should_stop=self._stop_event.is_set,
+        )
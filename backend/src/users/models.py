@@ -0,0 +1,16 @@
+from pymongo import ASCENDING, IndexModel
+from src import mongo
+
+
+def get_user_delete_job_collection():
+    """Returns the queue of deleted users whose tasks are still being removed."""
+    return mongo.db.user_delete_jobs
+
+
+# The job worker claims due jobs by state, oldest next_attempt_at first
+USER_DELETE_JOB_INDEXES = [
+    IndexModel(
+        [("state", ASCENDING), ("next_attempt_at", ASCENDING)],
+        name="user_delete_jobs_state_next_attempt",
+    ),
+]
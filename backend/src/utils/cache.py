@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from pymongo import UpdateOne
+from src import mongo
+
+
+def get_cache_generation_collection():
+    """Returns the collection holding shared cache generation counters."""
+    return mongo.db.cache_generations
+
+
+class LocalGenerations:
+    """Generation counters held in this process (single-worker deployments, tests)."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope):
+        return self._values.get(scope, 0)
+
+    def bump(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._values[scope] = self._values.get(scope, 0) + 1
+
+
+class MongoGenerations:
+    """
+    Generation counters in MongoDB, shared by every worker and process.
+
+    Reading one is a single `_id` lookup, so each worker keeps its own entries
+    while a write in any worker (or in a CLI) invalidates them everywhere.
+    """
+
+    def get(self, scope):
+        doc = get_cache_generation_collection().find_one({"_id": scope})
+        return doc["value"] if doc else 0
+
+    def bump(self, scopes):
+        get_cache_generation_collection().bulk_write(
+            [
+                UpdateOne({"_id": scope}, {"$inc": {"value": 1}}, upsert=True)
+                for scope in scopes
+            ],
+            ordered=False,
+        )
+
+
+GENERATION_BACKENDS = {"local": LocalGenerations, "mongo": MongoGenerations}
+
+
+class ResponseCache:
+    """
+    Byte-bounded LRU cache of serialized response bodies.
+
+    Entries are keyed by a scope's current generation, so bumping the
+    generation (on every write that affects the scope) makes its old entries
+    unreachable; they age out through LRU eviction or the TTL.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.max_bytes = 0
+        self.ttl = 0
+        self.generations = LocalGenerations()
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def init_app(self, app):
+        backend = app.config["TASK_LIST_CACHE"]
+        if backend != "off" and backend not in GENERATION_BACKENDS:
+            raise ValueError(
+                f"TASK_LIST_CACHE must be off or one of: {', '.join(GENERATION_BACKENDS)}"
+            )
+
+        self.enabled = backend != "off"
+        self.max_bytes = app.config["TASK_LIST_CACHE_MAX_BYTES"]
+        self.ttl = app.config["TASK_LIST_CACHE_TTL"]
+        self.generations = GENERATION_BACKENDS.get(backend, LocalGenerations)()
+        self.clear()
+
+    def key(self, scope, params):
+        """Builds the entry key for `params` under the scope's current generation."""
+        return f"{scope}:{self.generations.get(scope)}:{params}"
+
+    def get(self, key):
+        """Returns the cached body for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key, body):
+        """Stores a body, evicting least recently used entries to stay in budget."""
+        size = len(key) + len(body)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, scopes):
+        """Bumps the generation of each scope, orphaning its cached entries."""
+        if self.enabled and scopes:
+            self.generations.bump(sorted(set(scopes)))
+
+    def _remove(self, key):
+        _, body = self._entries.pop(key)
+        self._size -= len(key) + len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def stats(self):
+        """Counters for this process (hits, misses, evictions) plus current size."""
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,39 @@
+from datetime import date, datetime, time, timezone
+
+
+def parse_iso_datetime(value, end_of_day=False):
+    """
+    Parses an ISO 8601 date or date-time string into a naive UTC datetime,
+    the form PyMongo stores and returns.
+
+    A bare date (YYYY-MM-DD) means midnight UTC, or with `end_of_day` the
+    last millisecond of that day, so it can serve as an inclusive upper bound.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date or date-time.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid date '{value}'; expected ISO 8601 (YYYY-MM-DD)")
+    value = value.strip()
+
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        day = None
+    if day is not None:
+        moment = time(23, 59, 59, 999000) if end_of_day else time()
+        return datetime.combine(day, moment)
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'; expected ISO 8601 (YYYY-MM-DD)")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    # BSON dates have millisecond precision
+    return parsed.replace(microsecond=parsed.microsecond // 1000 * 1000)
+
+
+def utcnow():
+    """The current time as a naive UTC datetime, comparable with stored dates."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
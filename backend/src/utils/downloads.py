@@ -0,0 +1,207 @@
+import base64
+import hashlib
+import os
+import time
+from urllib.parse import quote
+from uuid import uuid4
+from flask import Response, current_app, redirect, request, send_file
+from werkzeug.http import http_date
+
+
+# Bytes read per iteration when streaming a byte range
+CHUNK_SIZE = 64 * 1024
+# Multi-range requests asking for more parts than this are rejected (416)
+MAX_RANGES = 16
+
+
+def _file_chunks(filepath, start, stop):
+    """Yields the bytes [start, stop) of a file without loading it whole."""
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _resolve_ranges(ranges, size):
+    """Turns parsed Range specs into satisfiable, sorted (start, stop) pairs."""
+    resolved = []
+    for start, stop in ranges:
+        if start < 0:  # suffix range: the last N bytes
+            start, stop = max(size + start, 0), size
+        stop = size if stop is None else min(stop, size)
+        if start < stop:
+            resolved.append((start, stop))
+    return sorted(resolved)
+
+
+def _wants_multirange(etag, mtime):
+    """True if the request asks for several ranges that we should honour."""
+    byte_range = request.range
+    if byte_range is None or byte_range.units != "bytes":
+        return False
+    if len(byte_range.ranges) < 2:
+        return False
+    # A fresh copy (304) is left to send_file
+    if etag and request.if_none_match.contains(etag):
+        return False
+    # If-Range: ranges only apply while the validator still matches
+    if request.if_range.etag is not None:
+        return etag is not None and request.if_range.etag == etag
+    if request.if_range.date is not None:
+        return int(request.if_range.date.timestamp()) == int(mtime)
+    return True
+
+
+def _send_full_file(filepath, doc_meta, etag, mtime):
+    """Whole-file (or single-range) response with validators via send_file."""
+    response = send_file(
+        filepath,
+        mimetype=doc_meta["mime_type"],
+        as_attachment=True,  # Forces download
+        download_name=doc_meta["original_name"],  # Use the friendly original name
+        conditional=True,  # 304 and Range handling
+        etag=etag or True,  # Content hash, or werkzeug's mtime/size tag for old files
+        last_modified=mtime,
+        max_age=None,
+    )
+    # Authenticated content: browsers may keep it but must revalidate
+    response.cache_control.private = True
+    return response
+
+
+def _send_multirange(filepath, mimetype, size, headers):
+    """206 multipart/byteranges response streaming each requested range."""
+    ranges = _resolve_ranges(request.range.ranges, size)
+    if not ranges or len(ranges) > MAX_RANGES:
+        return Response(status=416, headers={"Content-Range": f"bytes */{size}"})
+
+    boundary = uuid4().hex
+    parts = [
+        (
+            (
+                f"\r\n--{boundary}\r\n"
+                f"Content-Type: {mimetype}\r\n"
+                f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n"
+            ).encode("latin-1"),
+            start,
+            stop,
+        )
+        for start, stop in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+
+    def generate():
+        for part_header, start, stop in parts:
+            yield part_header
+            yield from _file_chunks(filepath, start, stop)
+        yield closing
+
+    content_length = sum(len(h) + stop - start for h, start, stop in parts) + len(
+        closing
+    )
+    response = Response(
+        generate(),
+        status=206,
+        mimetype=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
+    response.content_length = content_length
+    return response
+
+
+def send_document(doc_meta):
+    """
+    Sends a stored attachment with cache validators and range support.
+
+    - Strong ETag from the attachment's SHA-256 (when recorded) and Last-Modified.
+    - 304 for matching If-None-Match / If-Modified-Since.
+    - 206 for single ranges (via send_file) and multi-range requests
+      (multipart/byteranges), honouring If-Range.
+
+    Raises FileNotFoundError if the file is missing from storage.
+    """
+    filepath = doc_meta["filepath"]
+    stat = os.stat(filepath)
+    etag = doc_meta.get("sha256")
+
+    if not _wants_multirange(etag, stat.st_mtime):
+        return _send_full_file(filepath, doc_meta, etag, stat.st_mtime)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename={doc_meta['original_name']}",
+    }
+    if etag:
+        headers["ETag"] = f'"{etag}"'
+    return _send_multirange(filepath, doc_meta["mime_type"], stat.st_size, headers)
+
+
+def _relative_upload_path(filepath):
+    """Path of a stored file relative to UPLOAD_FOLDER, using forward slashes."""
+    relative_path = os.path.relpath(filepath, current_app.config["UPLOAD_FOLDER"])
+    if relative_path.startswith(".."):
+        raise ValueError(f"{filepath} is outside the upload folder")
+    return relative_path.replace(os.sep, "/")
+
+
+def accel_redirect_response(doc_meta):
+    """
+    Empty response telling nginx to serve the file from its internal location.
+
+    nginx then handles the transfer, Range and conditional requests itself.
+    """
+    location = current_app.config["X_ACCEL_LOCATION"]
+    response = Response(status=200, mimetype=doc_meta["mime_type"])
+    response.headers["X-Accel-Redirect"] = location + quote(
+        _relative_upload_path(doc_meta["filepath"])
+    )
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename={doc_meta['original_name']}"
+    )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def signed_document_url(doc_meta, now=None):
+    """
+    Short-lived URL checked by nginx's secure_link module.
+
+    The signature is base64url(md5("<expires><uri> <secret>")), matching
+    `secure_link_md5 "$secure_link_expires$uri <secret>"` in nginx.conf.
+    """
+    config = current_app.config
+    expires = int(now or time.time()) + config["SIGNED_URL_TTL"]
+    uri = config["SIGNED_URL_LOCATION"] + _relative_upload_path(doc_meta["filepath"])
+
+    digest = hashlib.md5(
+        f"{expires}{uri} {config['SIGNED_URL_SECRET']}".encode("utf-8")
+    ).digest()
+    signature = base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+    return (
+        f"{config['SIGNED_URL_BASE']}{quote(uri)}"
+        f"?md5={signature}&expires={expires}&name={quote(doc_meta['original_name'])}"
+    )
+
+
+def deliver_document(doc_meta):
+    """
+    Answers a download according to the DOCUMENT_DELIVERY setting:
+
+    - "send_file": Flask streams the bytes (send_document).
+    - "x-accel": an X-Accel-Redirect to nginx's internal location.
+    - "signed-url": a redirect to a short-lived URL nginx verifies itself.
+    """
+    delivery = current_app.config["DOCUMENT_DELIVERY"]
+    if delivery == "x-accel":
+        return accel_redirect_response(doc_meta)
+    if delivery == "signed-url":
+        return redirect(signed_document_url(doc_meta), 302)
+    return send_document(doc_meta)
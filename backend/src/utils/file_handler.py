@@ -1,7 +1,15 @@
+import hashlib
 import os
+import tempfile
+from datetime import datetime, timezone
 from flask import current_app
+from pymongo import ReturnDocument
 from werkzeug.utils import secure_filename
 from uuid import uuid4  
+from src import mongo
+
+# Uploads are read and hashed in chunks of this size
+CHUNK_SIZE = 64 * 1024
 
 
 
@@ -14,11 +22,121 @@ def allowed_file(filename):
     )
 
 
+def get_blob_collection():
+    """Returns the collection of stored file contents and their reference counts."""
+    return mongo.db.attachment_blobs
+
+
+def blob_path(sha256):
+    """Location of a stored blob: <UPLOAD_FOLDER>/blobs/ab/cd/abcd..."""
+    return os.path.join(
+        current_app.config["UPLOAD_FOLDER"], "blobs", sha256[:2], sha256[2:4], sha256
+    )
+
+
+def _stream_to_temp_file(file):
+    """
+    Copies an upload to a temp file in chunks, hashing it in the same pass.
+
+    Returns: (temp_path, sha256 hex digest, size in bytes)
+    """
+    temp_dir = os.path.join(current_app.config["UPLOAD_FOLDER"], "tmp")
+    os.makedirs(temp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir, prefix="upload-")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return temp_path, digest.hexdigest(), size
+
+
+def store_blob(file):
+    """
+    Stores an upload content-addressed by its SHA-256 and takes a reference on it.
+
+    Identical content is kept once on disk; repeated uploads only bump the
+    blob's reference count.
+
+    Returns: (sha256, size_bytes, filepath)
+    """
+    temp_path, sha256, size = _stream_to_temp_file(file)
+
+    # Reference first, then place the file: a concurrent release_blob() never
+    # removes a blob whose count went back above zero (see release_blob).
+    get_blob_collection().update_one(
+        {"_id": sha256},
+        {
+            "$inc": {"refcount": 1},
+            "$setOnInsert": {
+                "size_bytes": size,
+                "created_at": datetime.now(timezone.utc),
+            },
+        },
+        upsert=True,
+    )
+
+    filepath = blob_path(sha256)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    # Atomic rename; replacing an existing copy is harmless (same content)
+    os.replace(temp_path, filepath)
+
+    return sha256, size, filepath
+
+
+def release_blob(sha256):
+    """Drops one reference to a blob and deletes its file once unreferenced."""
+    blob = get_blob_collection().find_one_and_update(
+        {"_id": sha256},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if blob is None or blob["refcount"] > 0:
+        return
+
+    # Move the file aside before forgetting the blob, so an upload that
+    # re-references it in the meantime can get the content back.
+    filepath = blob_path(sha256)
+    trash_path = f"{filepath}.deleting-{uuid4().hex}"
+    try:
+        os.replace(filepath, trash_path)
+    except FileNotFoundError:
+        trash_path = None
+
+    removed = get_blob_collection().delete_one(
+        {"_id": sha256, "refcount": {"$lte": 0}}
+    )
+    if trash_path is None:
+        return
+    if removed.deleted_count:
+        os.remove(trash_path)
+    else:
+        # Referenced again by a concurrent upload; restore the content
+        try:
+            os.replace(trash_path, filepath)
+        except FileNotFoundError:
+            pass  # upload_gc.py removed it, as the upload had placed its copy
+
+
 def save_uploaded_files(files):
     """
-    Saves a list of uploaded files to the local UPLOAD_FOLDER and returns their metadata.
+    Saves a list of uploaded files to content-addressed storage and returns their metadata.
+
+    Each stored file holds a blob reference until a task refers to it; the
+    caller releases them (release_attachment) if the task is never written.
 
-    Returns: A list of metadata dictionaries (filename, path, mime_type, size).
+    Returns: A list of metadata dictionaries (filename, path, mime_type, size, sha256).
     """
     metadata_list = []
 
@@ -28,31 +146,53 @@ def save_uploaded_files(files):
             f"Only up to {current_app.config['MAX_FILE_UPLOADS']} documents are allowed."
         )
 
-    for file in files:
-        if file and allowed_file(file.filename):
-            
-            original_filename = secure_filename(file.filename)
-            unique_filename = f"{uuid4().hex}_{original_filename}"
-
-            filepath = os.path.join(
-                current_app.config["UPLOAD_FOLDER"], unique_filename
-            )
-
-           
-            file.save(filepath)
-
-           
-            metadata_list.append(
-                {
-                    "original_name": original_filename,
-                    "stored_name": unique_filename,
-                    "filepath": filepath,  # Local path (for local storage)
-                    "mime_type": file.mimetype,
-                    "size_bytes": os.path.getsize(filepath),
-                }
-            )
-        else:
-         
-            print(f"Skipping invalid file: {file.filename if file else 'None'}")
+    try:
+        for file in files:
+            if file and allowed_file(file.filename):
+                
+                original_filename = secure_filename(file.filename)
+                # Per-attachment name used in download URLs; the bytes live in the blob
+                unique_filename = f"{uuid4().hex}_{original_filename}"
+
+                sha256, size, filepath = store_blob(file)
+
+                metadata_list.append(
+                    {
+                        "original_name": original_filename,
+                        "stored_name": unique_filename,
+                        "filepath": filepath,  # Local path (for local storage)
+                        "mime_type": file.mimetype,
+                        "size_bytes": size,
+                        "sha256": sha256,
+                    }
+                )
+            else:
+             
+                print(f"Skipping invalid file: {file.filename if file else 'None'}")
+    except Exception:
+        # Nothing will refer to the blobs stored so far
+        for metadata in metadata_list:
+            release_attachment(metadata)
+        raise
 
     return metadata_list
+
+
+def release_attachment(doc):
+    """
+    Releases the stored bytes behind one attachment's metadata.
+
+    Content-addressed attachments drop a blob reference; attachments stored
+    before content addressing own their file and delete it. A file that is
+    already gone counts as released.
+
+    Raises:
+        OSError: If the file exists but could not be removed.
+    """
+    try:
+        if doc.get("sha256"):
+            release_blob(doc["sha256"])
+        else:
+            os.remove(doc["filepath"])
+    except FileNotFoundError:
+        pass
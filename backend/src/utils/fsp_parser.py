@@ -1,5 +1,13 @@
 from flask import request
 from bson.objectid import ObjectId
+from src.tasks.stats import DONE_STATUS
+from src.utils.dates import parse_iso_datetime, utcnow
+from src.utils.keyset import (
+    KEYSET_SORT_FIELDS,
+    decode_cursor,
+    supports_keyset,
+    with_id_tiebreaker,
+)
 
 
 def parse_task_fsp_params(default_limit=10):
@@ -9,6 +17,9 @@ def parse_task_fsp_params(default_limit=10):
 
     Returns:
         tuple: (query_filter, query_sort, skip, limit)
+
+    Raises:
+        ValueError: If due_date_min/due_date_max is not an ISO 8601 date.
     """
     args = request.args
 
@@ -37,10 +48,26 @@ def parse_task_fsp_params(default_limit=10):
         query_filter["priority"] = priority
 
  
+    # Due dates are BSON dates, so ranges compare chronologically and walk the
+    # due_date indexes; a bare date as the upper bound includes the whole day
+    due_date_range = {}
+    due_date_min = args.get("due_date_min")
+    if due_date_min:
+        due_date_range["$gte"] = parse_iso_datetime(due_date_min)
     due_date_max = args.get("due_date_max")
     if due_date_max:
+        due_date_range["$lte"] = parse_iso_datetime(due_date_max, end_of_day=True)
+
+    # Overdue: due before now and not completed yet
+    if args.get("overdue", "").lower() in ("true", "1"):
+        due_date_range["$lt"] = utcnow()
+        if status == DONE_STATUS:
+            query_filter["status"] = {"$in": []}  # Completed tasks are never overdue
+        elif not status:
+            query_filter["status"] = {"$ne": DONE_STATUS}
 
-        query_filter["due_date"] = {"$lte": due_date_max}
+    if due_date_range:
+        query_filter["due_date"] = due_date_range
 
     assigned_to = args.get("assigned_to")
     if assigned_to:
@@ -54,6 +81,9 @@ def parse_task_fsp_params(default_limit=10):
     sort_param = args.get("sort", "-due_date")  # Default sort by descending due date
     query_sort = []
 
+    # Any fields, in any order: due_date, priority and status come back in
+    # index order (see TASK_INDEXES); other sorts run in memory, spilling to
+    # disk for large results (see fetch_task_page)
     sort_fields = sort_param.split(",")
     for field in sort_fields:
         field = field.strip()
@@ -64,4 +94,97 @@ def parse_task_fsp_params(default_limit=10):
             
             query_sort.append((field, 1))
 
+    # Always break ties on _id so the ordering is total and can be resumed
+    query_sort = with_id_tiebreaker(query_sort)
+
     return query_filter, query_sort, skip, limit
+
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def parse_task_fields_param(allowed_fields):
+    """
+    Parses the comma-separated `fields` parameter used for projections.
+
+    Returns:
+        list | None: The requested fields in order, or None for whole documents.
+
+    Raises:
+        ValueError: If a field is not in `allowed_fields`.
+    """
+    fields_param = request.args.get("fields")
+    if not fields_param:
+        return None
+
+    fields = []
+    for field in fields_param.split(","):
+        field = field.strip()
+        if not field or field == "_id" or field in fields:
+            continue
+        if field not in allowed_fields:
+            raise ValueError(
+                f"Unknown field '{field}'. Allowed: {', '.join(allowed_fields)}"
+            )
+        fields.append(field)
+
+    return fields
+
+
+def parse_task_count_mode(default="exact"):
+    """
+    Parses the `count` parameter that controls how list totals are computed.
+
+    Raises:
+        ValueError: If the mode is not one of COUNT_MODES.
+    """
+    count_mode = request.args.get("count", default)
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+    return count_mode
+
+
+def parse_task_cursor_param(query_sort):
+    """
+    Parses the opaque `cursor` parameter used for keyset pagination.
+
+    Returns:
+        list | None: The sort-key values to resume after, or None in page mode.
+
+    Raises:
+        ValueError: If the cursor is malformed or the sort cannot be resumed.
+    """
+    token = request.args.get("cursor")
+    if not token:
+        return None
+
+    if not supports_keyset(query_sort):
+        raise ValueError(
+            "Cursor pagination only supports sorting by "
+            + ", ".join(sorted(KEYSET_SORT_FIELDS))
+        )
+
+    return decode_cursor(token, query_sort)
+
+
+SEARCH_MAX_LENGTH = 200
+# Default ordering of `?q=` results: best text match first
+SEARCH_SORT = [("score", -1), ("_id", -1)]
+
+
+def parse_task_search_param():
+    """
+    Parses the `q` full-text search parameter.
+
+    Returns:
+        str | None: The search terms, or None when not searching.
+
+    Raises:
+        ValueError: If the terms are longer than SEARCH_MAX_LENGTH.
+    """
+    search = request.args.get("q", "").strip()
+    if not search:
+        return None
+    if len(search) > SEARCH_MAX_LENGTH:
+        raise ValueError(f"q must be at most {SEARCH_MAX_LENGTH} characters")
+    return search
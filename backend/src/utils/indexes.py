@@ -0,0 +1,55 @@
+from pymongo.errors import OperationFailure
+from src.auth.models import USER_INDEXES
+from src.auth.revocation import REVOKED_TOKEN_INDEXES
+from src.tasks.models import TASK_INDEXES
+from src.tasks.stats import TASK_STATS_INDEXES
+from src.users.models import USER_DELETE_JOB_INDEXES
+from src.utils.reaper import FILE_OUTBOX_INDEXES
+
+
+# Collection name -> declared indexes. Every collection the API queries
+# registers its catalog here so startup and the CLI apply the same set.
+INDEX_CATALOG = {
+    "users": USER_INDEXES,
+    "tasks": TASK_INDEXES,
+    "file_reaper_outbox": FILE_OUTBOX_INDEXES,
+    "revoked_tokens": REVOKED_TOKEN_INDEXES,
+    "task_stats": TASK_STATS_INDEXES,
+    "user_delete_jobs": USER_DELETE_JOB_INDEXES,
+}
+
+
+def ensure_indexes(db, strict=True):
+    """
+    Creates every index in INDEX_CATALOG on the given database.
+
+    createIndexes is a no-op for indexes that already exist with the same
+    definition, so this is safe to run on every startup.
+
+    An index the existing data violates (the unique users.email index over
+    duplicate emails, say) raises OperationFailure. With `strict=False` it is
+    reported and skipped instead, and the collection's other indexes are
+    still created one by one, so the API can start on such a database;
+    create_indexes.py reports the same error until the data is fixed.
+
+    Returns: A dict mapping collection names to the index names applied.
+    """
+    applied = {}
+    for collection_name, indexes in INDEX_CATALOG.items():
+        collection = db[collection_name]
+        try:
+            applied[collection_name] = collection.create_indexes(indexes)
+        except OperationFailure:
+            if strict:
+                raise
+            # One failing index fails the whole createIndexes command
+            applied[collection_name] = []
+            for index in indexes:
+                try:
+                    applied[collection_name] += collection.create_indexes([index])
+                except OperationFailure as e:
+                    print(
+                        f"Index {index.document['name']} on {collection_name} "
+                        f"was not created: {e}"
+                    )
+    return applied
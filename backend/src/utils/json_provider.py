@@ -0,0 +1,76 @@
+import datetime
+import decimal
+import json
+import uuid
+from bson import Decimal128, ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib encoder produces the same JSON
+    orjson = None
+
+
+def bson_default(value):
+    """
+    Encodes the BSON/stdlib types the json module doesn't know.
+
+    ObjectIds become their hex string, Decimal128/Decimal their exact decimal
+    string, and datetimes ISO 8601 (naive values are UTC, as PyMongo returns).
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes MongoDB documents as they come back
+    from PyMongo, so views don't need to stringify ObjectIds by hand.
+
+    Encoding goes through orjson when it is installed, else the stdlib
+    encoder with `bson_default`; both produce the same output.
+    """
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(
+                obj, default=bson_default, option=self._orjson_options()
+            ).decode("utf-8")
+
+        kwargs.setdefault("default", bson_default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(
+            obj, default=bson_default, option=self._orjson_options(indent)
+        )
+        # Bytes go straight into the response, skipping a str round trip
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,109 @@
+import base64
+import binascii
+from datetime import datetime
+from bson import json_util
+from bson.errors import InvalidId
+
+
+# Sort keys that can be resumed with a range predicate. "_id" is always
+# appended as the final tiebreaker so every position in the ordering is unique.
+# "score" is the text relevance computed for `?q=` searches.
+KEYSET_SORT_FIELDS = {"due_date", "priority", "status", "score", "_id"}
+# Keys that may hold strings as well as dates: due dates stored before they
+# became BSON dates, until migrate_due_dates.py has converted them all.
+MIXED_DATE_FIELDS = {"due_date"}
+
+
+def with_id_tiebreaker(query_sort):
+    """Appends an `_id` tiebreaker (in the direction of the last key) to a sort spec."""
+    if any(field == "_id" for field, _ in query_sort):
+        return list(query_sort)
+
+    direction = query_sort[-1][1] if query_sort else -1
+    return list(query_sort) + [("_id", direction)]
+
+
+def supports_keyset(query_sort):
+    """True when every key of the sort spec can be resumed with a cursor."""
+    return all(field in KEYSET_SORT_FIELDS for field, _ in query_sort)
+
+
+def encode_cursor(document, query_sort):
+    """
+    Encodes the sort-key values of `document` into an opaque, URL-safe cursor.
+
+    The sort spec is stored alongside the values so a cursor cannot be replayed
+    against a different ordering.
+    """
+    payload = {
+        "s": [[field, direction] for field, direction in query_sort],
+        "v": [document.get(field) for field, _ in query_sort],
+    }
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, query_sort):
+    """
+    Decodes a cursor produced by `encode_cursor` and returns its sort-key values.
+
+    Raises ValueError if the token is malformed or was issued for another sort.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        cursor_sort = [(field, direction) for field, direction in payload["s"]]
+        values = payload["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid pagination cursor")
+
+    if cursor_sort != list(query_sort) or len(values) != len(query_sort):
+        raise ValueError("Pagination cursor does not match the requested sort")
+
+    return values
+
+
+def _after(field, direction, value):
+    """Predicate matching documents that sort strictly after `value` on one key."""
+    # MongoDB sorts null/missing values before any other type, so they need
+    # explicit handling: they come first ascending and last descending.
+    if value is None:
+        return {field: {"$ne": None}} if direction == 1 else None
+
+    clauses = [{field: {"$gt" if direction == 1 else "$lt": value}}]
+    if field in MIXED_DATE_FIELDS:
+        # $gt/$lt only compare values of the same type, while the sort orders
+        # whole types: null < strings < dates. The other type's block is
+        # matched by $type, so unmigrated tasks stay on the cursor's path.
+        if direction == 1 and isinstance(value, str):
+            clauses.append({field: {"$type": "date"}})
+        elif direction == -1 and isinstance(value, datetime):
+            clauses.append({field: {"$type": "string"}})
+    if direction == -1:
+        clauses.append({field: None})
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def keyset_filter(query_sort, values):
+    """
+    Builds the range predicate selecting every document after the cursor position.
+
+    For a sort (k1, k2, _id) this is:
+        k1 > v1  OR  (k1 == v1 AND k2 > v2)  OR  (k1 == v1 AND k2 == v2 AND _id > id)
+    with ">" flipped to "<" for descending keys.
+    """
+    branches = []
+    equal_prefix = {}
+
+    for (field, direction), value in zip(query_sort, values):
+        after = _after(field, direction, value)
+        if after is not None:
+            branches.append({**equal_prefix, **after} if equal_prefix else after)
+        equal_prefix[field] = value
+
+    if not branches:
+        # The cursor sits on the very last possible position.
+        return {"_id": {"$exists": False}}
+    if len(branches) == 1:
+        return branches[0]
+    return {"$or": branches}
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo.monitoring import CommandListener, ConnectionPoolListener
+
+# Under gunicorn each worker writes its samples to files in this directory
+# (set by gunicorn.conf.py) and /metrics adds up every worker's files.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+# Label for requests no route matched (404s), which keeps label values bounded
+UNMATCHED_ENDPOINT = "<unmatched>"
+# Endpoints left out of request metrics: the scrape itself, and the SSE stream,
+# which stays open for as long as the client listens (without
+# stream_with_context, its teardown also runs before the first event)
+UNTRACKED_ENDPOINTS = {"metrics", "tasks.stream_task_events"}
+
+MONGO_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response is ready (streamed "
+    "bodies excluded; the SSE stream is not measured), by Flask endpoint.",
+    ["method", "endpoint", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled right now, by Flask endpoint.",
+    ["method", "endpoint"],
+    multiprocess_mode="livesum",
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongodb_command_duration_seconds",
+    "Round trip of each MongoDB command, by command and collection.",
+    ["command", "collection"],
+    buckets=MONGO_BUCKETS,
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands answered with an error, by command and collection.",
+    ["command", "collection"],
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection before a command could run.",
+    buckets=MONGO_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Connection checkouts that failed (pool timeout, pool closed, ...).",
+    ["reason"],
+)
+
+
+class MongoCommandMetrics(CommandListener):
+    """
+    Records the duration of every command PyMongo sends.
+
+    Only the started event carries the command document (and so the
+    collection), so it is remembered until the matching reply arrives.
+    """
+
+    def __init__(self):
+        self._collections = {}  # (connection_id, request_id) -> collection
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(event):
+        target = event.command.get(event.command_name)
+        if isinstance(target, str):
+            return target
+        # getMore names the collection separately; aggregate: 1 runs on the db
+        return event.command.get("collection") or ""
+
+    def started(self, event):
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = (
+                self._collection(event)
+            )
+
+    def _finished(self, event):
+        with self._lock:
+            collection = self._collections.pop(
+                (event.connection_id, event.request_id), ""
+            )
+        MONGO_COMMAND_LATENCY.labels(event.command_name, collection).observe(
+            event.duration_micros / 1_000_000
+        )
+        return collection
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        collection = self._finished(event)
+        MONGO_COMMAND_FAILURES.labels(event.command_name, collection).inc()
+
+
+class MongoPoolMetrics(ConnectionPoolListener):
+    """Records how long commands wait to check a connection out of the pool."""
+
+    def connection_checked_out(self, event):
+        if event.duration is not None:
+            MONGO_POOL_CHECKOUT_WAIT.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.labels(event.reason).inc()
+
+    # The remaining pool events aren't measured
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+def mongo_event_listeners():
+    """Listeners to pass to MongoClient(event_listeners=...)."""
+    return [MongoCommandMetrics(), MongoPoolMetrics()]
+
+
+def _request_labels():
+    return request.method, request.endpoint or UNMATCHED_ENDPOINT
+
+
+def _start_request_timer():
+    if request.endpoint in UNTRACKED_ENDPOINTS:
+        return
+    g.metrics_started_at = time.perf_counter()
+    g.metrics_in_progress = True
+    REQUESTS_IN_PROGRESS.labels(*_request_labels()).inc()
+
+
+def _observe_request(response):
+    started_at = g.pop("metrics_started_at", None)
+    if started_at is not None:
+        REQUEST_LATENCY.labels(*_request_labels(), response.status_code).observe(
+            time.perf_counter() - started_at
+        )
+    return response
+
+
+def _end_request(exc):
+    # Runs when the request context is popped: once the view returned, or for
+    # bodies streamed with stream_with_context (exports) once they are done
+    if g.pop("metrics_in_progress", False):
+        REQUESTS_IN_PROGRESS.labels(*_request_labels()).dec()
+
+
+def metrics():
+    """Prometheus text exposition of this process, or of every gunicorn worker."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+
+
+def init_metrics(app):
+    """
+    Times every request and serves GET /metrics.
+
+    Register this before other request hooks, so the timer starts first and
+    stops last.
+    """
+    app.before_request(_start_request_timer)
+    app.after_request(_observe_request)
+    app.teardown_request(_end_request)
+    app.add_url_rule("/metrics", "metrics", metrics)
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from src import mongo
+from src.utils.file_handler import release_attachment
+from src.utils.workers import PollingWorker
+
+
+# Retry delay after the Nth failure: REAPER_RETRY_BASE * 2**N, capped
+REAPER_RETRY_BASE = timedelta(seconds=30)
+REAPER_RETRY_MAX = timedelta(hours=1)
+# A claimed record whose worker died becomes claimable again after this long
+REAPER_LEASE = timedelta(minutes=5)
+
+FILE_OUTBOX_INDEXES = [
+    IndexModel(
+        [("state", ASCENDING), ("next_attempt_at", ASCENDING)],
+        name="file_outbox_state_next_attempt",
+    ),
+]
+
+
+def get_file_outbox_collection():
+    """Returns the outbox of attachments waiting to be released from storage."""
+    return mongo.db.file_reaper_outbox
+
+
+def enqueue_attachment_release(attachments, reason):
+    """
+    Records attachments whose files should be released in the background.
+
+    Called right after the owning tasks are deleted; the request returns
+    without touching the filesystem.
+    """
+    attachments = [
+        {
+            "stored_name": doc.get("stored_name"),
+            "filepath": doc.get("filepath"),
+            "sha256": doc.get("sha256"),
+        }
+        for doc in attachments
+    ]
+    if not attachments:
+        return None
+
+    now = datetime.now(timezone.utc)
+    return (
+        get_file_outbox_collection()
+        .insert_one(
+            {
+                "reason": reason,
+                "attachments": attachments,
+                "state": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+        )
+        .inserted_id
+    )
+
+
+def _claim_next(now):
+    """Atomically leases one due outbox record (or one with an expired lease)."""
+    return get_file_outbox_collection().find_one_and_update(
+        {
+            # For "processing" records next_attempt_at is the lease expiry
+            "state": {"$in": ["pending", "processing"]},
+            "next_attempt_at": {"$lte": now},
+        },
+        {"$set": {"state": "processing", "next_attempt_at": now + REAPER_LEASE}},
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _reap_record(record, max_attempts):
+    """
+    Releases one record's attachments; reschedules whatever failed.
+
+    Each attachment is pulled from the record before its release, and only
+    by the worker whose pull removed it, so a retry (or a second worker after
+    the lease expired) never releases a reference twice. A crash in between
+    leaks the file instead, which gc_uploads.py reclaims later.
+    """
+    outbox = get_file_outbox_collection()
+    errors = []
+
+    for doc in record["attachments"]:
+        pulled = outbox.update_one(
+            {"_id": record["_id"], "attachments": doc},
+            {"$pull": {"attachments": doc}},
+        )
+        if not pulled.modified_count:
+            continue  # Already released by an earlier claim
+        try:
+            release_attachment(doc)
+        except OSError as e:
+            errors.append(f"{doc.get('filepath')}: {e}")
+            # Nothing was released, so hand the reference back for the retry
+            outbox.update_one({"_id": record["_id"]}, {"$push": {"attachments": doc}})
+
+    if not errors:
+        outbox.delete_one({"_id": record["_id"]})
+        return True
+
+    attempts = record["attempts"] + 1
+    delay = min(REAPER_RETRY_BASE * 2**attempts, REAPER_RETRY_MAX)
+    outbox.update_one(
+        {"_id": record["_id"]},
+        {
+            "$set": {
+                "state": "failed" if attempts >= max_attempts else "pending",
+                "attempts": attempts,
+                "next_attempt_at": datetime.now(timezone.utc) + delay,
+                "last_errors": errors,
+            }
+        },
+    )
+    return False
+
+
+def reap_pending(batch_size=100, max_attempts=8):
+    """
+    Processes up to `batch_size` due outbox records.
+
+    Returns: The number of records handled (released or rescheduled).
+    """
+    handled = 0
+    now = datetime.now(timezone.utc)
+    while handled < batch_size:
+        record = _claim_next(now)
+        if record is None:
+            break
+        _reap_record(record, max_attempts)
+        handled += 1
+    return handled
+
+
+class FileReaper(PollingWorker):
+    """Background thread draining the file outbox."""
+
+    def __init__(self, app):
+        super().__init__(app, interval=app.config["FILE_REAPER_INTERVAL"])
+
+    def run_once(self):
+        return reap_pending(
+            batch_size=self.app.config["FILE_REAPER_BATCH_SIZE"],
+            max_attempts=self.app.config["FILE_REAPER_MAX_ATTEMPTS"],
+        )
@@ -0,0 +1,213 @@
+import os
+import time
+from uuid import uuid4
+from src.tasks.models import get_task_collection
+from src.utils.bloom import BloomFilter
+from src.utils.file_handler import get_blob_collection
+
+# Orphans are removed in batches; blob candidates are re-checked per batch
+GC_BATCH_SIZE = 500
+# Suffix release_blob() gives a blob file while it forgets the blob
+TRASH_MARKER = ".deleting-"
+# Removal errors listed in a report (the count is always exact)
+MAX_REPORTED_ERRORS = 100
+
+
+def _referenced_names(max_uploads):
+    """
+    Bloom filter of every name the metadata refers to: legacy per-attachment
+    files (stored_name), content-addressed blobs (sha256) and blob records.
+
+    Both collections are streamed, so memory is the filter's bit array only.
+    """
+    tasks = get_task_collection()
+    blobs = get_blob_collection()
+    capacity = (
+        tasks.estimated_document_count() * max_uploads
+        + blobs.estimated_document_count()
+    )
+    references = BloomFilter(capacity)
+
+    cursor = tasks.find(
+        {"attached_documents.0": {"$exists": True}},
+        {"attached_documents.stored_name": 1, "attached_documents.sha256": 1},
+        batch_size=1000,
+    )
+    for task in cursor:
+        for doc in task["attached_documents"]:
+            if doc.get("sha256"):
+                references.add(doc["sha256"])
+            elif doc.get("stored_name"):
+                references.add(doc["stored_name"])
+    for blob in blobs.find({}, {"_id": 1}, batch_size=1000):
+        references.add(blob["_id"])
+    return references
+
+
+def _scan(path, directories=False):
+    """Streams the files (or subdirectories) of one directory."""
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if directories and entry.is_dir(follow_symlinks=False):
+                yield entry
+            elif not directories and entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _walk_uploads(folder):
+    """
+    Yields (kind, key, entry) for every file under the uploads folder:
+      - "legacy": <folder>/<stored_name>, attachments from before content addressing
+      - "tmp":    <folder>/tmp/upload-*, partial uploads
+      - "blob":   <folder>/blobs/ab/cd/<sha256>[.deleting-*], keyed by the hash
+    """
+    for entry in _scan(folder):
+        yield "legacy", entry.name, entry
+    for entry in _scan(os.path.join(folder, "tmp")):
+        yield "tmp", entry.name, entry
+    for outer in _scan(os.path.join(folder, "blobs"), directories=True):
+        for inner in _scan(outer.path, directories=True):
+            for entry in _scan(inner.path):
+                yield "blob", entry.name.split(TRASH_MARKER)[0], entry
+
+
+def _remove_blob(path, key):
+    """
+    Deletes an unreferenced blob file the way release_blob() does: move it
+    aside, re-check the blob record, then unlink it or put it back.
+
+    store_blob() takes its reference before placing its copy, so an upload
+    racing this either shows up in the re-check (the file is restored) or
+    places a fresh copy after the move (only the moved file is deleted).
+
+    Returns: False if the blob turned out to be referenced.
+    """
+    trash_path = f"{path}{TRASH_MARKER}gc-{uuid4().hex}"
+    os.replace(path, trash_path)
+    if get_blob_collection().find_one({"_id": key}, {"_id": 1}):
+        # Same content, so overwriting a copy placed meanwhile is harmless
+        os.replace(trash_path, path)
+        return False
+    os.remove(trash_path)
+    return True
+
+
+def _record_error(report, path, error):
+    report["errors"] += 1
+    if len(report["error_messages"]) < MAX_REPORTED_ERRORS:
+        report["error_messages"].append(f"{path}: {error}")
+
+
+def _remove_orphans(batch, cutoff, dry_run, report):
+    """Deletes one batch of orphan candidates, re-checking what may have changed."""
+    # A blob can be referenced again by an upload after the filter was built
+    blob_keys = [key for kind, key, _, _ in batch if kind == "blob"]
+    live = set()
+    if blob_keys:
+        live = {
+            blob["_id"]
+            for blob in get_blob_collection().find(
+                {"_id": {"$in": blob_keys}}, {"_id": 1}
+            )
+        }
+
+    for kind, key, path, size in batch:
+        in_trash = kind == "blob" and TRASH_MARKER in os.path.basename(path)
+        if kind == "blob" and key in live:
+            if not in_trash:
+                continue
+            # A copy moved aside by a release that crashed before unlinking
+            # or restoring it: garbage next to the blob file, else the only
+            # copy, which goes back in place
+            blob_file = path.split(TRASH_MARKER)[0]
+            if not os.path.exists(blob_file):
+                if not dry_run:
+                    try:
+                        os.replace(path, blob_file)
+                        report["restored"] += 1
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        _record_error(report, path, e)
+                continue
+        report["orphans"] += 1
+        if dry_run:
+            report["bytes_reclaimed"] += size
+            continue
+        try:
+            # An upload may have just replaced the file with a fresh copy
+            if os.stat(path).st_mtime > cutoff:
+                continue
+            if kind == "blob" and not in_trash:
+                if not _remove_blob(path, key):
+                    continue
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            _record_error(report, path, e)
+            continue
+        report["deleted"] += 1
+        report["bytes_reclaimed"] += size
+
+
+def collect_upload_garbage(folder, grace_period, max_uploads, dry_run=False):
+    """
+    Deletes files in the uploads folder that no task or blob record refers to.
+
+    The metadata is loaded into a Bloom filter first, then the folder is
+    streamed: a file the filter has definitely not seen is an orphan, while a
+    false positive only keeps an orphan until a later run. Files younger than
+    `grace_period` seconds are left alone, which covers uploads whose
+    metadata isn't written yet. Memory stays bounded by the filter and one
+    batch, however many files there are.
+
+    Moved-aside copies of referenced blobs (`.deleting-*`, left by a release
+    that crashed midway) are removed if the blob file exists, and otherwise
+    moved back into place ("restored").
+
+    Returns: {"scanned", "orphans", "recent", "deleted", "bytes_reclaimed",
+    "restored", "errors", "error_messages"}; with `dry_run` nothing is
+    deleted or restored and "bytes_reclaimed" is what a real run would free.
+    """
+    cutoff = time.time() - grace_period
+    references = _referenced_names(max_uploads)
+    report = {
+        "scanned": 0,
+        "orphans": 0,
+        "recent": 0,
+        "deleted": 0,
+        "bytes_reclaimed": 0,
+        "restored": 0,
+        "errors": 0,
+        "error_messages": [],
+    }
+
+    batch = []
+    for kind, key, entry in _walk_uploads(folder):
+        report["scanned"] += 1
+        # A referenced key doesn't vouch for a moved-aside copy of the blob
+        in_trash = TRASH_MARKER in entry.name
+        if kind != "tmp" and not in_trash and key in references:
+            continue
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        if stat.st_mtime > cutoff:
+            report["recent"] += 1
+            continue
+
+        batch.append((kind, key, entry.path, stat.st_size))
+        if len(batch) >= GC_BATCH_SIZE:
+            _remove_orphans(batch, cutoff, dry_run, report)
+            batch = []
+    if batch:
+        _remove_orphans(batch, cutoff, dry_run, report)
+
+    return report
@@ -0,0 +1,37 @@
+import abc
+import threading
+
+
+class PollingWorker(threading.Thread, abc.ABC):
+    """
+    Daemon thread that calls `run_once()` inside an app context every `interval`
+    seconds until stopped.
+
+    Work items are claimed atomically in MongoDB by the subclasses, so several
+    gunicorn workers (or a separate CLI process) can poll the same queue.
+    """
+
+    def __init__(self, app, interval, name=None):
+        super().__init__(name=name or type(self).__name__, daemon=True)
+        self.app = app
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    @abc.abstractmethod
+    def run_once(self):
+        """Processes one round of work. Returns the number of items handled."""
+
+    def run(self):
+        while not self._stop_event.is_set():
+            handled = 0
+            try:
+                with self.app.app_context():
+                    handled = self.run_once()
+            except Exception as e:
+                # Keep the worker alive; the next round retries
+                print(f"{self.name} failed: {e}")
+            if not handled:
+                self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
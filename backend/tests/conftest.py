@@ -11,11 +11,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 from app import create_app
 
 
-from src import mongo, bcrypt
+from src import mongo, bcrypt, task_list_cache
 
 
 from config import TestConfig
 
+from src.utils.indexes import ensure_indexes
+
 import json
 
 @pytest.fixture(scope="session")
@@ -56,6 +58,11 @@ def cleanup_db(app):
         mongo.db.client.drop_database(
             database_name
         )  
+
+        # Dropping the database drops its indexes; restore the catalog
+        ensure_indexes(mongo.db)
+        # Cached task lists would outlive the dropped data
+        task_list_cache.clear()
     yield  
 
     
@@ -88,6 +95,7 @@ def create_test_user(app, test_user_data):
 
         user_data = {
             "email": user_email,
+            "email_lower": user_email.lower(),
             "password": hashed_password,
             "role": role,
         }
@@ -120,7 +128,12 @@ def get_auth_token_for(client, create_test_user, test_user_data):
         from app import bcrypt
 
         hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
-        user_data = {"email": user_email, "password": hashed_password, "role": role}
+        user_data = {
+            "email": user_email,
+            "email_lower": user_email.lower(),
+            "password": hashed_password,
+            "role": role,
+        }
         user_id = str(get_user_collection().insert_one(user_data).inserted_id)
 
         
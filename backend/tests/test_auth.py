@@ -104,3 +104,92 @@ def test_login_user_not_found(client, test_user_data):
     )
     assert response.status_code == 401
     assert "Invalid credentials" in response.get_json()["msg"]
+
+
+# --- Test Logout ---
+
+
+def test_logout_revokes_token_across_workers(client, create_test_user, test_user_data):
+    """A logged-out token is rejected, including by another worker's revocation cache."""
+    from src.auth.revocation import RevocationStore
+
+    create_test_user()
+    headers = get_auth_headers(
+        client, test_user_data["email"], test_user_data["password"]
+    )
+
+    # A second worker that synced before the logout happened
+    other_worker = RevocationStore(refresh_interval=0)
+    with client.application.app_context():
+        other_worker.refresh()
+
+    response = client.post("/api/auth/logout", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/tasks", headers=headers)
+    assert response.status_code == 401
+
+    from flask_jwt_extended import decode_token
+
+    with client.application.app_context():
+        jti = decode_token(headers["Authorization"].split()[1], allow_expired=True)[
+            "jti"
+        ]
+        assert other_worker.is_revoked(jti)
+
+
+def test_login_rehashes_password_with_new_cost(client, test_user_data):
+    """A hash made at another bcrypt cost is replaced on successful login."""
+    import bcrypt as bcrypt_lib
+    from src import mongo
+
+    with client.application.app_context():
+        old_hash = bcrypt_lib.hashpw(
+            test_user_data["password"].encode("utf-8"), bcrypt_lib.gensalt(5)
+        ).decode("utf-8")
+        mongo.db.users.insert_one(
+            {"email": test_user_data["email"], "password": old_hash, "role": "user"}
+        )
+
+    response = client.post(
+        "/api/auth/login",
+        data=json.dumps(test_user_data),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+    with client.application.app_context():
+        new_hash = get_user_by_email(test_user_data["email"])["password"]
+    assert new_hash != old_hash
+    assert new_hash.startswith("$2b$04$")
+
+    # The new hash still verifies
+    response = client.post(
+        "/api/auth/login",
+        data=json.dumps(test_user_data),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+
+def test_login_rejected_when_hashing_queue_full(
+    client, create_test_user, test_user_data
+):
+    """Logins fail fast with 503 + Retry-After instead of queueing unboundedly."""
+    from src import password_hasher
+
+    create_test_user()
+    slots = password_hasher._slots
+    password_hasher._slots = type(slots)(1)
+    password_hasher._slots.acquire()
+    try:
+        response = client.post(
+            "/api/auth/login",
+            data=json.dumps(test_user_data),
+            content_type="application/json",
+        )
+    finally:
+        password_hasher._slots = slots
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,243 @@
+import pytest
+from datetime import datetime
+from itertools import combinations
+from bson.objectid import ObjectId
+from src import mongo
+from src.utils.fsp_parser import (
+    SEARCH_SORT,
+    parse_task_fsp_params,
+    parse_task_search_param,
+)
+from src.utils.indexes import ensure_indexes
+from src.utils.keyset import keyset_filter
+
+# Every filter argument list_tasks and export_tasks accept; the tests run all
+# their combinations through the real parser
+TASK_FILTER_ARGS = {
+    "status": "To Do",
+    "priority": "High",
+    "due_date_min": "2025-01-01",
+    "due_date_max": "2025-12-31",
+    "overdue": "true",
+    "assigned_to": str(ObjectId()),
+}
+TASK_FILTER_ARG_SETS = [
+    {key: TASK_FILTER_ARGS[key] for key in keys}
+    for size in range(len(TASK_FILTER_ARGS) + 1)
+    for keys in combinations(TASK_FILTER_ARGS, size)
+]
+# Every sort= an index returns in order, both directions; other fields are
+# sorted in memory by design
+INDEXED_SORTS = ["-due_date", "due_date", "-priority", "priority", "-status", "status"]
+# Positions a cursor resumes from, per sort key; due dates may still be
+# strings (before migrate_due_dates.py) or missing
+CURSOR_VALUES = {
+    "due_date": [datetime(2025, 6, 1), "2025-06-01", None],
+    "priority": ["Medium"],
+    "status": ["In Progress"],
+    "score": [1.5],
+}
+
+
+def plan_stages(plan):
+    """Recursively collects every stage name in an explain() plan."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages += plan_stages(item)
+    return stages
+
+
+def winning_plans(explain):
+    """Every winning plan in an explain() result (aggregations nest them)."""
+    plans = []
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                plans.append(value)
+            else:
+                plans += winning_plans(value)
+    elif isinstance(explain, list):
+        for item in explain:
+            plans += winning_plans(item)
+    return plans
+
+
+def assert_indexed(explain, blocking_sort=False):
+    """
+    No collection scan and, unless `blocking_sort`, no in-memory sort: neither
+    in the query plans nor as an aggregation $sort left out of them.
+    """
+    plans = winning_plans(explain)
+    assert plans, explain
+    stages = plan_stages(plans)
+    assert "COLLSCAN" not in stages, stages
+    if not blocking_sort:
+        assert "SORT" not in stages, stages
+        pipeline_stages = explain.get("stages") or []
+        assert not any("$sort" in stage for stage in pipeline_stages), explain
+
+
+def explain_aggregate(pipeline):
+    return mongo.db.command("aggregate", "tasks", pipeline=pipeline, explain=True)
+
+
+def explain_count(query_filter):
+    """Explains count_documents(query_filter), which runs this aggregation."""
+    return explain_aggregate(
+        [{"$match": query_filter}, {"$group": {"_id": 1, "n": {"$sum": 1}}}]
+    )
+
+
+def explain_delete(query_filter):
+    return mongo.db.command(
+        "explain",
+        {"delete": "tasks", "deletes": [{"q": query_filter, "limit": 0}]},
+    )
+
+
+def list_query(app, args, user_id, role):
+    """The filter and sort list_tasks / export_tasks build for these args."""
+    from src.tasks.services import restrict_to_visible_tasks
+
+    with app.test_request_context(query_string=args):
+        query_filter, query_sort, _, _ = parse_task_fsp_params()
+        search = parse_task_search_param()
+    if search:
+        query_filter["$text"] = {"$search": search}
+        if "sort" not in args:
+            query_sort = list(SEARCH_SORT)
+    return restrict_to_visible_tasks(query_filter, user_id, role), query_sort
+
+
+def assert_list_queries_indexed(query_filter, query_sort, blocking_sort=False):
+    """Every read a listing or export with this filter and sort can issue."""
+    from src.tasks.services import (
+        build_task_page_pipeline,
+        find_task_export,
+        find_task_page,
+    )
+
+    by_score = any(field == "score" for field, _ in query_sort)
+
+    def page(skip, keyset=None):
+        if by_score:
+            pipeline = build_task_page_pipeline(
+                query_filter, query_sort, skip, 5, keyset
+            )
+            return explain_aggregate(pipeline)
+        return find_task_page(query_filter, query_sort, skip, 5, keyset).explain()
+
+    # First and later pages; count=exact reads both through one $facet
+    assert_indexed(page(0), blocking_sort)
+    assert_indexed(page(10), blocking_sort)
+    facet = build_task_page_pipeline(query_filter, query_sort, 0, 5, total=True)
+    assert_indexed(explain_aggregate(facet), blocking_sort)
+    # Totals of cursor pages and count=estimate (an empty filter uses metadata)
+    if query_filter:
+        assert_indexed(explain_count(query_filter))
+    # Cursor pages resume through the keyset predicate
+    for value in CURSOR_VALUES[query_sort[0][0]]:
+        keyset = keyset_filter(query_sort, [value, ObjectId()])
+        assert_indexed(page(0, keyset), blocking_sort)
+    if not by_score:
+        export = find_task_export(query_filter, query_sort, None, 500)
+        assert_indexed(export.explain(), blocking_sort)
+
+
+def test_ensure_indexes_is_idempotent(app):
+    with app.app_context():
+        first = ensure_indexes(mongo.db)
+        second = ensure_indexes(mongo.db)
+    assert first == second
+
+
+def test_ensure_indexes_skips_what_existing_data_violates(app):
+    """Duplicate emails block the unique index, not startup or the other indexes."""
+    from pymongo.errors import OperationFailure
+
+    with app.app_context():
+        users = mongo.db.users
+        users.drop()
+        users.insert_many(
+            [{"email": "twin@example.com"}, {"email": "twin@example.com"}]
+        )
+
+        with pytest.raises(OperationFailure):
+            ensure_indexes(mongo.db)
+        applied = ensure_indexes(mongo.db, strict=False)
+
+        assert "users_email_lower" in applied["users"]
+        assert "users_email_unique" not in users.index_information()
+        assert "users_email_lower" in users.index_information()
+
+
+@pytest.mark.parametrize("role", ["admin", "user"])
+@pytest.mark.parametrize("args", TASK_FILTER_ARG_SETS, ids=lambda args: ",".join(args))
+def test_task_list_queries_use_indexes(app, args, role):
+    user_id = ObjectId()
+    with app.app_context():
+        for sort in INDEXED_SORTS:
+            query_filter, query_sort = list_query(
+                app, {**args, "sort": sort}, user_id, role
+            )
+            assert_list_queries_indexed(query_filter, query_sort)
+
+
+@pytest.mark.parametrize("role", ["admin", "user"])
+@pytest.mark.parametrize("sort", [None, "-due_date"])
+def test_task_search_queries_use_the_text_index(app, role, sort):
+    """q= reads through the text index; ranking sorts its matches in memory."""
+    args = {"q": "invoice", "status": "To Do"}
+    if sort:
+        args["sort"] = sort
+    with app.app_context():
+        query_filter, query_sort = list_query(app, args, ObjectId(), role)
+        assert_list_queries_indexed(query_filter, query_sort, blocking_sort=True)
+
+
+@pytest.mark.parametrize(
+    "query_filter",
+    [
+        {},
+        {"role": "user"},
+        {"email_lower": {"$regex": "^al"}},
+        {"role": "admin", "email_lower": {"$regex": "^al"}},
+    ],
+)
+def test_user_list_queries_use_indexes(app, query_filter):
+    with app.app_context():
+        cursor = mongo.db.users.find(query_filter, {"password": 0})
+        explain = cursor.sort([("email_lower", 1), ("_id", 1)]).limit(51).explain()
+        assert_indexed(explain)
+
+
+def test_lookup_queries_use_indexes(app):
+    from src.tasks.migrations import string_due_date_batch
+    from src.tasks.stats import due_earlier_today_filter
+    from src.users.jobs import CASCADE_PHASES, _cascade_batch, _cascade_delete_filter
+
+    user_id = ObjectId()
+    with app.app_context():
+        # get_user_by_email
+        assert_indexed(mongo.db.users.find({"email": "someone@example.com"}).explain())
+        # get_task / update_task / delete_task / download_document
+        assert_indexed(mongo.db.tasks.find({"_id": ObjectId()}).explain())
+        # delete_user cascade: read a batch, then delete it
+        for field in CASCADE_PHASES:
+            batch = _cascade_batch(mongo.db.tasks, user_id, field, 500)
+            assert_indexed(batch.explain())
+            delete_filter = _cascade_delete_filter(user_id, field, [ObjectId()] * 3)
+            assert_indexed(explain_delete(delete_filter))
+        # migrate_due_dates batches, first and resumed
+        for after_id in (None, ObjectId()):
+            batch = string_due_date_batch(mongo.db.tasks, after_id, 500)
+            assert_indexed(batch.explain())
+        # Stats: open tasks due earlier today
+        due_today = due_earlier_today_filter(datetime(2025, 6, 1, 12))
+        assert_indexed(explain_count(due_today))
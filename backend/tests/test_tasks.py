@@ -1,10 +1,12 @@
 import pytest
 import json
 import os
+from datetime import datetime
 from flask import current_app
 from io import BytesIO
 from werkzeug.datastructures import FileStorage
 from src.tasks.models import get_task_collection
+from src.utils.reaper import get_file_outbox_collection, reap_pending
 from bson.objectid import ObjectId  
 
 
@@ -42,7 +44,7 @@ def create_task_in_db(user_id, **kwargs):
         "description": "Default description",
         "status": "To Do",
         "priority": "Low",
-        "due_date": "2025-11-01",
+        "due_date": datetime(2025, 11, 1),
         "assigned_to": ObjectId(user_id),
         "created_by": ObjectId(user_id),
         "attached_documents": [],
@@ -79,6 +81,36 @@ def test_task_read_success(client, user_auth):
     assert response.get_json()["_id"] == task_id
 
 
+def test_task_read_encodes_bson_types(client, user_auth, app):
+    """ObjectIds, datetimes and Decimal128 come back as plain JSON values."""
+    from bson import Decimal128
+    from src.utils import json_provider
+
+    task_id = create_task_in_db(
+        user_auth[1],
+        due_date=datetime(2025, 11, 1, 9, 30),
+        estimate=Decimal128("1.50"),
+    )
+
+    response = client.get(
+        f"/api/tasks/{task_id}", headers={"Authorization": user_auth[0]}
+    )
+    task = response.get_json()
+    assert task["created_by"] == user_auth[1]
+    assert task["due_date"] == "2025-11-01T09:30:00+00:00"
+    assert task["estimate"] == "1.50"
+
+    # The stdlib fallback produces the same document as orjson
+    doc = {"_id": ObjectId(task_id), "due": datetime(2025, 11, 1, 9, 30)}
+    with app.app_context():
+        encoded = app.json.dumps(doc)
+        orjson_module, json_provider.orjson = json_provider.orjson, None
+        try:
+            assert app.json.loads(app.json.dumps(doc)) == app.json.loads(encoded)
+        finally:
+            json_provider.orjson = orjson_module
+
+
 def test_task_read_forbidden(client, user_auth, get_auth_token_for):
     """User cannot read task assigned to someone else."""
     other_user_token, other_user_id = get_auth_token_for("user", "other")
@@ -209,3 +241,1194 @@ def test_task_list_fsp(client, user_auth):
     assert response_sort_filter.status_code == 200
     assert response_sort_filter.get_json()["pagination"]["total_tasks"] == 1
     assert response_sort_filter.get_json()["tasks"][0]["title"] == "Low Priority Task"
+
+
+def test_task_due_date_stored_as_date_and_filtered(client, user_auth):
+    """Due dates are normalized to BSON dates and filter chronologically."""
+    user_id = user_auth[1]
+    headers = {"Authorization": user_auth[0]}
+
+    response = client.post(
+        "/api/tasks", data={"title": "Dated", "due_date": "2999-10-30"}, headers=headers
+    )
+    assert response.status_code == 201
+    stored = get_task_collection().find_one({"title": "Dated"})
+    assert stored["due_date"] == datetime(2999, 10, 30)
+
+    response = client.post(
+        "/api/tasks", data={"title": "Vague", "due_date": "soon"}, headers=headers
+    )
+    assert response.status_code == 400
+
+    create_task_in_db(user_id, title="Nov 1", due_date=datetime(2999, 11, 1))
+    create_task_in_db(user_id, title="Nov 3", due_date=datetime(2999, 11, 3, 10))
+    create_task_in_db(
+        user_id, title="Done", due_date=datetime(2000, 1, 1), status="Completed"
+    )
+    create_task_in_db(user_id, title="Late", due_date=datetime(2000, 1, 2))
+
+    # A bare date as the maximum includes the whole day
+    response = client.get(
+        "/api/tasks?due_date_min=2999-11-01&due_date_max=2999-11-03&sort=due_date",
+        headers=headers,
+    )
+    assert [task["title"] for task in response.get_json()["tasks"]] == [
+        "Nov 1",
+        "Nov 3",
+    ]
+
+    response = client.get("/api/tasks?overdue=true", headers=headers)
+    assert [task["title"] for task in response.get_json()["tasks"]] == ["Late"]
+
+    response = client.get("/api/tasks?due_date_max=someday", headers=headers)
+    assert response.status_code == 400
+
+
+def test_task_due_date_migration(app, user_auth):
+    """String due dates are converted in batches; unparseable ones are reported."""
+    from src.tasks.migrations import migrate_due_dates
+
+    user_id = user_auth[1]
+    plain = create_task_in_db(user_id, due_date="2025-11-04", version=1)
+    offset = create_task_in_db(user_id, due_date="2025-11-04T10:00:00+02:00")
+    empty = create_task_in_db(user_id, due_date="")
+    invalid = create_task_in_db(user_id, due_date="next week")
+
+    with app.app_context():
+        report = migrate_due_dates(batch_size=2, pause=0)
+
+    assert report["scanned"] == 4
+    assert report["converted"] == 3
+    assert report["invalid_ids"] == [invalid]
+
+    tasks = {str(task["_id"]): task for task in get_task_collection().find()}
+    assert tasks[plain]["due_date"] == datetime(2025, 11, 4)
+    assert tasks[plain]["version"] == 2
+    assert tasks[offset]["due_date"] == datetime(2025, 11, 4, 8)
+    assert tasks[empty]["due_date"] is None
+    assert tasks[invalid]["due_date"] == "next week"
+
+
+def test_task_list_cache_invalidated_by_writes(client, user_auth, admin_auth):
+    """Repeated list calls hit the cache until a write touches the user's tasks."""
+    headers = {"Authorization": user_auth[0]}
+    admin_headers = {"Authorization": admin_auth[0]}
+    create_task_in_db(user_auth[1], title="Cached")
+
+    first = client.get("/api/tasks?status=To Do&limit=5", headers=headers)
+    assert first.headers["X-Cache"] == "MISS"
+    # Parameter order does not matter
+    second = client.get("/api/tasks?limit=5&status=To Do", headers=headers)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json() == first.get_json()
+
+    # An admin write assigning a task to the user invalidates their pages
+    response = client.post(
+        "/api/tasks",
+        data={"title": "New", "assigned_to": user_auth[1]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 201
+
+    third = client.get("/api/tasks?status=To Do&limit=5", headers=headers)
+    assert third.headers["X-Cache"] == "MISS"
+    assert third.get_json()["pagination"]["total_tasks"] == 2
+
+    stats = client.get("/api/tasks/cache/stats", headers=admin_headers).get_json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert client.get("/api/tasks/cache/stats", headers=headers).status_code == 403
+
+
+def test_response_cache_evicts_by_size():
+    """The LRU drops least recently used entries once over its byte budget."""
+    from src.utils.cache import ResponseCache
+
+    cache = ResponseCache()
+    cache.max_bytes, cache.ttl = 100, 60
+    cache.set("a", b"x" * 40)
+    cache.set("b", b"x" * 40)
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.set("c", b"x" * 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 100
+
+
+def test_task_list_cursor_pagination(client, user_auth):
+    """Following next_cursor walks every task exactly once, in sort order."""
+    user_id = user_auth[1]
+    headers = {"Authorization": user_auth[0]}
+    due_dates = ["2025-11-05", "2025-11-04", "2025-11-04", "2025-11-03", "2025-11-02"]
+    for index, due_date in enumerate(due_dates):
+        create_task_in_db(user_id, title=f"Task {index}", due_date=due_date)
+
+    full = client.get("/api/tasks?limit=10", headers=headers).get_json()
+    expected_ids = [task["_id"] for task in full["tasks"]]
+
+    seen_ids = []
+    response = client.get("/api/tasks?limit=2", headers=headers).get_json()
+    seen_ids += [task["_id"] for task in response["tasks"]]
+    while response["pagination"]["next_cursor"]:
+        cursor = response["pagination"]["next_cursor"]
+        response = client.get(
+            f"/api/tasks?limit=2&cursor={cursor}", headers=headers
+        ).get_json()
+        seen_ids += [task["_id"] for task in response["tasks"]]
+
+    assert seen_ids == expected_ids
+    assert response["pagination"]["has_more"] is False
+    # Cursor pages skip the total unless one is asked for
+    assert response["pagination"]["count_mode"] == "none"
+    assert response["pagination"]["total_tasks"] is None
+
+    response = client.get(
+        f"/api/tasks?limit=2&count=exact&cursor={cursor}", headers=headers
+    ).get_json()
+    assert response["pagination"]["count_mode"] == "exact"
+    assert response["pagination"]["total_tasks"] == 5
+
+
+def test_task_list_cursor_pages_unmigrated_string_due_dates(client, user_auth):
+    """Due dates still stored as strings are walked along with real dates."""
+    user_id = user_auth[1]
+    headers = {"Authorization": user_auth[0]}
+    due_dates = ["2025-11-05", datetime(2025, 11, 4), "2025-11-03", None]
+    due_dates += [datetime(2025, 11, 2), "2025-11-01"]
+    for index, due_date in enumerate(due_dates):
+        create_task_in_db(user_id, title=f"Task {index}", due_date=due_date)
+
+    for sort in ("due_date", "-due_date"):
+        url = f"/api/tasks?limit=2&sort={sort}"
+        full = client.get(f"/api/tasks?limit=10&sort={sort}", headers=headers)
+        expected_ids = [task["_id"] for task in full.get_json()["tasks"]]
+        assert len(expected_ids) == len(due_dates)
+
+        page = client.get(url, headers=headers).get_json()
+        seen_ids = [task["_id"] for task in page["tasks"]]
+        while page["pagination"]["next_cursor"]:
+            page = client.get(
+                f"{url}&cursor={page['pagination']['next_cursor']}", headers=headers
+            ).get_json()
+            seen_ids += [task["_id"] for task in page["tasks"]]
+        assert seen_ids == expected_ids
+
+
+def test_task_list_cursor_invalid(client, user_auth):
+    """A malformed cursor or an unsupported sort is rejected."""
+    headers = {"Authorization": user_auth[0]}
+
+    response = client.get("/api/tasks?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/tasks?sort=title&cursor=abc", headers=headers)
+    assert response.status_code == 400
+
+    # Without a cursor any sort is accepted, indexed or not
+    for sort in ("title", "priority,due_date", "-created_at", ""):
+        response = client.get(f"/api/tasks?sort={sort}", headers=headers)
+        assert response.status_code == 200
+
+
+def test_task_list_search_ranks_and_pages_by_score(
+    client, user_auth, get_auth_token_for
+):
+    """q= matches title/description, ranks title hits first and pages by score."""
+    headers = {"Authorization": user_auth[0]}
+    _, other_id = get_auth_token_for("user", "other")
+    create_task_in_db(user_auth[1], title="Invoice review", description="Quarterly")
+    create_task_in_db(user_auth[1], title="Budget", description="Attach the invoice")
+    create_task_in_db(user_auth[1], title="Invoice archive", status="Completed")
+    create_task_in_db(user_auth[1], title="Unrelated", description="Nothing here")
+    create_task_in_db(other_id, title="Invoice for someone else")
+
+    response = client.get("/api/tasks?q=invoice&limit=10", headers=headers)
+    assert response.status_code == 200
+    tasks = response.get_json()["tasks"]
+    # Visibility still applies; the description-only match ranks last
+    assert len(tasks) == 3
+    assert tasks[-1]["title"] == "Budget"
+    assert tasks[0]["score"] >= tasks[1]["score"] > tasks[2]["score"]
+
+    # Filters combine with the search
+    response = client.get("/api/tasks?q=invoice&status=Completed", headers=headers)
+    assert [t["title"] for t in response.get_json()["tasks"]] == ["Invoice archive"]
+
+    # Keyset pagination over the score walks the same ranking
+    seen = []
+    url = "/api/tasks?q=invoice&limit=1&count=none"
+    page = client.get(url, headers=headers).get_json()
+    seen += [task["_id"] for task in page["tasks"]]
+    while page["pagination"]["next_cursor"]:
+        page = client.get(
+            f"{url}&cursor={page['pagination']['next_cursor']}", headers=headers
+        ).get_json()
+        seen += [task["_id"] for task in page["tasks"]]
+    assert seen == [task["_id"] for task in tasks]
+
+
+def test_task_list_search_invalid(client, user_auth):
+    """Over-long searches and score sorts without a search are rejected."""
+    headers = {"Authorization": user_auth[0]}
+
+    response = client.get(f"/api/tasks?q={'x' * 201}", headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/tasks?sort=-score", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("count_mode", ["exact", "estimate", "none"])
+def test_task_list_count_modes(client, user_auth, count_mode):
+    """Every count mode returns the page and reports which mode was used."""
+    for index in range(3):
+        create_task_in_db(user_auth[1], title=f"Task {index}")
+
+    response = client.get(
+        f"/api/tasks?limit=2&count={count_mode}",
+        headers={"Authorization": user_auth[0]},
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["tasks"]) == 2
+    assert data["pagination"]["count_mode"] == count_mode
+    assert data["pagination"]["has_more"] is True
+    if count_mode == "none":
+        assert data["pagination"]["total_tasks"] is None
+    else:
+        assert data["pagination"]["total_tasks"] == 3
+
+
+def test_task_list_invalid_count_mode(client, user_auth):
+    response = client.get(
+        "/api/tasks?count=sometimes", headers={"Authorization": user_auth[0]}
+    )
+    assert response.status_code == 400
+
+
+def test_task_list_fields_projection(client, user_auth):
+    """Only the requested fields (plus _id) are returned."""
+    create_task_in_db(user_auth[1], title="Board Task", status="In Progress")
+    headers = {"Authorization": user_auth[0]}
+
+    response = client.get("/api/tasks?fields=title,status", headers=headers)
+    assert response.status_code == 200
+    task = response.get_json()["tasks"][0]
+    assert set(task) == {"_id", "title", "status"}
+
+    response = client.get("/api/tasks?fields=filepath", headers=headers)
+    assert response.status_code == 400
+
+
+def test_task_read_fields_projection(client, user_auth):
+    """get_task honours fields= and never exposes attachment filepaths."""
+    doc_meta = {
+        "original_name": "a.pdf",
+        "stored_name": "x_a.pdf",
+        "filepath": "/srv/uploads/x_a.pdf",
+        "mime_type": "application/pdf",
+        "size_bytes": 1,
+    }
+    task_id = create_task_in_db(user_auth[1], attached_documents=[doc_meta])
+
+    response = client.get(
+        f"/api/tasks/{task_id}?fields=title,attached_documents",
+        headers={"Authorization": user_auth[0]},
+    )
+    assert response.status_code == 200
+    task = response.get_json()
+    assert set(task) == {"_id", "title", "attached_documents"}
+    assert "filepath" not in task["attached_documents"][0]
+
+
+def test_task_etag_conditional_get_and_if_match(client, user_auth):
+    """Versions back ETags: 304 for unchanged polls, 412 for stale updates."""
+    headers = {"Authorization": user_auth[0]}
+    task_id = create_task_in_db(user_auth[1])  # Pre-versioning doc: version 0
+
+    response = client.get(f"/api/tasks/{task_id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag == f'W/"{task_id}-0"'
+
+    response = client.get(
+        f"/api/tasks/{task_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+
+    response = client.put(
+        f"/api/tasks/{task_id}",
+        json={"status": "In Progress"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'W/"{task_id}-1"'
+
+    # A writer still holding the old ETag loses
+    response = client.put(
+        f"/api/tasks/{task_id}",
+        json={"status": "Completed"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 412
+    assert get_task_collection().find_one({"_id": ObjectId(task_id)})["status"] == (
+        "In Progress"
+    )
+
+    # The old ETag no longer matches, so the full task comes back
+    response = client.get(
+        f"/api/tasks/{task_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'W/"{task_id}-1"'
+    assert response.get_json()["version"] == 1
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_task_export_streams_visible_tasks(
+    client, user_auth, get_auth_token_for, export_format
+):
+    """Export returns every visible task matching the filters, one per line."""
+    for index in range(3):
+        create_task_in_db(user_auth[1], title=f"Mine {index}", status="To Do")
+    create_task_in_db(user_auth[1], title="Mine done", status="Completed")
+    _, other_user_id = get_auth_token_for("user", "other")
+    create_task_in_db(other_user_id, title="Not mine")
+
+    response = client.get(
+        f"/api/tasks/export?format={export_format}&status=To Do",
+        headers={"Authorization": user_auth[0]},
+    )
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).strip().splitlines()
+
+    if export_format == "ndjson":
+        rows = [json.loads(line) for line in lines]
+    else:
+        header = lines[0].split(",")
+        rows = [dict(zip(header, line.split(","))) for line in lines[1:]]
+    assert sorted(row["title"] for row in rows) == ["Mine 0", "Mine 1", "Mine 2"]
+    # Dates read as in the REST and SSE payloads
+    assert {row["due_date"] for row in rows} == {"2025-11-01T00:00:00+00:00"}
+
+
+def test_task_export_invalid_format(client, user_auth):
+    response = client.get(
+        "/api/tasks/export?format=xml", headers={"Authorization": user_auth[0]}
+    )
+    assert response.status_code == 400
+
+
+def test_task_bulk_mixed_operations(client, user_auth, get_auth_token_for):
+    """Creates, updates and deletes run in one batch with per-item results."""
+    headers = {"Authorization": user_auth[0]}
+    own_task = create_task_in_db(user_auth[1], title="Old title")
+    doomed_task = create_task_in_db(user_auth[1])
+    _, other_user_id = get_auth_token_for("user", "other")
+    foreign_task = create_task_in_db(other_user_id)
+
+    operations = [
+        {"op": "create", "task": {"title": "Bulk created", "priority": "High"}},
+        {"op": "update", "task_id": own_task, "task": {"title": "New title"}},
+        {"op": "delete", "task_id": doomed_task},
+        {"op": "delete", "task_id": foreign_task},
+        {"op": "create", "task": {}},
+    ]
+    response = client.post(
+        "/api/tasks/bulk?ordered=false", json=operations, headers=headers
+    )
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [201, 200, 204, 403, 400]
+
+    tasks = get_task_collection()
+    assert tasks.find_one({"_id": ObjectId(results[0]["task_id"])})["title"] == (
+        "Bulk created"
+    )
+    assert tasks.find_one({"_id": ObjectId(own_task)})["title"] == "New title"
+    assert tasks.find_one({"_id": ObjectId(doomed_task)}) is None
+    assert tasks.find_one({"_id": ObjectId(foreign_task)}) is not None
+
+
+def test_task_bulk_ordered_stops_at_first_failure(client, user_auth):
+    headers = {"Authorization": user_auth[0]}
+    operations = [
+        {"op": "create", "task": {"title": "First"}},
+        {"op": "update", "task_id": str(ObjectId()), "task": {"title": "x"}},
+        {"op": "create", "task": {"title": "Never written"}},
+    ]
+    response = client.post("/api/tasks/bulk", json=operations, headers=headers)
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [201, 404, 424]
+    assert get_task_collection().find_one({"title": "Never written"}) is None
+
+
+def test_task_bulk_items_whose_task_was_deleted_meanwhile_are_not_found(
+    app, user_auth
+):
+    """Updates/deletes that matched nothing get 404 and no side effects."""
+    from src.tasks.services import run_task_bulk
+    from src.tasks.stats import read_task_stats
+
+    updated = create_task_in_db(user_auth[1], title="Raced update")
+    deleted = create_task_in_db(user_auth[1], title="Raced delete")
+    tasks = get_task_collection()
+
+    def delete_first(task):
+        # Another request deletes the task after the authorization lookup
+        tasks.delete_one({"_id": task["_id"]})
+        return True
+
+    with app.app_context():
+        results, deleted_tasks = run_task_bulk(
+            [
+                {"op": "update", "task_id": updated, "task": {"title": "New"}},
+                {"op": "delete", "task_id": deleted},
+                {"op": "create", "task": {"title": "After"}},
+            ],
+            ordered=True,
+            user_id=user_auth[1],
+            can_modify=delete_first,
+        )
+        stats = read_task_stats()
+
+    assert [result["status"] for result in results] == [404, 404, 201]
+    assert deleted_tasks == []
+    # Only the create was counted
+    assert stats["total"] == 1
+
+
+def test_task_import_csv(client, admin_auth, user_auth, app):
+    """CSV rows are validated, assignees resolved by email, and inserted."""
+    csv_content = (
+        "title,status,priority,assignee\n"
+        "Imported one,In Progress,High,test_usertaskuser@example.com\n"
+        "Imported two,,,\n"
+        ",To Do,Low,\n"
+        "Bad status,Someday,Low,\n"
+        "Unknown assignee,To Do,Low,nobody@example.com\n"
+    ).encode()
+
+    response = client.post(
+        "/api/tasks/import",
+        data={"file": (BytesIO(csv_content), "backlog.csv")},
+        content_type="multipart/form-data",
+        headers={"Authorization": admin_auth[0]},
+    )
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["rows_processed"] == 5
+    assert report["inserted"] == 2
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+
+    imported = get_task_collection().find_one({"title": "Imported one"})
+    assert str(imported["assigned_to"]) == user_auth[1]
+
+
+def test_task_import_matches_assignee_email_case_insensitively(
+    client, admin_auth, user_auth
+):
+    """Assignee emails match whatever their case; legacy users match exactly."""
+    from src.auth.models import get_user_collection
+
+    # Registered before email_lower was stored
+    legacy_id = get_user_collection().insert_one(
+        {"email": "Legacy.User@Example.com", "password": "x", "role": "user"}
+    ).inserted_id
+    csv_content = (
+        "title,assignee\n"
+        "Shouting,TEST_USERTASKUSER@EXAMPLE.COM\n"
+        "Exact,test_usertaskuser@example.com\n"
+        "Legacy,Legacy.User@Example.com\n"
+    ).encode()
+
+    response = client.post(
+        "/api/tasks/import",
+        data={"file": (BytesIO(csv_content), "backlog.csv")},
+        content_type="multipart/form-data",
+        headers={"Authorization": admin_auth[0]},
+    )
+    report = response.get_json()
+    assert report["errors"] == []
+    assert report["inserted"] == 3
+
+    assignees = {
+        task["title"]: str(task["assigned_to"]) for task in get_task_collection().find()
+    }
+    assert assignees == {
+        "Shouting": user_auth[1],
+        "Exact": user_auth[1],
+        "Legacy": str(legacy_id),
+    }
+
+
+def test_task_import_reports_non_string_ndjson_values(client, admin_auth):
+    """Numbers or objects where text belongs fail their row, not the import."""
+    ndjson = "\n".join(
+        json.dumps(row)
+        for row in (
+            {"title": 123},
+            {"title": "Numeric assignee", "assignee": 5},
+            {"title": "Odd status", "status": ["To Do"]},
+            {"title": "Fine"},
+        )
+    ).encode()
+
+    response = client.post(
+        "/api/tasks/import",
+        data={"file": (BytesIO(ndjson), "backlog.ndjson")},
+        content_type="multipart/form-data",
+        headers={"Authorization": admin_auth[0]},
+    )
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["inserted"] == 1
+    assert [error["row"] for error in report["errors"]] == [1, 2, 3]
+
+
+def test_task_import_rejects_malformed_and_unknown_job_ids(client, admin_auth):
+    """A malformed job id is a bad request; a well-formed unknown one is 404."""
+    for job_id, status_code in (("not-an-id", 400), (str(ObjectId()), 404)):
+        response = client.post(
+            "/api/tasks/import",
+            data={"file": (BytesIO(b"title\nx\n"), "a.csv"), "job_id": job_id},
+            content_type="multipart/form-data",
+            headers={"Authorization": admin_auth[0]},
+        )
+        assert response.status_code == status_code
+
+
+def test_task_import_resume_skips_committed_rows(admin_auth, app):
+    """Re-running a job does not insert rows twice."""
+    from src.tasks.importer import TaskImporter, iter_import_rows
+    from io import StringIO
+
+    ndjson = "\n".join(json.dumps({"title": f"Row {n}"}) for n in range(5))
+    with app.app_context():
+        importer = TaskImporter(created_by=admin_auth[1], batch_size=2)
+        importer.run(iter_import_rows(StringIO(ndjson), "ndjson"))
+        job_id = importer.job["_id"]
+
+        # Simulate a crash before progress was recorded for the last batches
+        from src.tasks.models import get_import_job_collection
+
+        get_import_job_collection().update_one(
+            {"_id": job_id}, {"$set": {"rows_committed": 2}}
+        )
+        resumed = TaskImporter(created_by=admin_auth[1], job_id=job_id, batch_size=2)
+        report = resumed.run(iter_import_rows(StringIO(ndjson), "ndjson"))
+
+    assert report["rows_processed"] == 5
+    assert get_task_collection().count_documents({"title": {"$regex": "^Row "}}) == 5
+
+
+def test_task_attachments_are_deduplicated(client, user_auth, task_data, app):
+    """The same upload on two tasks is stored once and freed with its last task."""
+    headers = {"Authorization": user_auth[0]}
+    file_content = b"%PDF-1.4\nshared content"
+
+    task_ids = []
+    for _ in range(2):
+        file = FileStorage(
+            stream=BytesIO(file_content),
+            filename="shared.pdf",
+            content_type="application/pdf",
+        )
+        response = client.post(
+            "/api/tasks",
+            data={**task_data, "documents": [file]},
+            content_type="multipart/form-data",
+            headers=headers,
+        )
+        assert response.status_code == 201
+        task_ids.append(response.get_json()["task_id"])
+
+    tasks = get_task_collection()
+    docs = [
+        tasks.find_one({"_id": ObjectId(task_id)})["attached_documents"][0]
+        for task_id in task_ids
+    ]
+    assert docs[0]["filepath"] == docs[1]["filepath"]
+    assert docs[0]["stored_name"] != docs[1]["stored_name"]
+    assert docs[0]["size_bytes"] == len(file_content)
+
+    client.delete(f"/api/tasks/{task_ids[0]}", headers=headers)
+    with app.app_context():
+        reap_pending()
+    assert os.path.exists(docs[0]["filepath"])
+
+    client.delete(f"/api/tasks/{task_ids[1]}", headers=headers)
+    with app.app_context():
+        reap_pending()
+    assert not os.path.exists(docs[0]["filepath"])
+
+
+def test_task_create_failure_releases_stored_attachments(
+    client, user_auth, task_data, monkeypatch
+):
+    """A task that is never inserted gives its blob references back."""
+    from pymongo.errors import PyMongoError
+    from src.tasks import controllers
+    from src.utils.file_handler import get_blob_collection
+
+    tasks = get_task_collection()
+
+    class FailingInsert:
+        """The tasks collection, with inserts failing."""
+
+        def __getattr__(self, name):
+            return getattr(tasks, name)
+
+        def insert_one(self, document):
+            raise PyMongoError("insert failed")
+
+    monkeypatch.setattr(controllers, "TaskCollection", FailingInsert())
+    file = FileStorage(
+        stream=BytesIO(b"%PDF-1.4\nlost"),
+        filename="lost.pdf",
+        content_type="application/pdf",
+    )
+    with pytest.raises(PyMongoError):
+        client.post(
+            "/api/tasks",
+            data={**task_data, "documents": [file]},
+            content_type="multipart/form-data",
+            headers={"Authorization": user_auth[0]},
+        )
+
+    assert get_blob_collection().count_documents({}) == 0
+
+
+def upload_single_pdf(client, headers, task_data, content):
+    """Creates a task with one PDF attachment and returns its metadata."""
+    file = FileStorage(
+        stream=BytesIO(content), filename="doc.pdf", content_type="application/pdf"
+    )
+    response = client.post(
+        "/api/tasks",
+        data={**task_data, "documents": [file]},
+        content_type="multipart/form-data",
+        headers=headers,
+    )
+    task_id = response.get_json()["task_id"]
+    task = get_task_collection().find_one({"_id": ObjectId(task_id)})
+    return task_id, task["attached_documents"][0]
+
+
+def test_task_download_conditional_and_ranges(client, user_auth, task_data):
+    """Downloads carry a content-hash ETag and honour 304 and byte ranges."""
+    headers = {"Authorization": user_auth[0]}
+    content = b"0123456789abcdefghij"
+    task_id, doc = upload_single_pdf(client, headers, task_data, content)
+    url = f"/api/tasks/{task_id}/documents/{doc['stored_name']}"
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{doc["sha256"]}"'
+    assert "Last-Modified" in response.headers
+    response.close()
+
+    response = client.get(
+        url, headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+    response = client.get(url, headers={**headers, "Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.data == b"2345"
+    response.close()
+
+    response = client.get(url, headers={**headers, "Range": "bytes=0-1,-3"})
+    assert response.status_code == 206
+    assert response.mimetype == "multipart/byteranges"
+    body = response.data
+    assert b"Content-Range: bytes 0-1/20\r\n\r\n01" in body
+    assert b"Content-Range: bytes 17-19/20\r\n\r\nhij" in body
+    assert len(body) == response.content_length
+
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+
+
+@pytest.fixture
+def document_delivery(app):
+    """Temporarily switches DOCUMENT_DELIVERY for one test."""
+    original = app.config["DOCUMENT_DELIVERY"]
+
+    def _set(mode):
+        app.config["DOCUMENT_DELIVERY"] = mode
+
+    yield _set
+    app.config["DOCUMENT_DELIVERY"] = original
+
+
+def test_task_download_x_accel_redirect(
+    client, user_auth, task_data, document_delivery
+):
+    """In x-accel mode Flask only authorizes and points nginx at the file."""
+    headers = {"Authorization": user_auth[0]}
+    task_id, doc = upload_single_pdf(client, headers, task_data, b"%PDF-1.4 x")
+    document_delivery("x-accel")
+
+    response = client.get(
+        f"/api/tasks/{task_id}/documents/{doc['stored_name']}", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.data == b""
+    sha = doc["sha256"]
+    assert response.headers["X-Accel-Redirect"] == (
+        f"/protected-uploads/blobs/{sha[:2]}/{sha[2:4]}/{sha}"
+    )
+
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+
+
+def test_task_download_signed_url(client, user_auth, task_data, document_delivery):
+    """In signed-url mode the client is redirected to an nginx secure_link URL."""
+    import base64
+    import hashlib
+    from urllib.parse import parse_qs, urlparse
+
+    headers = {"Authorization": user_auth[0]}
+    task_id, doc = upload_single_pdf(client, headers, task_data, b"%PDF-1.4 y")
+    document_delivery("signed-url")
+
+    response = client.get(
+        f"/api/tasks/{task_id}/documents/{doc['stored_name']}", headers=headers
+    )
+    assert response.status_code == 302
+    url = urlparse(response.headers["Location"])
+    query = parse_qs(url.query)
+    secret = client.application.config["SIGNED_URL_SECRET"]
+    expected = base64.urlsafe_b64encode(
+        hashlib.md5(f"{query['expires'][0]}{url.path} {secret}".encode()).digest()
+    ).rstrip(b"=")
+    assert query["md5"][0] == expected.decode()
+
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+
+
+def test_task_delete_defers_file_removal_to_reaper(
+    client, user_auth, task_data, app
+):
+    """delete_task only queues files; the reaper removes them later."""
+    headers = {"Authorization": user_auth[0]}
+    task_id, doc = upload_single_pdf(client, headers, task_data, b"%PDF-1.4 z")
+
+    response = client.delete(f"/api/tasks/{task_id}", headers=headers)
+    assert response.status_code == 204
+    assert os.path.exists(doc["filepath"])
+    assert get_file_outbox_collection().count_documents({}) == 1
+
+    with app.app_context():
+        assert reap_pending() == 1
+    assert not os.path.exists(doc["filepath"])
+    assert get_file_outbox_collection().count_documents({}) == 0
+
+
+def test_reaper_retry_never_releases_an_attachment_twice(app, monkeypatch):
+    """A stale claim of a record only releases what is still queued."""
+    from src.utils import reaper
+
+    released = []
+    failing = {"b.pdf"}
+
+    def release(doc):
+        if doc["stored_name"] in failing:
+            raise OSError("disk busy")
+        released.append(doc["stored_name"])
+
+    monkeypatch.setattr(reaper, "release_attachment", release)
+    with app.app_context():
+        reaper.enqueue_attachment_release(
+            [{"stored_name": "a.pdf"}, {"stored_name": "b.pdf"}], reason="test"
+        )
+        record = get_file_outbox_collection().find_one()
+
+        assert reaper._reap_record(record, max_attempts=8) is False
+        assert released == ["a.pdf"]
+        # The failed release stays queued for the retry
+        retry = get_file_outbox_collection().find_one()
+        assert [doc["stored_name"] for doc in retry["attachments"]] == ["b.pdf"]
+
+        # A worker still holding the original snapshot skips a.pdf
+        failing.clear()
+        assert reaper._reap_record(record, max_attempts=8) is True
+        assert released == ["a.pdf", "b.pdf"]
+        assert get_file_outbox_collection().count_documents({}) == 0
+
+
+def test_upload_gc_removes_only_old_orphans(app, user_auth, tmp_path):
+    """Unreferenced files past the grace period go; everything else stays."""
+    from src.utils.file_handler import get_blob_collection
+    from src.utils.upload_gc import collect_upload_garbage
+
+    def write(relative_path, size, age):
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+        mtime = path.stat().st_mtime - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    live_hash, orphan_hash = "ab" * 32, "cd" * 32
+    live_blob = write(f"blobs/ab/ab/{live_hash}", 10, age=7200)
+    orphan_blob = write(f"blobs/cd/cd/{orphan_hash}", 100, age=7200)
+    trash = write(f"blobs/cd/cd/{orphan_hash}.deleting-1f2e", 50, age=7200)
+    legacy = write("abc_legacy.pdf", 10, age=7200)
+    legacy_orphan = write("def_gone.pdf", 1000, age=7200)
+    partial = write("tmp/upload-x1y2", 5, age=7200)
+    fresh_orphan = write("ghi_new.pdf", 10, age=0)
+
+    get_blob_collection().insert_one({"_id": live_hash, "refcount": 1})
+    create_task_in_db(
+        user_auth[1],
+        attached_documents=[
+            {"stored_name": "x_a.pdf", "sha256": live_hash},
+            {"stored_name": "abc_legacy.pdf", "filepath": str(legacy)},
+        ],
+    )
+
+    with app.app_context():
+        dry_run = collect_upload_garbage(
+            str(tmp_path), grace_period=3600, max_uploads=3, dry_run=True
+        )
+        assert dry_run["orphans"] == 4 and dry_run["deleted"] == 0
+        assert orphan_blob.exists()
+
+        report = collect_upload_garbage(
+            str(tmp_path), grace_period=3600, max_uploads=3
+        )
+
+    assert report["scanned"] == 7
+    assert report["deleted"] == 4
+    assert report["bytes_reclaimed"] == 100 + 50 + 1000 + 5
+    assert report["recent"] == 1
+    assert live_blob.exists() and legacy.exists() and fresh_orphan.exists()
+    for path in (orphan_blob, trash, legacy_orphan, partial):
+        assert not path.exists()
+
+
+def test_upload_gc_restores_a_blob_referenced_during_removal(app, tmp_path):
+    """A blob re-referenced while the GC removes it is put back, not deleted."""
+    from src.utils import upload_gc
+    from src.utils.file_handler import get_blob_collection
+
+    sha = "ef" * 32
+    path = tmp_path / sha
+    path.write_bytes(b"%PDF-1.4 shared")
+
+    with app.app_context():
+        # An upload took a reference after the orphan check
+        get_blob_collection().insert_one({"_id": sha, "refcount": 1})
+        assert upload_gc._remove_blob(str(path), sha) is False
+        assert path.read_bytes() == b"%PDF-1.4 shared"
+
+        get_blob_collection().delete_one({"_id": sha})
+        assert upload_gc._remove_blob(str(path), sha) is True
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_gc_settles_trash_copies_of_referenced_blobs(app, tmp_path):
+    """A crash mid-release leaves a .deleting- copy: dropped, or put back if alone."""
+    from src.utils.file_handler import get_blob_collection
+    from src.utils.upload_gc import collect_upload_garbage
+
+    kept_hash, lost_hash = "ab" * 32, "cd" * 32
+    kept = tmp_path / "blobs" / "ab" / "ab" / kept_hash
+    lost = tmp_path / "blobs" / "cd" / "cd" / lost_hash
+    for path in (kept, lost):
+        path.parent.mkdir(parents=True)
+    kept.write_bytes(b"kept")
+    kept_trash = kept.with_name(f"{kept_hash}.deleting-1a2b")
+    kept_trash.write_bytes(b"kept")
+    lost_trash = lost.with_name(f"{lost_hash}.deleting-3c4d")
+    lost_trash.write_bytes(b"lost")
+    for path in (kept, kept_trash, lost_trash):
+        mtime = path.stat().st_mtime - 7200
+        os.utime(path, (mtime, mtime))
+
+    with app.app_context():
+        get_blob_collection().insert_many(
+            [{"_id": kept_hash, "refcount": 1}, {"_id": lost_hash, "refcount": 1}]
+        )
+        report = collect_upload_garbage(
+            str(tmp_path), grace_period=3600, max_uploads=3
+        )
+
+    assert report["deleted"] == 1 and report["restored"] == 1
+    assert not kept_trash.exists() and kept.read_bytes() == b"kept"
+    assert not lost_trash.exists() and lost.read_bytes() == b"lost"
+
+
+def make_change(operation, task_id, token, after=None, before=None):
+    """A change stream document as delivered with pre/post images."""
+    change = {
+        "_id": {"_data": token},
+        "operationType": operation,
+        "documentKey": {"_id": task_id},
+    }
+    if after is not None:
+        change["fullDocument"] = after
+    if before is not None:
+        change["fullDocumentBeforeChange"] = before
+    return change
+
+
+def test_task_events_follow_visibility_rules(app):
+    """The hub delivers each change only to the users allowed to see the task."""
+    from src.tasks.events import TaskChangeHub, task_event_from_change
+
+    hub = TaskChangeHub(app)
+    user_a, user_b = ObjectId(), ObjectId()
+    sub_a, _ = hub.subscribe(str(user_a), False)
+    sub_b, _ = hub.subscribe(str(user_b), False)
+    sub_admin, _ = hub.subscribe(str(ObjectId()), True)
+
+    task = {"_id": ObjectId(), "title": "Live", "assigned_to": user_a}
+    hub.dispatch(
+        task_event_from_change(make_change("insert", task["_id"], "01", task))
+    )
+    moved = {**task, "assigned_to": user_b}
+    hub.dispatch(
+        task_event_from_change(
+            make_change("update", task["_id"], "02", moved, before=task)
+        )
+    )
+
+    def drain(subscriber):
+        messages = []
+        while not subscriber.queue.empty():
+            event_id, event_type, data = subscriber.queue.get_nowait()
+            messages.append((event_id, event_type, data["_id"]))
+        return messages
+
+    task_id = str(task["_id"])
+    # Reassigned away from A: A is told the task is gone from their view
+    assert drain(sub_a) == [("01", "created", task_id), ("02", "deleted", task_id)]
+    assert drain(sub_b) == [("02", "updated", task_id)]
+    assert [m[1] for m in drain(sub_admin)] == ["created", "updated"]
+
+    # Reconnects replay from the buffer, or ask for a refetch when too old
+    _, replay = hub.subscribe(str(user_b), False, last_event_id="01")
+    assert [(event_id, event_type) for event_id, event_type, _ in replay] == [
+        ("02", "updated")
+    ]
+    _, replay = hub.subscribe(str(user_b), False, last_event_id="unknown")
+    assert replay is None
+
+
+def test_task_stream_endpoint_pushes_events(client, user_auth, app):
+    """GET /api/tasks/stream authenticates via ?jwt= and streams SSE messages."""
+    from src.tasks.events import TaskChangeHub, task_event_from_change
+
+    hub = TaskChangeHub(app)
+    app.extensions["task_events"] = hub
+    try:
+        token = user_auth[0].split()[1]
+        response = client.get(f"/api/tasks/stream?jwt={token}", buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+
+        task = {
+            "_id": ObjectId(),
+            "title": "Pushed",
+            "due_date": datetime(2025, 11, 1, 9, 30),
+            "assigned_to": ObjectId(user_auth[1]),
+        }
+        hub.dispatch(
+            task_event_from_change(make_change("insert", task["_id"], "07", task))
+        )
+
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b"retry:")
+        message = next(chunks).decode()
+        assert "id: 07\nevent: created\n" in message
+        assert '"title": "Pushed"' in message
+        # Dates are ISO 8601, as in the REST responses
+        assert '"due_date": "2025-11-01T09:30:00+00:00"' in message
+        response.close()
+    finally:
+        app.extensions.pop("task_events")
+
+    assert client.get(
+        "/api/tasks/stream", headers={"Authorization": user_auth[0]}
+    ).status_code == 503
+
+    # Long-lived streams stay out of the request metrics
+    from prometheus_client import REGISTRY
+
+    labels = {"method": "GET", "endpoint": "tasks.stream_task_events"}
+    assert REGISTRY.get_sample_value("http_requests_in_progress", labels) is None
+
+
+def test_task_stats_follow_writes(client, user_auth, admin_auth):
+    """Counters change with every create/update/delete; overdue counts open tasks."""
+    headers = {"Authorization": user_auth[0]}
+    admin_headers = {"Authorization": admin_auth[0]}
+
+    past = client.post(
+        "/api/tasks",
+        data={"title": "Late", "priority": "High", "due_date": "2000-01-01"},
+        headers=headers,
+    ).get_json()["task_id"]
+    client.post(
+        "/api/tasks", data={"title": "Later", "due_date": "2999-01-01"}, headers=headers
+    )
+
+    stats = client.get("/api/tasks/stats", headers=admin_headers).get_json()
+    assert stats["total"] == 2
+    assert stats["by_status"] == {"To Do": 2}
+    assert stats["by_priority"] == {"High": 1, "Low": 1}
+    assert stats["by_assignee"] == {user_auth[1]: 2}
+    assert stats["overdue"] == 1
+
+    # Completing the late task clears it from overdue
+    client.put(f"/api/tasks/{past}", json={"status": "Completed"}, headers=headers)
+    stats = client.get("/api/tasks/stats", headers=admin_headers).get_json()
+    assert stats["by_status"] == {"To Do": 1, "Completed": 1}
+    assert stats["overdue"] == 0
+
+    client.delete(f"/api/tasks/{past}", headers=headers)
+    stats = client.get("/api/tasks/stats", headers=admin_headers).get_json()
+    assert stats["total"] == 1
+    assert stats["by_status"] == {"To Do": 1}
+
+    assert client.get("/api/tasks/stats", headers=headers).status_code == 403
+
+
+def test_task_stats_overdue_matches_the_overdue_filter(
+    client, user_auth, admin_auth, monkeypatch
+):
+    """Tasks due earlier today are overdue in the stats as in ?overdue=true."""
+    from datetime import timedelta
+    from src import task_list_cache
+    from src.tasks import stats
+    from src.utils import fsp_parser
+
+    headers = {"Authorization": user_auth[0]}
+    now = datetime(2030, 6, 15, 12, 0)
+    for title, due_date in (
+        ("Yesterday", now - timedelta(days=1)),
+        ("This morning", now - timedelta(hours=3)),
+        ("Tonight", now + timedelta(hours=3)),
+    ):
+        client.post(
+            "/api/tasks",
+            data={"title": title, "due_date": due_date.isoformat()},
+            headers=headers,
+        )
+
+    admin_headers = {"Authorization": admin_auth[0]}
+    for clock, overdue in ((now, 2), (now - timedelta(hours=6), 1)):
+        monkeypatch.setattr(stats, "utcnow", lambda: clock)
+        monkeypatch.setattr(fsp_parser, "utcnow", lambda: clock)
+        task_list_cache.clear()  # Cached pages don't know the clock moved
+        listed = client.get("/api/tasks?overdue=true", headers=headers)
+        assert listed.get_json()["pagination"]["total_tasks"] == overdue
+        counted = client.get("/api/tasks/stats", headers=admin_headers)
+        assert counted.get_json()["overdue"] == overdue
+
+
+def test_task_stats_rebuild_reports_and_fixes_drift(app, user_auth):
+    """Writes that bypass the API show up as drift and are corrected."""
+    from src.tasks.stats import read_task_stats, rebuild_task_stats
+
+    create_task_in_db(user_auth[1], status="In Progress")
+
+    with app.app_context():
+        drift = rebuild_task_stats(apply=False)
+        assert drift["total:all"] == (0, 1)
+        assert drift["status:In Progress"] == (0, 1)
+        assert read_task_stats()["total"] == 0
+
+        rebuild_task_stats()
+        assert rebuild_task_stats(apply=False) == {}
+        assert read_task_stats()["by_status"] == {"In Progress": 1}
+
+
+def test_metrics_endpoint_reports_request_latency(client, user_auth):
+    """Each request is timed under its endpoint; /metrics serves Prometheus text."""
+    from prometheus_client import REGISTRY
+
+    labels = {"method": "GET", "endpoint": "tasks.list_tasks", "status": "200"}
+    before = (
+        REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+    )
+
+    headers = {"Authorization": user_auth[0]}
+    assert client.get("/api/tasks", headers=headers).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert (
+        REGISTRY.get_sample_value("http_request_duration_seconds_count", labels)
+        == before + 1
+    )
+    # The request is over, so nothing is left in flight
+    assert (
+        REGISTRY.get_sample_value(
+            "http_requests_in_progress",
+            {"method": "GET", "endpoint": "tasks.list_tasks"},
+        )
+        == 0
+    )
+
+
+def test_mongo_command_listener_records_collection_durations():
+    """Replies are matched to their started event to label them by collection."""
+    from types import SimpleNamespace
+    from prometheus_client import REGISTRY
+    from src.utils.metrics import MongoCommandMetrics
+
+    def sample(name, command):
+        labels = {"command": command, "collection": "tasks"}
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    listener = MongoCommandMetrics()
+    before = sample("mongodb_command_duration_seconds_count", "getMore")
+    failures = sample("mongodb_command_failures_total", "find")
+
+    connection = ("localhost", 27017)
+    listener.started(
+        SimpleNamespace(
+            command={"getMore": 12345, "collection": "tasks"},
+            command_name="getMore",
+            connection_id=connection,
+            request_id=1,
+        )
+    )
+    listener.started(
+        SimpleNamespace(
+            command={"find": "tasks", "filter": {}},
+            command_name="find",
+            connection_id=connection,
+            request_id=2,
+        )
+    )
+    listener.succeeded(
+        SimpleNamespace(
+            command_name="getMore",
+            connection_id=connection,
+            request_id=1,
+            duration_micros=1500,
+        )
+    )
+    listener.failed(
+        SimpleNamespace(
+            command_name="find",
+            connection_id=connection,
+            request_id=2,
+            duration_micros=300,
+        )
+    )
+
+    assert sample("mongodb_command_duration_seconds_count", "getMore") == before + 1
+    assert sample("mongodb_command_failures_total", "find") == failures + 1
+    assert listener._collections == {}
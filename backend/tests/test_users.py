@@ -53,6 +53,45 @@ def test_user_list_admin_success(client, get_auth_token_for, create_test_user):
     assert all("_id" in user for user in data)
 
 
+def test_user_list_pages_with_cursor_and_filters(
+    client, get_auth_token_for, create_test_user
+):
+    """The list is bounded; cursors walk it in email order, filters narrow it."""
+    admin_token, _ = get_auth_token_for("admin")
+    headers = {"Authorization": admin_token}
+    for email in ("Carol@Test.com", "alice@test.com", "bob@test.com", "dave@other.com"):
+        create_test_user(email=email)
+    create_test_user(role="admin", email="Alex@test.com")
+
+    seen = []
+    url = "/api/users?limit=2"
+    while url:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= 2
+        assert all("password" not in user for user in page)
+        seen += [user["email"] for user in page]
+        cursor = response.headers.get("X-Next-Cursor")
+        assert (cursor is None) == ("Link" not in response.headers)
+        url = f"/api/users?limit=2&cursor={cursor}" if cursor else None
+
+    assert seen == sorted(seen, key=str.lower)
+    assert len(seen) == 6  # Including the admin making the requests
+
+    response = client.get("/api/users?email_prefix=A", headers=headers)
+    assert [user["email"] for user in response.get_json()] == [
+        "Alex@test.com",
+        "alice@test.com",
+    ]
+
+    response = client.get("/api/users?role=admin&email_prefix=al", headers=headers)
+    assert [user["email"] for user in response.get_json()] == ["Alex@test.com"]
+
+    assert client.get("/api/users?role=owner", headers=headers).status_code == 400
+    assert client.get("/api/users?cursor=bogus", headers=headers).status_code == 400
+
+
 def test_user_read_admin_success(client, get_auth_token_for, create_test_user):
     """Admin can read details of any user."""
     admin_token, _ = get_auth_token_for("admin")
@@ -93,8 +132,218 @@ def test_user_delete_admin_success(client, get_auth_token_for, create_test_user)
     response = client.delete(
         f'/api/users/{target_user["id"]}', headers={"Authorization": admin_token}
     )
-    assert response.status_code == 204
+    assert response.status_code == 202
+    assert response.headers["Location"] == response.get_json()["status_url"]
 
    
     deleted_user = get_user_by_email(target_user["email"])
     assert deleted_user is None
+
+
+def test_user_delete_cascades_tasks_in_background(
+    client, get_auth_token_for, create_test_user, app
+):
+    """The task cascade runs as a resumable job whose progress can be polled."""
+    from src.tasks.models import get_task_collection
+    from src.users.jobs import run_pending_user_deletes
+
+    admin_token, admin_id = get_auth_token_for("admin")
+    headers = {"Authorization": admin_token}
+    target_user = setup_target_user(create_test_user)
+    target_id = ObjectId(target_user["id"])
+    tasks = get_task_collection()
+    admin_object_id = ObjectId(admin_id)
+    tasks.insert_many(
+        [{"title": f"Mine {i}", "assigned_to": target_id} for i in range(5)]
+        + [{"title": "Made", "created_by": target_id, "assigned_to": admin_object_id}]
+        + [{"title": "Other", "assigned_to": admin_object_id}]
+    )
+
+    response = client.delete(f'/api/users/{target_user["id"]}', headers=headers)
+    assert response.status_code == 202
+    status_url = response.get_json()["status_url"]
+
+    job = client.get(status_url, headers=headers).get_json()
+    assert job["state"] == "pending"
+    assert tasks.count_documents({}) == 7  # Nothing deleted inside the request
+
+    with app.app_context():
+        # A stop request hands the job back after its first batch
+        first_batch_done = lambda: tasks.count_documents({}) < 7
+        run_pending_user_deletes(batch_size=2, pause=0, should_stop=first_batch_done)
+        job = client.get(status_url, headers=headers).get_json()
+        assert job["state"] == "pending"
+        assert job["tasks_deleted"] == 2
+
+        run_pending_user_deletes(batch_size=2, pause=0)
+
+    job = client.get(status_url, headers=headers).get_json()
+    assert job["state"] == "completed"
+    assert job["tasks_deleted"] == 6
+    assert [task["title"] for task in tasks.find()] == ["Other"]
+
+    assert client.get("/api/users/jobs/bogus", headers=headers).status_code == 400
+    missing = client.get(f"/api/users/jobs/{ObjectId()}", headers=headers)
+    assert missing.status_code == 404
+
+
+def test_user_delete_queues_task_attachments(
+    client, get_auth_token_for, create_test_user, app
+):
+    """Deleting a user also releases the files attached to their tasks."""
+    from src.tasks.models import get_task_collection
+    from src.users.jobs import run_pending_user_deletes
+    from src.utils.reaper import get_file_outbox_collection
+
+    admin_token, _ = get_auth_token_for("admin")
+    target_user = setup_target_user(create_test_user)
+    doc_meta = {
+        "original_name": "a.pdf",
+        "stored_name": "abc_a.pdf",
+        "filepath": "/nonexistent/abc_a.pdf",
+        "mime_type": "application/pdf",
+        "size_bytes": 1,
+    }
+    get_task_collection().insert_one(
+        {
+            "title": "Owned",
+            "assigned_to": ObjectId(target_user["id"]),
+            "created_by": ObjectId(target_user["id"]),
+            "attached_documents": [doc_meta],
+        }
+    )
+
+    client.delete(
+        f'/api/users/{target_user["id"]}', headers={"Authorization": admin_token}
+    )
+    with app.app_context():
+        run_pending_user_deletes(pause=0)
+
+    record = get_file_outbox_collection().find_one()
+    assert record["attachments"][0]["stored_name"] == "abc_a.pdf"
+
+
+def test_user_delete_job_stops_after_losing_its_lease(
+    client, get_auth_token_for, create_test_user, app
+):
+    """A worker whose lease was taken over deletes nothing more; files go once."""
+    from src.tasks.models import get_task_collection
+    from src.users.jobs import _claim_next, _delete_batch, _now, _run_job
+    from src.users.models import get_user_delete_job_collection
+    from src.utils.reaper import get_file_outbox_collection
+
+    admin_token, _ = get_auth_token_for("admin")
+    target_user = setup_target_user(create_test_user)
+    target_id = ObjectId(target_user["id"])
+    tasks = get_task_collection()
+    tasks.insert_many(
+        [
+            {
+                "title": f"Mine {i}",
+                "assigned_to": target_id,
+                "attached_documents": [{"stored_name": f"f{i}.pdf"}],
+            }
+            for i in range(3)
+        ]
+    )
+    client.delete(
+        f'/api/users/{target_user["id"]}', headers={"Authorization": admin_token}
+    )
+
+    with app.app_context():
+        jobs = get_user_delete_job_collection()
+        job = _claim_next(_now())
+        # The lease expired and another worker claimed the job
+        jobs.update_one({"_id": job["_id"]}, {"$set": {"lease_token": ObjectId()}})
+        assert _run_job(job, batch_size=2, pause=0, should_stop=lambda: False) is False
+        assert tasks.count_documents({}) == 3
+        assert jobs.find_one({"_id": job["_id"]})["state"] == "running"
+
+        # A task deleted by someone else meanwhile is neither counted nor released
+        first = tasks.find_one({}, sort=[("_id", 1)])
+        tasks.delete_one({"_id": first["_id"]})
+        assert _delete_batch(target_id, "assigned_to", batch_size=2) == 2
+        released = [
+            doc["stored_name"]
+            for record in get_file_outbox_collection().find()
+            for doc in record["attachments"]
+        ]
+        assert sorted(released) == ["f1.pdf", "f2.pdf"]
+        assert _delete_batch(target_id, "assigned_to", batch_size=2) is None
+
+
+def test_user_delete_job_records_any_failure_and_gives_up(
+    client, get_auth_token_for, create_test_user, app, monkeypatch
+):
+    """Non-database errors count as attempts too; the job is parked eventually."""
+    from src.users import jobs
+    from src.users.models import get_user_delete_job_collection
+
+    admin_token, _ = get_auth_token_for("admin")
+    target_user = setup_target_user(create_test_user)
+    client.delete(
+        f'/api/users/{target_user["id"]}', headers={"Authorization": admin_token}
+    )
+
+    def broken_batch(*args):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(jobs, "_delete_batch", broken_batch)
+    job_collection = get_user_delete_job_collection()
+    with app.app_context():
+        for attempt in range(1, jobs.JOB_MAX_ATTEMPTS + 1):
+            assert jobs.run_pending_user_deletes(pause=0) == 1
+            job = job_collection.find_one()
+            assert job["attempts"] == attempt
+            assert job["last_error"] == "unexpected"
+            # Make the retry due now
+            job_collection.update_one(
+                {"_id": job["_id"]}, {"$set": {"next_attempt_at": jobs._now()}}
+            )
+
+        assert job["state"] == "failed"
+        assert jobs.run_pending_user_deletes(pause=0) == 0
+
+
+def test_user_delete_batch_counts_only_what_it_deleted(
+    create_test_user, app, monkeypatch
+):
+    """A task reassigned between the read and the delete is left alone."""
+    from src.tasks.models import get_task_collection
+    from src.users import jobs
+    from src.utils.reaper import get_file_outbox_collection
+
+    target_id = ObjectId(setup_target_user(create_test_user)["id"])
+    tasks = get_task_collection()
+    task_ids = tasks.insert_many(
+        [
+            {
+                "title": f"Mine {i}",
+                "assigned_to": target_id,
+                "attached_documents": [{"stored_name": f"f{i}.pdf"}],
+            }
+            for i in range(3)
+        ]
+    ).inserted_ids
+
+    class ReassignFirst:
+        """The tasks collection, with a concurrent reassignment before delete_many."""
+
+        def __getattr__(self, name):
+            return getattr(tasks, name)
+
+        def delete_many(self, query):
+            tasks.update_one({"_id": task_ids[0]}, {"$set": {"assigned_to": None}})
+            return tasks.delete_many(query)
+
+    monkeypatch.setattr(jobs, "get_task_collection", ReassignFirst)
+    with app.app_context():
+        assert jobs._delete_batch(target_id, "assigned_to", batch_size=10) == 2
+
+    assert [task["_id"] for task in tasks.find()] == [task_ids[0]]
+    released = [
+        doc["stored_name"]
+        for record in get_file_outbox_collection().find()
+        for doc in record["attachments"]
+    ]
+    assert sorted(released) == ["f1.pdf", "f2.pdf"]
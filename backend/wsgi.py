@@ -0,0 +1,11 @@
+"""
+WSGI entry point for gunicorn (`gunicorn wsgi:app`).
+
+Each worker process imports this module, so each builds its own app and
+starts its own background threads; CLIs import create_app() instead.
+"""
+
+from app import create_app, start_background_workers
+
+app = create_app()
+start_background_workers(app)
@@ -43,7 +43,7 @@ const TaskFormModal = ({ open, onClose, task = null }) => {
     description: task?.description || "",
     status: task?.status || "To Do",
     priority: task?.priority || "Low",
-    due_date: task?.due_date || "",
+    due_date: task?.due_date?.slice(0, 10) || "", // API returns an ISO date-time
     assigned_to: task?.assigned_to || "", // ID of the user assigned
   });
   const [files, setFiles] = useState([]); // New files to upload
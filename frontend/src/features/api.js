@@ -1,7 +1,7 @@
 import axios from "axios";
 
 const API = axios.create({
-  baseURL: "http://localhost:5000/api",
+  baseURL: process.env.REACT_APP_API_URL || "http://localhost:5000/api",
    
 });
 
@@ -44,7 +44,7 @@ export const downloadDocument = (taskId, storedName) =>
     { responseType: "blob" } 
   );
 
-export const fetchUsers = () => API.get("/users");
+export const fetchUsers = (params) => API.get("/users", { params }); // email_prefix, role, cursor
 export const updateUser = (id, data) => API.put(`/users/${id}`, data);
 export const deleteUser = (id) => API.delete(`/users/${id}`);
 export const logoutUser = () => API.post("/auth/logout");
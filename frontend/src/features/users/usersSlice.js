@@ -3,6 +3,7 @@ import * as api from "../api";
 
 const initialState = {
   users: [],
+  nextCursor: null, // cursor of the next page (X-Next-Cursor), null on the last
   status: "idle",
   error: null,
 };
@@ -11,10 +12,14 @@ const initialState = {
 
 export const getUsers = createAsyncThunk(
   "users/getUsers",
-  async (_, { rejectWithValue }) => {
+  async (params = {}, { rejectWithValue }) => {
     try {
-      const response = await api.fetchUsers();
-      return response.data;
+      const response = await api.fetchUsers(params);
+      return {
+        users: response.data,
+        nextCursor: response.headers["x-next-cursor"] || null,
+        append: Boolean(params.cursor),
+      };
     } catch (error) {
       return rejectWithValue(
         error.response.data.msg || "Failed to fetch users."
@@ -68,14 +73,18 @@ const usersSlice = createSlice({
         state.status = "loading";
       })
       .addCase(getUsers.fulfilled, (state, action) => {
+        const { users, nextCursor, append } = action.payload;
         state.status = "succeeded";
-        state.users = action.payload;
+        // A cursor request adds the next page below the ones already loaded
+        state.users = append ? [...state.users, ...users] : users;
+        state.nextCursor = nextCursor;
         state.error = null;
       })
       .addCase(getUsers.rejected, (state, action) => {
         state.status = "failed";
         state.error = action.payload;
         state.users = [];
+        state.nextCursor = null;
       })
 
       
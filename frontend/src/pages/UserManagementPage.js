@@ -14,6 +14,8 @@ import {
   TableHead,
   TableRow,
   IconButton,
+  TextField,
+  Button,
 } from "@mui/material";
 import DeleteIcon from "@mui/icons-material/Delete";
 import EditIcon from "@mui/icons-material/Edit";
@@ -23,17 +25,29 @@ import UserFormModal from "../components/users/UserFormModal";
 
 const UserManagementPage = () => {
   const dispatch = useDispatch();
-  const { users, status, error } = useSelector((state) => state.users);
+  const { users, nextCursor, status, error } = useSelector(
+    (state) => state.users
+  );
   const isLoading = status === "loading";
+  const [emailPrefix, setEmailPrefix] = React.useState("");
+  const filters = emailPrefix ? { email_prefix: emailPrefix } : {};
 
   const [openEditModal, setOpenEditModal] = React.useState(false);
   const [selectedUser, setSelectedUser] = React.useState(null);
   
 
   useEffect(() => {
-    
-    dispatch(getUsers());
-  }, [dispatch]);
+    // Only the first page is loaded; wait for the user to stop typing
+    const timer = setTimeout(
+      () => dispatch(getUsers(emailPrefix ? { email_prefix: emailPrefix } : {})),
+      300
+    );
+    return () => clearTimeout(timer);
+  }, [dispatch, emailPrefix]);
+
+  const handleLoadMore = () => {
+    dispatch(getUsers({ ...filters, cursor: nextCursor }));
+  };
 
   const handleDelete = (userId) => {
     if (
@@ -63,7 +77,7 @@ const UserManagementPage = () => {
       .then(() => {
         handleCloseEdit();
         
-        dispatch(getUsers());
+        dispatch(getUsers(filters));
       })
       .catch((err) => {
         
@@ -95,7 +109,15 @@ const UserManagementPage = () => {
           </Alert>
         )}
 
-        {isLoading ? (
+        <TextField
+          label="Search by email"
+          size="small"
+          value={emailPrefix}
+          onChange={(e) => setEmailPrefix(e.target.value)}
+          sx={{ mb: 2 }}
+        />
+
+        {isLoading && users.length === 0 ? (
           <Box sx={{ display: "flex", justifyContent: "center", py: 5 }}>
             <CircularProgress />
           </Box>
@@ -140,6 +162,13 @@ const UserManagementPage = () => {
                 </TableBody>
               </Table>
             </TableContainer>
+            {nextCursor && (
+              <Box sx={{ display: "flex", justifyContent: "center", py: 2 }}>
+                <Button onClick={handleLoadMore} disabled={isLoading}>
+                  Load more
+                </Button>
+              </Box>
+            )}
           </Paper>
         )}
       </Container>